@@ -0,0 +1,96 @@
+# app/alert_hub.py
+# Diffusion des nouvelles alertes aux clients connectés (WebSocket ou SSE).
+# Chaque client a son filtre et une file bornée dans la boucle d'événements :
+# la publication, appelée depuis n'importe quel thread (caméras, requêtes),
+# ne bloque jamais. Un client trop lent perd ses alertes les plus anciennes
+# au lieu de ralentir les autres.
+import asyncio
+import threading
+
+from .config import ALERT_CLIENT_QUEUE
+
+
+def alert_event(alert: dict) -> dict:
+    """Alerte sérialisable en JSON (date au format ISO)."""
+    return dict(alert, dateTime=alert["dateTime"].isoformat(timespec="seconds"))
+
+
+class AlertFilter:
+    def __init__(self, camera=None, violence_type=None, min_score=None):
+        self.camera = camera
+        self.violence_type = violence_type
+        self.min_score = min_score
+
+    def match(self, alert: dict) -> bool:
+        if self.camera and alert["cameraName"] != self.camera:
+            return False
+        if self.violence_type and alert["violenceType"] != self.violence_type:
+            return False
+        if self.min_score is not None and alert["confidenceScore"] < self.min_score:
+            return False
+        return True
+
+
+class Subscription:
+    def __init__(self, alert_filter: AlertFilter, maxsize: int):
+        self.filter = alert_filter
+        self.queue = asyncio.Queue(maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def _offer(self, event: dict):
+        # Exécuté dans la boucle d'événements : file pleine -> on écarte la plus ancienne
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Prochaine alerte, ou None après `timeout` secondes."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class AlertHub:
+    def __init__(self, maxsize=ALERT_CLIENT_QUEUE):
+        self.maxsize = maxsize
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped_closed = 0  # pertes des clients déjà déconnectés
+
+    def subscribe(self, alert_filter: AlertFilter) -> Subscription:
+        """À appeler depuis la boucle d'événements du client."""
+        sub = Subscription(alert_filter, self.maxsize)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subs.discard(sub)
+            self._dropped_closed += sub.dropped
+
+    def publish(self, alert: dict):
+        event = alert_event(alert)
+        with self._lock:
+            self._published += 1
+            targets = [s for s in self._subs if s.filter.match(alert)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:  # boucle fermée
+                self.unsubscribe(sub)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._subs),
+                "published": self._published,
+                "dropped": self._dropped_closed + sum(s.dropped for s in self._subs),
+            }
+
+
+hub = AlertHub()
@@ -1,13 +1,14 @@
 # Logique d'authentification
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from .database import SessionLocal
+from .auth_cache import principal_cache, token_cache
+from .database import AsyncSessionLocal
 from . import crud
-from .utils import get_password_hash, verify_password  # Importer depuis utils
+from .utils import get_password_hash, verify_password, verify_password_async  # Importer depuis utils
 # Fonction pour récupérer l'utilisateur courant
 from . import schemas  # Assure-toi que schemas.UserInDB est bien défini
 
@@ -16,20 +17,8 @@ SECRET_KEY = "votre_cle_secrete_complexe"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Configuration du hashage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Fonctions de hashage
-def get_password_hash(password: str) -> str:
-    """Hash un mot de passe avec bcrypt"""
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Vérifie si un mot de passe correspond à son hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
 # Fonction d'authentification
 def authenticate_user(db, email: str, password: str):
     """Authentifie un utilisateur avec email et mot de passe"""
@@ -41,6 +30,16 @@ def authenticate_user(db, email: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db, email: str, password: str):
+    """authenticate_user pour les endpoints async (AsyncSession) : bcrypt hors
+    de la boucle d'événements"""
+    user = await crud.get_user_by_email_async(db, email)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.hashed_password):
+        return False
+    return user
+
 # Fonction de création de token
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crée un token JWT"""
@@ -61,25 +60,45 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Token invalide ou expiré",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    email = _decode_subject(token)
+    if email is None:
         raise credentials_exception
 
-    # Connexion à la base
-    db = SessionLocal()
-    user = crud.get_user_by_email(db, email)
-    db.close()
+    current = principal_cache.get(email)
+    if current is not None:
+        return current
 
+    # Connexion à la base
+    async with AsyncSessionLocal() as db:
+        user = await crud.get_user_by_email_async(db, email)
     if user is None:
         raise credentials_exception
 
     # ✅ On retourne un objet compatible avec schemas.UserInDB
-    return schemas.UserInDB(
+    current = schemas.UserInDB(
         id=user.id,
         email=user.email,
         role=user.role,
-    )
\ No newline at end of file
+    )
+    principal_cache.put(email, current)
+    return current
+
+
+def _decode_subject(token: str) -> Optional[str]:
+    """Email du jeton, ou None s'il est invalide ou expiré. Un jeton déjà
+    vérifié n'est pas redécodé avant son expiration."""
+    now = time.time()
+    cached = token_cache.get(token)
+    if cached is not None:
+        email, exp = cached
+        return email if exp > now else None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    email = payload.get("sub")
+    if email is None:
+        return None
+    exp = payload.get("exp", now + token_cache.ttl)
+    token_cache.put(token, (email, exp), ttl=exp - now)
+    return email
@@ -0,0 +1,66 @@
+# app/auth_cache.py
+# Caches du chemin d'authentification : jetons JWT déjà décodés (jusqu'à leur
+# expiration) et utilisateurs courants par sujet du jeton (email), avec TTL.
+# Une requête authentifiée n'ouvre donc plus de session SQL tant que
+# l'utilisateur est en cache. crud.delete_user et crud.update_user_role
+# invalident l'entrée ; le TTL borne le retard des autres processus.
+import threading
+import time
+from collections import OrderedDict
+
+from .config import AUTH_CACHE_SIZE, AUTH_PRINCIPAL_TTL
+
+
+class TTLCache:
+    """LRU borné dont chaque entrée expire après `ttl` secondes (0 = désactivé)."""
+    def __init__(self, ttl, max_items=AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items = OrderedDict()  # clé -> (expiration, valeur)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._items[key]
+                self._counters["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._counters["hits"] += 1
+            return item[1]
+
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, size=len(self._items))
+
+
+# jeton -> (email, expiration UNIX) ; le TTL réel est celui du jeton
+token_cache = TTLCache(ttl=24 * 3600)
+# email -> schemas.UserInDB
+principal_cache = TTLCache(ttl=AUTH_PRINCIPAL_TTL)
+
+
+def invalidate_principal(email: str):
+    principal_cache.pop(email)
@@ -0,0 +1,272 @@
+# app/cameras.py
+# Ingestion des caméras en direct : un lecteur par source (RTSP, HTTP-MJPEG
+# ou fichier local pour les tests) écrit des frames réduites dans un anneau
+# préalloué ; à chaque pas (stride), une fenêtre glissante est échantillonnée
+# et évaluée par le modèle two-stream ou I3D. Une alerte est émise quand le
+# seuil est franchi. Un flux réseau coupé est rouvert avec un délai
+# croissant (CAMERA_RECONNECT_MIN à CAMERA_RECONNECT_MAX).
+#
+# La frame pleine résolution n'existe qu'une fois (tampon de décodage
+# réutilisé) : elle est réduite directement dans son emplacement de l'anneau.
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import cv2
+import numpy as np
+
+from .config import (
+    CAMERA_ALERT_COOLDOWN, CAMERA_RECONNECT_MAX, CAMERA_RECONNECT_MIN, CAMERA_SCORER_WORKERS,
+)
+from models import i3d_inference, two_stream_inference
+from models.metrics import model_context
+from src.api.alerts import record_alert
+
+FRAME_SIZE = two_stream_inference.FRAME_SIZE
+MAX_FRAMES = two_stream_inference.MAX_FRAMES
+CAMERA_MODELS = {  # modèle -> seuil par défaut
+    "i3d_two_streams": two_stream_inference.THRESHOLD,
+    "i3d": i3d_inference.THRESHOLD_I3D,
+}
+
+
+def redact_source(source: str) -> str:
+    """Source affichable sans droits admin : URL sans user:password@,
+    chemin local réduit au nom du fichier."""
+    parts = urlsplit(source)
+    if parts.scheme and parts.netloc:
+        host = parts.netloc.rsplit("@", 1)[-1]
+        return urlunsplit((parts.scheme, host, parts.path, parts.query, parts.fragment))
+    return os.path.basename(source)
+
+
+class FrameRing:
+    """Anneau de frames BGR uint8 réduites, indexées par un compteur absolu."""
+    def __init__(self, capacity, frame_size=FRAME_SIZE):
+        self.capacity = capacity
+        self.frames = np.empty((capacity, frame_size[1], frame_size[0], 3), np.uint8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def next_slot(self):
+        return self.frames[self.count % self.capacity]
+
+    def commit(self):
+        with self._lock:
+            self.count += 1
+
+    def sample(self, length, num):
+        """`num` frames réparties sur les `length` dernières (copie 224x224
+        uniquement) et leurs index absolus. Les index sont pris sur une grille
+        fixe (multiples du pas) : d'une fenêtre à la suivante, les paires de
+        frames communes sont les mêmes et leur flux optique reste en cache."""
+        with self._lock:
+            end = self.count
+        step = max((min(length, self.capacity) - 1) // (num - 1), 1)
+        last = (end - 1) // step * step
+        idxs = np.maximum(last - step * np.arange(num - 1, -1, -1), 0)
+        return self.frames[idxs % self.capacity], idxs
+
+
+class Camera:
+    def __init__(self, name, source, model="i3d_two_streams", window_seconds=5.0,
+                 stride_seconds=1.0, threshold=None, loop=False):
+        if model not in CAMERA_MODELS:
+            raise ValueError(f"Modèle non supporté pour le direct : {model}")
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.source = source
+        self.model = model
+        self.window_seconds = window_seconds
+        self.stride_seconds = stride_seconds
+        self.threshold = threshold if threshold is not None else CAMERA_MODELS[model]
+        self.loop = loop
+
+        self.fps = 0.0
+        self.ring = None
+        self.status = "starting"
+        self.error = None
+        self.frames_read = 0
+        self.windows_scored = 0
+        self.windows_skipped = 0
+        self.last_score = None
+        self.last_alert_at = 0.0
+        self.reconnects = 0
+        self.scoring = False
+        self._window = None  # frames par fenêtre et par pas, fixés à la première ouverture
+        self._stride = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def to_dict(self, full_source: bool = False) -> dict:
+        """full_source : source brute (admins), sinon sans identifiants."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "source": self.source if full_source else redact_source(self.source),
+            "model": self.model,
+            "status": self.status,
+            "error": self.error,
+            "fps": self.fps,
+            "window_seconds": self.window_seconds,
+            "stride_seconds": self.stride_seconds,
+            "threshold": self.threshold,
+            "frames_read": self.frames_read,
+            "windows_scored": self.windows_scored,
+            "windows_skipped": self.windows_skipped,
+            "last_score": self.last_score,
+            "reconnects": self.reconnects,
+        }
+
+
+class CameraEngine:
+    def __init__(self, scorer_workers=CAMERA_SCORER_WORKERS):
+        self._scorers = ThreadPoolExecutor(max_workers=scorer_workers, thread_name_prefix="cam-score")
+        self._cameras = {}
+        self._lock = threading.Lock()
+
+    def add(self, **params) -> Camera:
+        cam = Camera(**params)
+        with self._lock:
+            self._cameras[cam.id] = cam
+        cam._thread = threading.Thread(target=self._read, args=(cam,), name=f"cam-{cam.name}", daemon=True)
+        cam._thread.start()
+        return cam
+
+    def remove(self, camera_id) -> bool:
+        with self._lock:
+            cam = self._cameras.pop(camera_id, None)
+        if cam is None:
+            return False
+        cam._stop.set()
+        return True
+
+    def get(self, camera_id):
+        return self._cameras.get(camera_id)
+
+    def list(self, full_source: bool = False) -> list:
+        with self._lock:
+            return [cam.to_dict(full_source) for cam in self._cameras.values()]
+
+    def shutdown(self):
+        with self._lock:
+            cameras = list(self._cameras.values())
+            self._cameras.clear()
+        for cam in cameras:
+            cam._stop.set()
+        self._scorers.shutdown(wait=False)
+
+    # --- lecture (un thread par caméra) ---
+    def _read(self, cam: Camera):
+        """Un flux réseau (RTSP, HTTP) coupé ou inaccessible est rouvert avec
+        un délai croissant ; seul un fichier local peut se terminer."""
+        is_file = "://" not in cam.source
+        backoff = CAMERA_RECONNECT_MIN
+        try:
+            while not cam._stop.is_set():
+                cap = cv2.VideoCapture(cam.source)
+                try:
+                    read = self._read_capture(cam, cap, is_file) if cap.isOpened() else None
+                finally:
+                    cap.release()
+                if is_file:
+                    if read is None:
+                        cam.status, cam.error = "error", "Source inaccessible"
+                    elif not cam._stop.is_set():
+                        cam.status = "ended"
+                    break
+                if cam._stop.is_set():
+                    break
+                if read:
+                    backoff = CAMERA_RECONNECT_MIN  # le flux a repris : délai remis à zéro
+                cam.status = "reconnecting"
+                cam.error = "Source inaccessible" if read is None else "Flux interrompu"
+                cam.reconnects += 1
+                cam._stop.wait(backoff)
+                backoff = min(backoff * 2, CAMERA_RECONNECT_MAX)
+        except Exception as e:
+            cam.status, cam.error = "error", str(e)
+        finally:
+            if cam.status in ("starting", "running", "reconnecting"):
+                cam.status = "stopped"
+
+    def _read_capture(self, cam: Camera, cap, is_file):
+        """Lit `cap` jusqu'à sa fin ou l'arrêt de la caméra ; renvoie le
+        nombre de frames lues. L'anneau est créé à la première ouverture et
+        conservé aux reconnexions."""
+        if cam.ring is None:
+            cam.fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            cam._window = max(int(round(cam.window_seconds * cam.fps)), MAX_FRAMES)
+            cam._stride = max(int(round(cam.stride_seconds * cam.fps)), 1)
+            # Marge : la grille d'échantillonnage peut reculer d'un pas
+            cam.ring = FrameRing(cam._window + 2 * cam._stride + cam._window // MAX_FRAMES)
+        window, stride = cam._window, cam._stride
+        cam.status, cam.error = "running", None
+
+        buf = None  # tampon de décodage pleine résolution, réutilisé
+        # Après une reconnexion, une fenêtre entière de frames neuves avant
+        # d'évaluer : pas de fenêtre à cheval sur la coupure
+        next_score = cam.ring.count + window
+        read = 0
+        t_start = time.monotonic()
+        while not cam._stop.is_set():
+            ret, buf = cap.read(buf)
+            if not ret:
+                if is_file and cam.loop:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                break
+            cv2.resize(buf, FRAME_SIZE, dst=cam.ring.next_slot())
+            cam.ring.commit()
+            cam.frames_read += 1
+            read += 1
+
+            if cam.ring.count >= next_score:
+                next_score += stride
+                self._schedule(cam, window)
+
+            if is_file:
+                # Fichier de test : lecture au rythme réel de la vidéo
+                delay = t_start + read / cam.fps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        return read
+
+    # --- évaluation de la fenêtre glissante ---
+    def _schedule(self, cam: Camera, window):
+        if cam.scoring:
+            # Fenêtre précédente encore en cours : on saute ce pas
+            cam.windows_skipped += 1
+            return
+        cam.scoring = True
+        clip, idxs = cam.ring.sample(window, MAX_FRAMES)
+        self._scorers.submit(self._score, cam, clip, idxs)
+
+    def _score(self, cam: Camera, clip, idxs):
+        with model_context(cam.model):
+            self._score_window(cam, clip, idxs)
+
+    def _score_window(self, cam: Camera, clip, idxs):
+        try:
+            # L'anneau contient déjà des frames BGR uint8 224x224
+            if cam.model == "i3d_two_streams":
+                prob = two_stream_inference.predict_clip(clip, stream_id=cam.id, idxs=idxs)
+            else:
+                prob = i3d_inference.predict_clip(np.ascontiguousarray(clip[..., ::-1]))
+            cam.last_score = prob
+            cam.windows_scored += 1
+
+            now = time.time()
+            if prob > cam.threshold and now - cam.last_alert_at >= CAMERA_ALERT_COOLDOWN:
+                cam.last_alert_at = now
+                record_alert(cam.name, "Violence", prob)
+        except Exception as e:
+            cam.error = str(e)
+        finally:
+            cam.scoring = False
+
+
+engine = CameraEngine()
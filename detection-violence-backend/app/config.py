@@ -1 +1,56 @@
-#configuration
\ No newline at end of file
+#configuration
+import os
+
+# Répertoires
+TEMP_DIR = os.getenv("TEMP_DIR", "temp_videos")
+ANNOTATED_DIR = os.getenv("ANNOTATED_DIR", "annotated_videos")
+
+# Jobs d'analyse asynchrones
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", "2"))  # analyses en flux simultanées
+STREAM_UPLOAD_TTL = float(os.getenv("STREAM_UPLOAD_TTL", "600"))  # secondes d'attente du PUT
+
+# Cache des résultats de prédiction
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))  # secondes
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("RESULT_CACHE_MEMORY_ITEMS", "256"))
+RESULT_CACHE_DISK_MB = float(os.getenv("RESULT_CACHE_DISK_MB", "64"))
+
+# Caméras en direct
+CAMERA_SCORER_WORKERS = int(os.getenv("CAMERA_SCORER_WORKERS", "4"))
+CAMERA_ALERT_COOLDOWN = float(os.getenv("CAMERA_ALERT_COOLDOWN", "30"))  # secondes entre deux alertes
+CAMERA_RECONNECT_MIN = float(os.getenv("CAMERA_RECONNECT_MIN", "1"))  # secondes avant la 1re reconnexion
+CAMERA_RECONNECT_MAX = float(os.getenv("CAMERA_RECONNECT_MAX", "30"))  # délai maximal entre deux tentatives
+
+# Historique des alertes
+ALERTS_PAGE_SIZE = int(os.getenv("ALERTS_PAGE_SIZE", "50"))
+ALERTS_PAGE_MAX = int(os.getenv("ALERTS_PAGE_MAX", "500"))
+ALERTS_BULK_MAX = int(os.getenv("ALERTS_BULK_MAX", "10000"))  # alertes par POST /alerts/bulk
+
+# Diffusion des alertes (WebSocket / SSE)
+ALERT_CLIENT_QUEUE = int(os.getenv("ALERT_CLIENT_QUEUE", "100"))  # alertes en attente par client
+ALERT_KEEPALIVE = float(os.getenv("ALERT_KEEPALIVE", "15"))  # secondes entre deux pings SSE
+
+# E-mails d'alerte regroupés (aucun envoi si ALERT_EMAIL_TO est vide)
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "0") == "1"
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))  # connexion fermée après inactivité
+ALERT_EMAIL_FROM = os.getenv("ALERT_EMAIL_FROM", "alertes@localhost")
+ALERT_EMAIL_TO = [a.strip() for a in os.getenv("ALERT_EMAIL_TO", "").split(",") if a.strip()]
+EMAIL_DIGEST_WINDOW = float(os.getenv("EMAIL_DIGEST_WINDOW", "10"))  # secondes de regroupement
+EMAIL_DIGEST_MAX = int(os.getenv("EMAIL_DIGEST_MAX", "200"))  # alertes par message
+EMAIL_QUEUE_MAX = int(os.getenv("EMAIL_QUEUE_MAX", "10000"))
+
+# Authentification
+AUTH_PRINCIPAL_TTL = float(os.getenv("AUTH_PRINCIPAL_TTL", "60"))  # secondes, 0 = pas de cache
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))  # entrées par cache (utilisateurs, jetons)
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))  # bcrypt simultanés
+
+# Base de données (SQLite en mode WAL, voir app/database.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))  # attente d'un verrou d'écriture
+ADMIN_USERS_PAGE_SIZE = int(os.getenv("ADMIN_USERS_PAGE_SIZE", "100"))
+ADMIN_USERS_PAGE_MAX = int(os.getenv("ADMIN_USERS_PAGE_MAX", "500"))
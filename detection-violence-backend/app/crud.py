@@ -1,6 +1,12 @@
 # Opérations CRUD
+import base64
+import json
+from datetime import datetime
 from . import models, schemas
-from .utils import get_password_hash  # Importer depuis utils
+from .auth_cache import invalidate_principal
+from .utils import get_password_hash, get_password_hash_async  # Importer depuis utils
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 def get_user_by_email(db, email: str):
@@ -25,3 +31,208 @@ def delete_user(db: Session, user_id: int):
     if user:
         db.delete(user)
         db.commit()
+        invalidate_principal(user.email)
+
+def update_user_role(db: Session, user_id: int, role: str):
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user:
+        user.role = role
+        db.commit()
+        db.refresh(user)
+        invalidate_principal(user.email)
+    return user
+
+# Jobs d'analyse
+def create_job(db: Session, job_id: str, model: str, video_path: str):
+    job = models.Job(id=job_id, model=model, video_path=video_path, status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: str):
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+def update_job(db: Session, job_id: str, **fields):
+    if "result" in fields and fields["result"] is not None:
+        fields["result"] = json.dumps(fields["result"])
+    db.query(models.Job).filter(models.Job.id == job_id).update(fields)
+    db.commit()
+
+def claim_job(db: Session, job_id: str, from_status: str, **fields) -> bool:
+    """Mise à jour conditionnelle (UPDATE ... WHERE status = from_status) :
+    un seul worker obtient le job quand plusieurs le réclament."""
+    if "result" in fields and fields["result"] is not None:
+        fields["result"] = json.dumps(fields["result"])
+    count = db.query(models.Job).filter(
+        models.Job.id == job_id, models.Job.status == from_status
+    ).update(fields, synchronize_session=False)
+    db.commit()
+    return count == 1
+
+def get_unfinished_jobs(db: Session):
+    return db.query(models.Job).filter(
+        models.Job.status.in_(["uploading", "queued", "running"])
+    ).all()
+
+# Alertes
+def _alert_row(alert: schemas.AlertCreate) -> dict:
+    return {
+        "date_time": alert.dateTime or datetime.now(),
+        "camera_name": alert.cameraName,
+        "violence_type": alert.violenceType,
+        "confidence_score": alert.confidenceScore,
+    }
+
+def create_alert(db: Session, alert: schemas.AlertCreate):
+    db_alert = models.Alert(**_alert_row(alert))
+    db.add(db_alert)
+    db.commit()
+    db.refresh(db_alert)
+    return db_alert
+
+def create_alerts_bulk(db: Session, alerts) -> int:
+    # Une seule transaction, INSERT groupés sans objets ORM intermédiaires
+    db.bulk_insert_mappings(models.Alert, [_alert_row(a) for a in alerts])
+    db.commit()
+    return len(alerts)
+
+def encode_alert_cursor(alert) -> str:
+    raw = f"{alert.date_time.isoformat()}|{alert.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_alert_cursor(cursor: str):
+    """(date_time, id) de la dernière alerte de la page précédente ; ValueError si invalide."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_time, alert_id = raw.split("|")
+        return datetime.fromisoformat(date_time), int(alert_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Curseur invalide") from e
+
+def _prefix(column, text: str):
+    # Recherche par préfixe sous forme d'intervalle : utilisable par l'index,
+    # contrairement à LIKE '%...%'
+    return and_(column >= text, column < text + "\U0010ffff")
+
+def _alerts_select(
+    limit: int,
+    cursor: str = None,
+    camera: str = None,
+    violence_type: str = None,
+    min_score: int = None,
+    max_score: int = None,
+    since: datetime = None,
+    until: datetime = None,
+    q: str = None,
+):
+    Alert = models.Alert
+    query = select(Alert)
+    if camera:
+        query = query.filter(Alert.camera_name == camera)
+    if violence_type:
+        query = query.filter(Alert.violence_type == violence_type)
+    if min_score is not None:
+        query = query.filter(Alert.confidence_score >= min_score)
+    if max_score is not None:
+        query = query.filter(Alert.confidence_score <= max_score)
+    if since is not None:
+        query = query.filter(Alert.date_time >= since)
+    if until is not None:
+        query = query.filter(Alert.date_time < until)
+    if q:
+        query = query.filter(or_(_prefix(Alert.camera_name, q), _prefix(Alert.violence_type, q)))
+    if cursor:
+        date_time, alert_id = decode_alert_cursor(cursor)
+        query = query.filter(or_(
+            Alert.date_time < date_time,
+            and_(Alert.date_time == date_time, Alert.id < alert_id),
+        ))
+    # Une ligne de plus pour savoir s'il reste une page, sans COUNT(*)
+    return query.order_by(Alert.date_time.desc(), Alert.id.desc()).limit(limit + 1)
+
+def _alerts_page(rows, limit):
+    next_cursor = encode_alert_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def list_alerts(db: Session, limit: int, **filters):
+    """Page d'alertes de la plus récente à la plus ancienne (pagination par
+    curseur : coût indépendant de la profondeur de la page). Filtres : voir
+    _alerts_select. Retourne (alertes, curseur suivant ou None)."""
+    rows = db.execute(_alerts_select(limit, **filters)).scalars().all()
+    return _alerts_page(rows, limit)
+
+def alert_to_dict(alert) -> dict:
+    return {
+        "id": alert.id,
+        "dateTime": alert.date_time,
+        "cameraName": alert.camera_name,
+        "violenceType": alert.violence_type,
+        "confidenceScore": alert.confidence_score,
+    }
+
+
+# Variantes async (endpoints async, AsyncSession de app/database.py)
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = models.User(email=user.email, hashed_password=hashed_password)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def delete_user_async(db: AsyncSession, user_id: int):
+    user = await db.get(models.User, user_id)
+    if user:
+        await db.delete(user)
+        await db.commit()
+        invalidate_principal(user.email)
+
+async def update_user_role_async(db: AsyncSession, user_id: int, role: str):
+    user = await db.get(models.User, user_id)
+    if user:
+        user.role = role
+        await db.commit()
+        invalidate_principal(user.email)
+    return user
+
+async def list_users_async(db: AsyncSession, limit: int, after_id: int = None, email_prefix: str = None):
+    """Page d'utilisateurs par id croissant (pagination par curseur : `after_id`
+    est le dernier id de la page précédente). La recherche par préfixe d'email
+    utilise l'index unique sur email. Retourne (utilisateurs, curseur suivant)."""
+    query = select(models.User)
+    if email_prefix:
+        query = query.where(_prefix(models.User.email, email_prefix))
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+    result = await db.execute(query.order_by(models.User.id).limit(limit + 1))
+    rows = result.scalars().all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+async def get_job_async(db: AsyncSession, job_id: str):
+    return await db.get(models.Job, job_id)
+
+async def create_alert_async(db: AsyncSession, alert: schemas.AlertCreate):
+    db_alert = models.Alert(**_alert_row(alert))
+    db.add(db_alert)
+    await db.commit()
+    await db.refresh(db_alert)
+    return db_alert
+
+async def create_alerts_bulk_async(db: AsyncSession, alerts) -> int:
+    rows = [_alert_row(a) for a in alerts]
+    await db.run_sync(lambda session: session.bulk_insert_mappings(models.Alert, rows))
+    await db.commit()
+    return len(rows)
+
+async def list_alerts_async(db: AsyncSession, limit: int, **filters):
+    result = await db.execute(_alerts_select(limit, **filters))
+    return _alerts_page(result.scalars().all(), limit)
@@ -0,0 +1,145 @@
+# app/email_digest.py
+# Envoi des e-mails d'alerte hors du chemin des requêtes : les alertes sont
+# déposées dans une file bornée, un thread les regroupe par fenêtre
+# (EMAIL_DIGEST_WINDOW) en un seul message récapitulatif et réutilise la même
+# connexion SMTP d'un message à l'autre (fermée après SMTP_IDLE_SECONDS
+# d'inactivité). Une rafale d'alertes donne donc quelques messages sur une
+# connexion, pas une connexion par alerte.
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from .config import (
+    ALERT_EMAIL_FROM, ALERT_EMAIL_TO, EMAIL_DIGEST_MAX, EMAIL_DIGEST_WINDOW, EMAIL_QUEUE_MAX,
+    SMTP_HOST, SMTP_IDLE_SECONDS, SMTP_PASSWORD, SMTP_PORT, SMTP_STARTTLS, SMTP_USER,
+)
+
+_STOP = object()
+
+
+def digest_message(alerts, sender, recipients) -> EmailMessage:
+    cameras = sorted({a["cameraName"] for a in alerts})
+    msg = EmailMessage()
+    msg["Subject"] = f"[Alerte] {len(alerts)} alerte(s) de violence - {', '.join(cameras)}"
+    msg["From"] = sender
+    msg["To"] = ", ".join(recipients)
+    lines = [
+        f"{a['dateTime']:%Y-%m-%d %H:%M:%S}  {a['cameraName']}  {a['violenceType']}  {a['confidenceScore']} %"
+        for a in alerts
+    ]
+    msg.set_content("Alertes détectées :\n\n" + "\n".join(lines) + "\n")
+    return msg
+
+
+class EmailDispatcher:
+    def __init__(self, recipients=ALERT_EMAIL_TO, window=EMAIL_DIGEST_WINDOW,
+                 max_batch=EMAIL_DIGEST_MAX, queue_max=EMAIL_QUEUE_MAX):
+        self.recipients = recipients
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue(queue_max)
+        self._thread = None
+        self._smtp = None
+        self._lock = threading.Lock()
+        self._counters = {"queued": 0, "dropped": 0, "digests": 0, "connections": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.recipients)
+
+    def submit(self, alert: dict):
+        """Dépose une alerte ; ne bloque jamais (file pleine -> alerte écartée)."""
+        if not self.enabled:
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(alert)
+            self._counters["queued"] += 1
+        except queue.Full:
+            self._counters["dropped"] += 1
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-email", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=SMTP_IDLE_SECONDS)
+            except queue.Empty:
+                self._close()
+                continue
+            if first is _STOP:
+                break
+            # Regroupement : on attend la fin de la fenêtre ou un lot plein
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._send(digest_message(batch, ALERT_EMAIL_FROM, self.recipients))
+        self._close()
+
+    def _connection(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10)
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD)
+            self._smtp = smtp
+            self._counters["connections"] += 1
+        return self._smtp
+
+    def _send(self, msg: EmailMessage):
+        # Une nouvelle tentative si le serveur a fermé la connexion réutilisée
+        for attempt in range(2):
+            try:
+                self._connection().send_message(msg)
+                self._counters["digests"] += 1
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                self._close()
+                if attempt == 1:
+                    self._counters["errors"] += 1
+                    print("Échec de l'envoi de l'e-mail d'alerte :", e)
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def stats(self) -> dict:
+        return dict(self._counters, enabled=self.enabled, queue_depth=self._queue.qsize())
+
+    def shutdown(self, timeout=5.0):
+        """Envoie ce qui est en file puis ferme la connexion."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+
+dispatcher = EmailDispatcher()
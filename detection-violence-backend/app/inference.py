@@ -0,0 +1,78 @@
+# app/inference.py
+# Aiguillage vers le bon modèle, partagé par /predict et les jobs
+from models import two_stream_inference, i3d_inference, cnn_lstm_inference, ensemble_inference
+from models import cascade_inference, temporal_search
+from models.two_stream_inference import predict_two_stream
+from models.i3d_inference      import predict_i3d
+from models.cnn_lstm_inference import predict_cnn_lstm
+from models.ensemble_inference import predict_ensemble
+from models.cascade_inference import predict_cascade
+from models.frame_sampler import probe_video
+from models.metrics import model_context
+from models.onnx_backend import served_weights
+
+SUPPORTED_MODELS = ("i3d_two_streams", "i3d", "cnn_lstm", "ensemble", "cascade")
+
+
+def model_signature(model: str):
+    """(fichier de poids servi, seuil, fournisseur de flux) du modèle : ce
+    qui détermine sa réponse. Le fichier dépend du backend (Keras ou ONNX).
+    Pour l'ensemble et la cascade : les fichiers de chaque modèle utilisé."""
+    if model == "i3d_two_streams":
+        ts = two_stream_inference
+        # Le filtre de mouvement et la recherche temporelle changent aussi la réponse
+        return (served_weights(ts.MODEL_FILE, ts.MODEL_NAME),
+                f"{ts.THRESHOLD}:{ts.MOTION_THRESHOLD}:{temporal_search.signature()}",
+                ts.FLOW.name)
+    if model == "i3d":
+        return (served_weights(i3d_inference.MODEL_I3D_PATH, i3d_inference.MODEL_NAME),
+                i3d_inference.THRESHOLD_I3D, None)
+    if model == "cnn_lstm":
+        return (served_weights(cnn_lstm_inference.MODEL_PATH, cnn_lstm_inference.MODEL_NAME),
+                cnn_lstm_inference.THRESHOLD, None)
+    if model == "ensemble":
+        ens = ensemble_inference
+        weights = tuple(model_signature(m)[0] for m in ens.WEIGHTS)
+        mix = ",".join(f"{m}={w}" for m, w in ens.WEIGHTS.items())
+        return (weights, f"{ens.THRESHOLD}:{mix}", two_stream_inference.FLOW.name)
+    if model == "cascade":
+        weights = (model_signature("cnn_lstm")[0], model_signature("i3d_two_streams")[0])
+        thresholds = f"{cascade_inference.LOW_THRESHOLD}:{model_signature('i3d_two_streams')[1]}"
+        return (weights, thresholds, two_stream_inference.FLOW.name)
+    raise ValueError(f"Modèle non supporté : {model}")
+
+
+def run_model(model: str, video_path: str, progress=None) -> dict:
+    """Lance le modèle demandé. `progress(done, total)` reçoit l'avancement
+    en segments (un seul segment pour i3d et cnn_lstm). Les métriques prises
+    pendant l'appel sont étiquetées avec `model`."""
+    with model_context(model):
+        return _run_model(model, video_path, progress)
+
+
+def _run_model(model, video_path, progress):
+    if model in ("i3d_two_streams", "cascade"):
+        fps, total = probe_video(video_path)
+        dur = total / fps if fps > 0 else 0.0
+        predict = predict_two_stream if model == "i3d_two_streams" else predict_cascade
+        return predict(
+            video_path, full_video=(dur < 10), meta=(fps, total), progress=progress
+        )
+
+    if model == "ensemble":
+        # Un décodage et un flux partagés par les trois modèles
+        return predict_ensemble(video_path, progress=progress)
+
+    if model == "i3d":
+        predict = predict_i3d
+    elif model == "cnn_lstm":
+        predict = predict_cnn_lstm
+    else:
+        raise ValueError(f"Modèle non supporté : {model}")
+
+    if progress is not None:
+        progress(0, 1)
+    resp = predict(video_path)
+    if progress is not None:
+        progress(1, 1)
+    return resp
@@ -0,0 +1,315 @@
+# app/jobs.py
+# Jobs d'analyse asynchrones : l'inférence tourne dans un pool de threads
+# borné, hors de la boucle d'événements, et l'état est persisté en base
+# pour survivre à un crash du worker (les jobs inachevés sont relancés au
+# démarrage). Les jobs "en flux" analysent la vidéo pendant son envoi.
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from . import crud
+from .config import JOB_WORKERS, STREAM_UPLOAD_TTL, STREAM_WORKERS, TEMP_DIR
+from .database import SessionLocal
+from .inference import run_model
+from .streaming import TAIL_TOLERANCE, StreamUpload
+from models.frame_sampler import probe_video
+from models.two_stream_inference import predict_two_stream_progressive
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._cancel = {}
+        self._streams = {}  # job_id -> (StreamUpload, fps, création) en attente d'envoi
+        self._stream_slots = threading.BoundedSemaphore(STREAM_WORKERS)
+        self._lock = threading.Lock()
+        self._stopping = False  # arrêt du serveur : les vidéos sont gardées pour recover()
+
+    def submit(self, model: str, video_path: str) -> str:
+        job_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            crud.create_job(db, job_id, model, video_path)
+        finally:
+            db.close()
+        self._enqueue(job_id)
+        return job_id
+
+    def create_stream(self, model: str, ext: str, fps: float = 0.0) -> str:
+        """Prépare un job dont la vidéo sera envoyée en flux (statut uploading)."""
+        self._expire_streams()
+        job_id = uuid.uuid4().hex
+        upload = StreamUpload(
+            os.path.join(TEMP_DIR, f"{job_id}{ext}"),
+            os.path.join(TEMP_DIR, f"{job_id}.fifo"),
+        )
+        db = SessionLocal()
+        try:
+            crud.create_job(db, job_id, model, upload.video_path)
+            crud.update_job(db, job_id, status="uploading")
+        finally:
+            db.close()
+        with self._lock:
+            self._streams[job_id] = (upload, fps, time.monotonic())
+        return job_id
+
+    def start_stream(self, job_id: str):
+        """Démarre le décodeur du flux et renvoie le StreamUpload à alimenter,
+        ou None si le job n'attend pas d'envoi ou si tous les décodeurs sont pris."""
+        self._expire_streams()
+        with self._lock:
+            if job_id not in self._streams:
+                return None
+            if not self._stream_slots.acquire(blocking=False):
+                return None
+            upload, fps, _ = self._streams.pop(job_id)
+            self._cancel[job_id] = threading.Event()
+        # Écrivain ouvert avant le décodeur : son ouverture du tube ne bloque pas
+        upload.open_pipe()
+        threading.Thread(
+            target=self._run_stream, args=(job_id, upload, fps),
+            name=f"stream-{job_id[:8]}", daemon=True,
+        ).start()
+        return upload
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule un job en attente ou en cours. False s'il est déjà terminé.
+        Passage conditionnel : un job qui vient de se terminer n'est pas
+        écrasé, et le worker qui l'exécute voit l'annulation à sa prochaine
+        mise à jour de progression (voir _run)."""
+        db = SessionLocal()
+        try:
+            while True:
+                db.expire_all()
+                job = crud.get_job(db, job_id)
+                if job is None or job.status in FINISHED:
+                    return False
+                if crud.claim_job(db, job_id, job.status, status="cancelled"):
+                    break
+        finally:
+            db.close()
+        with self._lock:
+            event = self._cancel.get(job_id)
+            pending = self._streams.pop(job_id, None)
+        if event is not None:
+            event.set()
+        if pending is not None:
+            pending[0].close()
+            pending[0].cleanup()
+        return True
+
+    def recover(self):
+        """Relance les jobs restés en attente ou en cours lors de l'arrêt.
+        Chaque changement d'état est conditionnel : avec plusieurs workers
+        uvicorn, un seul remet en file un job donné, et _run n'exécute un
+        job en file qu'une fois."""
+        db = SessionLocal()
+        ids = []
+        try:
+            for job in crud.get_unfinished_jobs(db):
+                if job.status == "uploading":
+                    crud.claim_job(db, job.id, "uploading", status="failed", error="Envoi interrompu")
+                elif not os.path.exists(job.video_path):
+                    crud.claim_job(db, job.id, job.status, status="failed",
+                                   error="Vidéo perdue au redémarrage")
+                elif job.status == "queued":
+                    ids.append(job.id)
+                elif crud.claim_job(db, job.id, "running", status="queued", progress_done=0):
+                    ids.append(job.id)
+        finally:
+            db.close()
+        for job_id in ids:
+            self._enqueue(job_id)
+
+    def shutdown(self):
+        # Les jobs interrompus gardent leur vidéo et leur état (queued ou
+        # running) : recover() les relance au prochain démarrage
+        self._stopping = True
+        with self._lock:
+            for event in self._cancel.values():
+                event.set()
+            pending = list(self._streams.values())
+            self._streams.clear()
+        for upload, _, _ in pending:
+            upload.close()
+            upload.cleanup()
+        self._pool.shutdown(wait=False)
+
+    def _expire_streams(self):
+        """Jobs en flux dont la vidéo n'a jamais été envoyée (pas de PUT) :
+        échec, et le tube et le fichier vide sont supprimés."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                (job_id, entry[0]) for job_id, entry in self._streams.items()
+                if now - entry[2] > STREAM_UPLOAD_TTL
+            ]
+            for job_id, _ in expired:
+                del self._streams[job_id]
+        if not expired:
+            return
+        db = SessionLocal()
+        try:
+            for job_id, upload in expired:
+                upload.close()
+                upload.cleanup()
+                crud.claim_job(db, job_id, "uploading", status="failed", error="Vidéo jamais envoyée")
+        finally:
+            db.close()
+
+    def _enqueue(self, job_id: str):
+        with self._lock:
+            self._cancel[job_id] = threading.Event()
+        self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id: str):
+        with self._lock:
+            event = self._cancel[job_id]
+        db = SessionLocal()
+        video_path = None
+        try:
+            job = crud.get_job(db, job_id)
+            if job is None:
+                return
+            # Réclamation atomique : un job relancé par plusieurs workers ne
+            # tourne qu'une fois, et seul celui qui l'exécute supprime la vidéo
+            if event.is_set() or not crud.claim_job(db, job_id, "queued", status="running"):
+                if self._cancelled(db, job_id):
+                    video_path = job.video_path  # annulé avant son démarrage
+                return
+            model, video_path = job.model, job.video_path
+
+            def progress(done, total):
+                # Mise à jour conditionnelle : un job qui n'est plus "running"
+                # (annulé, éventuellement par un autre worker) s'arrête
+                if event.is_set() or not crud.claim_job(
+                    db, job_id, "running", progress_done=done, progress_total=total
+                ):
+                    raise JobCancelled()
+
+            # Les états finaux ne sont écrits que depuis "running" : une
+            # annulation concurrente n'est jamais écrasée
+            try:
+                result = run_model(model, video_path, progress)
+            except JobCancelled:
+                claimed = False
+            except Exception as e:
+                print("Erreur pendant le job", job_id, ":", traceback.format_exc())
+                claimed = crud.claim_job(db, job_id, "running", status="failed", error=str(e))
+            else:
+                claimed = crud.claim_job(db, job_id, "running", status="done", result=result)
+            if not claimed and not self._cancelled(db, job_id):
+                video_path = None  # interrompu par l'arrêt : relancé au démarrage
+        finally:
+            db.close()
+            with self._lock:
+                self._cancel.pop(job_id, None)
+            if video_path and os.path.exists(video_path):
+                os.remove(video_path)
+
+    @staticmethod
+    def _cancelled(db, job_id: str) -> bool:
+        """Vrai si l'utilisateur a annulé le job (et non l'arrêt du serveur)."""
+        db.expire_all()
+        job = crud.get_job(db, job_id)
+        return job is None or job.status == "cancelled"
+
+
+    def _run_stream(self, job_id: str, upload: StreamUpload, fps: float):
+        with self._lock:
+            event = self._cancel[job_id]
+        db = SessionLocal()
+        try:
+            job = crud.get_job(db, job_id)
+            model = job.model
+            if not crud.claim_job(db, job_id, "uploading", status="running"):
+                # Annulé avant le début de l'envoi : le reste du corps est
+                # écrit dans le fichier seul, supprimé à la fin
+                upload.release_reader()
+                return
+            preds = []
+            decoded = [0.0]  # fin du dernier segment évalué, en secondes
+
+            def on_segment(line, prob, interval):
+                if event.is_set():
+                    raise JobCancelled()
+                preds.append(line)
+                decoded[0] = interval[1]
+                upload.release_reader()  # le décodeur lit : lecteur de garde inutile
+                # Résultats partiels visibles via GET /jobs/{id} pendant l'envoi ;
+                # écriture conditionnelle comme dans _run
+                if not crud.claim_job(db, job_id, "running", progress_done=len(preds),
+                                      result={"predictions": preds, "partial": True}):
+                    raise JobCancelled()
+
+            def progress(done, total):
+                if event.is_set() or not crud.claim_job(
+                    db, job_id, "running", progress_done=done, progress_total=total
+                ):
+                    raise JobCancelled()
+
+            try:
+                try:
+                    result = predict_two_stream_progressive(
+                        upload.fifo_path, upload.video_path, fps, on_segment
+                    )
+                finally:
+                    # Décodeur arrêté : l'envoi ne doit plus attendre sur le tube
+                    upload.release_reader()
+                upload.done.wait()
+                if not upload.complete:
+                    crud.claim_job(db, job_id, "running", status="failed", error="Envoi interrompu")
+                    return
+                if _missing_tail(upload.video_path, decoded[0]):
+                    # Flux illisible au fil de l'eau, ou décodeur arrêté en
+                    # route (tube rompu, frame illisible) : analyse du
+                    # fichier complet
+                    preds = []
+                    result = run_model(model, upload.video_path, progress)
+            except JobCancelled:
+                return
+            except Exception as e:
+                print("Erreur pendant le job", job_id, ":", traceback.format_exc())
+                crud.claim_job(db, job_id, "running", status="failed", error=str(e))
+                return
+
+            fields = {"progress_total": len(preds)} if preds else {}
+            crud.claim_job(db, job_id, "running", status="done", result=result, **fields)
+        finally:
+            db.close()
+            upload.done.wait()
+            with self._lock:
+                self._cancel.pop(job_id, None)
+            self._stream_slots.release()
+            upload.cleanup()
+
+
+def _missing_tail(video_path: str, decoded: float) -> bool:
+    """Vrai si l'analyse en flux s'est arrêtée avant la fin du fichier reçu."""
+    fps, total = probe_video(video_path)
+    duration = total / fps if fps > 0 else 0.0
+    return decoded < duration - TAIL_TOLERANCE
+
+
+def job_to_dict(job) -> dict:
+    return {
+        "id": job.id,
+        "model": job.model,
+        "status": job.status,
+        "progress": {"done": job.progress_done or 0, "total": job.progress_total or 0},
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+    }
+
+
+manager = JobManager()
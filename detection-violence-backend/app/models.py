@@ -1,5 +1,6 @@
 # models.py
-from sqlalchemy import Column, Integer, String
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
 from .database import Base
 
 class User(Base):
@@ -8,4 +9,48 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    role = Column(String, default="user")  
+    role = Column(String, default="user")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    model = Column(String)
+    video_path = Column(String)
+    status = Column(String, default="queued", index=True)  # uploading, queued, running, done, failed, cancelled
+    progress_done = Column(Integer, default=0)
+    progress_total = Column(Integer, default=0)
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PredictionCache(Base):
+    __tablename__ = "prediction_cache"
+
+    key = Column(String, primary_key=True)
+    value = Column(Text)  # JSON
+    size = Column(Integer)
+    created_at = Column(Float, index=True)
+
+
+class Alert(Base):
+    __tablename__ = "alerts"
+
+    id = Column(Integer, primary_key=True)
+    date_time = Column(DateTime, default=datetime.now, nullable=False)
+    camera_name = Column(String, nullable=False)
+    violence_type = Column(String, nullable=False)
+    confidence_score = Column(Integer, nullable=False)  # 0-100
+
+    # Index composites terminés par (date_time, id) : chaque filtre d'égalité
+    # suivi de la pagination par curseur se résout par un parcours d'index
+    # borné, quelle que soit la taille de l'historique
+    __table_args__ = (
+        Index("ix_alerts_date_time", "date_time", "id"),
+        Index("ix_alerts_camera_name", "camera_name", "date_time", "id"),
+        Index("ix_alerts_violence_type", "violence_type", "date_time", "id"),
+        Index("ix_alerts_confidence_score", "confidence_score", "date_time"),
+    )
@@ -0,0 +1,170 @@
+# app/result_cache.py
+# Cache des résultats de prédiction, adressé par le contenu : la clé combine
+# le SHA-256 de la vidéo, le modèle, l'empreinte de son fichier de poids, le
+# seuil et le fournisseur de flux optique. Un LRU en mémoire précède un
+# niveau disque (table SQLite) avec TTL et taille maximale. Les requêtes
+# identiques simultanées attendent le calcul déjà en cours au lieu d'en
+# lancer un nouveau. Chaque appelant reçoit sa propre copie du résultat,
+# avec le nom de son envoi.
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from sqlalchemy import func
+
+from . import models
+from .config import RESULT_CACHE_DISK_MB, RESULT_CACHE_MEMORY_ITEMS, RESULT_CACHE_TTL
+from .database import SessionLocal
+from .inference import model_signature
+
+
+def file_fingerprint(path: str) -> str:
+    """Empreinte du fichier de poids (chemin, taille, date de modification)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "absent"
+    raw = f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def cache_key(upload_sha256: str, model: str) -> str:
+    weights, threshold, flow = model_signature(model)
+    # Un fichier de poids, ou plusieurs pour l'ensemble
+    paths = weights if isinstance(weights, tuple) else (weights,)
+    fingerprint = ",".join(file_fingerprint(p) for p in paths)
+    raw = f"{upload_sha256}:{model}:{fingerprint}:{threshold}:{flow}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, memory_items=RESULT_CACHE_MEMORY_ITEMS, ttl=RESULT_CACHE_TTL,
+                 disk_mb=RESULT_CACHE_DISK_MB):
+        self.memory_items = memory_items
+        self.ttl = ttl
+        self.disk_bytes = int(disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()  # clé -> (horodatage, résultat)
+        self._inflight = {}           # clé -> Future
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "inflight_joins": 0}
+
+    def get_or_compute(self, key: str, compute, filename: str = None):
+        """Résultat en cache, ou calculé une seule fois par `compute()`.
+        Renvoie une copie, dont le champ "filename" devient `filename` s'il
+        est donné (le nom temporaire du premier envoi ne fuit pas)."""
+        with self._lock:
+            hit = self._memory_get(key)
+            if hit is not None:
+                self._counters["memory_hits"] += 1
+                return _for_caller(hit, filename)
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self._counters["inflight_joins"] += 1
+
+        if not owner:
+            return _for_caller(fut.result(), filename)
+
+        try:
+            result = self._disk_get(key)
+            if result is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+            else:
+                with self._lock:
+                    self._counters["misses"] += 1
+                result = compute()
+                self._disk_put(key, result)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        with self._lock:
+            self._memory_put(key, result)
+            self._inflight.pop(key, None)
+        fut.set_result(result)
+        return _for_caller(result, filename)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_items"] = len(self._memory)
+            stats["inflight"] = len(self._inflight)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    # --- niveau mémoire (appelé sous self._lock) ---
+    def _memory_get(self, key):
+        item = self._memory.get(key)
+        if item is None:
+            return None
+        stored_at, result = item
+        if time.time() - stored_at > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return result
+
+    def _memory_put(self, key, result):
+        self._memory[key] = (time.time(), result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- niveau disque ---
+    def _disk_get(self, key):
+        db = SessionLocal()
+        try:
+            row = db.query(models.PredictionCache).filter(models.PredictionCache.key == key).first()
+            if row is None:
+                return None
+            if time.time() - row.created_at > self.ttl:
+                db.delete(row)
+                db.commit()
+                return None
+            return json.loads(row.value)
+        finally:
+            db.close()
+
+    def _disk_put(self, key, result):
+        value = json.dumps(result)
+        now = time.time()
+        db = SessionLocal()
+        try:
+            db.merge(models.PredictionCache(key=key, value=value, size=len(value), created_at=now))
+            Entry = models.PredictionCache
+            db.query(Entry).filter(Entry.created_at < now - self.ttl).delete(synchronize_session=False)
+            db.commit()
+
+            # Taille maximale : on supprime les entrées les plus anciennes
+            total = db.query(func.coalesce(func.sum(Entry.size), 0)).scalar()
+            if total > self.disk_bytes:
+                for old_key, size in db.query(Entry.key, Entry.size).order_by(Entry.created_at):
+                    if total <= self.disk_bytes:
+                        break
+                    db.query(Entry).filter(Entry.key == old_key).delete(synchronize_session=False)
+                    total -= size
+                db.commit()
+        finally:
+            db.close()
+
+
+def _for_caller(result, filename):
+    # Le dict en cache est partagé : chaque appelant en modifie une copie
+    result = copy.deepcopy(result)
+    if filename is not None and isinstance(result, dict) and "filename" in result:
+        result["filename"] = filename
+    return result
+
+
+result_cache = ResultCache()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas, crud
-from app.database import get_db
+from app.config import ADMIN_USERS_PAGE_MAX, ADMIN_USERS_PAGE_SIZE
+from app.database import get_async_db
 from app.auth import get_current_user
-from typing import List
+from typing import List, Optional
 from app.models import User
 from app.schemas import UserOut
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -18,11 +19,18 @@ def require_admin(user: models.User = Depends(get_current_user)):
     return user
 
 @router.get("/users", response_model=List[schemas.UserOut])
-def get_all_users(
-    db: Session = Depends(get_db), 
+async def get_all_users(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Dernier id de la page précédente"),
+    limit: int = Query(ADMIN_USERS_PAGE_SIZE, ge=1, le=ADMIN_USERS_PAGE_MAX),
+    q: Optional[str] = Query(None, description="Préfixe de l'email"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(require_admin)
 ):
-    users = crud.get_all_users(db)
+    # La page suivante est indiquée par l'en-tête X-Next-Cursor (absent à la fin)
+    users, next_cursor = await crud.list_users_async(db, limit, after_id=cursor, email_prefix=q)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     return [schemas.UserOut.from_orm(user) for user in users]
 
 @router.get("/users/me", response_model=UserOut)
@@ -30,30 +38,42 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 @router.post("/users", response_model=schemas.UserOut)
-def create_user(
+async def create_user(
     user_data: schemas.UserCreate,  # ou le schéma que tu utilises pour créer un user
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(require_admin)
 ):
-    existing_user = crud.get_user_by_email(db, user_data.email)
+    existing_user = await crud.get_user_by_email_async(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=400, detail="Un utilisateur avec cet email existe déjà"
         )
-    new_user = crud.create_user(db, user_data)
+    new_user = await crud.create_user_async(db, user_data)
     return schemas.UserOut.from_orm(new_user)
 
 from fastapi import Path
 
 @router.delete("/users/{user_id}", status_code=204)
-def delete_user(
+async def delete_user(
     user_id: int = Path(..., title="L'ID de l'utilisateur à supprimer"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(require_admin)
 ):
-    user = crud.get_user_by_id(db, user_id)
+    user = await crud.get_user_by_id_async(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
-    crud.delete_user(db, user_id)
+    await crud.delete_user_async(db, user_id)
     return
+
+@router.patch("/users/{user_id}/role", response_model=schemas.UserOut)
+async def update_user_role(
+    role_data: schemas.UserRoleUpdate,
+    user_id: int = Path(..., title="L'ID de l'utilisateur à modifier"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(require_admin)
+):
+    user = await crud.update_user_role_async(db, user_id, role_data.role)
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    return schemas.UserOut.from_orm(user)
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app import schemas
+from app.cameras import CAMERA_MODELS, engine
+from app.auth import get_current_user
+from app.dependencies import require_admin
+from app.models import User
+
+router = APIRouter(prefix="/cameras", tags=["cameras"])
+
+
+@router.post("", status_code=201)
+def add_camera(camera: schemas.CameraCreate, current_user: User = Depends(require_admin)):
+    # Réservé aux admins : la source est ouverte telle quelle (chemin local ou URL)
+    if camera.model not in CAMERA_MODELS:
+        raise HTTPException(status_code=400, detail="Modèle non supporté pour le direct")
+    if camera.window_seconds <= 0 or camera.stride_seconds <= 0:
+        raise HTTPException(status_code=400, detail="Fenêtre et pas doivent être positifs")
+    cam = engine.add(**camera.dict())
+    return cam.to_dict(full_source=True)
+
+
+# Les sources contiennent souvent des identifiants (rtsp://user:pass@hôte) :
+# seuls les admins les voient en entier
+@router.get("")
+def list_cameras(current_user: User = Depends(get_current_user)):
+    return engine.list(full_source=current_user.role == "admin")
+
+
+@router.get("/{camera_id}")
+def get_camera(camera_id: str, current_user: User = Depends(get_current_user)):
+    cam = engine.get(camera_id)
+    if cam is None:
+        raise HTTPException(status_code=404, detail="Caméra non trouvée")
+    return cam.to_dict(full_source=current_user.role == "admin")
+
+
+@router.delete("/{camera_id}", status_code=204)
+def remove_camera(camera_id: str, current_user: User = Depends(require_admin)):
+    if not engine.remove(camera_id):
+        raise HTTPException(status_code=404, detail="Caméra non trouvée")
+    return
@@ -0,0 +1,87 @@
+import os
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import crud, schemas
+from app.config import TEMP_DIR
+from app.database import AsyncSessionLocal, get_async_db, get_db
+from app.inference import SUPPORTED_MODELS
+from app.jobs import job_to_dict, manager
+from app.streaming import STREAM_FORMATS, streaming_supported
+from app.utils import save_upload
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.post("", status_code=202)
+def create_job(
+    file: UploadFile = File(...),
+    model: str = Form(...)
+):
+    if model not in SUPPORTED_MODELS:
+        raise HTTPException(status_code=400, detail="Modèle non supporté")
+    try:
+        tmp_path, _ = save_upload(file, TEMP_DIR)
+    finally:
+        file.file.close()
+    job_id = manager.submit(model, tmp_path)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/stream", status_code=201)
+def create_stream_job(
+    model: str = Form("i3d_two_streams"),
+    filename: str = Form("video.ts"),
+    fps: float = Form(0.0)
+):
+    # Le corps de la vidéo est envoyé ensuite par PUT /jobs/{id}/upload ;
+    # fps sert aux flux sans métadonnées (MJPEG brut)
+    if not streaming_supported():
+        raise HTTPException(status_code=501, detail="Envoi en flux non disponible sur ce système")
+    if model != "i3d_two_streams":
+        raise HTTPException(status_code=400, detail="Envoi en flux réservé au modèle i3d_two_streams")
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="Conteneur non lisible en flux")
+    job_id = manager.create_stream(model, ext, fps)
+    return {"job_id": job_id, "status": "uploading", "upload_url": f"/jobs/{job_id}/upload"}
+
+
+@router.put("/{job_id}/upload", response_model=schemas.JobOut)
+async def upload_stream(job_id: str, request: Request):
+    upload = manager.start_stream(job_id)
+    if upload is None:
+        raise HTTPException(status_code=409, detail="Job non en attente d'envoi ou décodeurs occupés")
+    complete = False
+    try:
+        # Chaque morceau est écrit sur disque et transmis au décodeur, qui
+        # évalue les segments complets pendant que la suite arrive
+        async for chunk in request.stream():
+            if chunk:
+                await run_in_threadpool(upload.write, chunk)
+        complete = True
+    finally:
+        # Déconnexion ou erreur : le job échoue au lieu d'être terminé
+        # avec les seuls segments arrivés
+        await run_in_threadpool(upload.close, complete)
+    async with AsyncSessionLocal() as db:
+        return job_to_dict(await crud.get_job_async(db, job_id))
+
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await crud.get_job_async(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    return job_to_dict(job)
+
+
+@router.delete("/{job_id}", response_model=schemas.JobOut)
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    if crud.get_job(db, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    if not manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job déjà terminé")
+    db.expire_all()
+    return job_to_dict(crud.get_job(db, job_id))
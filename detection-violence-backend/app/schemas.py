@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -24,9 +25,50 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True  # Ajoutez cette ligne
 
+class UserRoleUpdate(BaseModel):
+    role: Literal["user", "admin"]
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 class TokenData(BaseModel):
-    email: str = None
\ No newline at end of file
+    email: str = None
+
+class JobProgress(BaseModel):
+    done: int
+    total: int
+
+class JobOut(BaseModel):
+    id: str
+    model: str
+    status: str
+    progress: JobProgress
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class CameraCreate(BaseModel):
+    name: str
+    source: str  # URL RTSP / HTTP-MJPEG ou chemin d'un fichier local
+    model: str = "i3d_two_streams"
+    window_seconds: float = 5.0
+    stride_seconds: float = 1.0
+    threshold: Optional[float] = None
+    loop: bool = False
+
+class AlertCreate(BaseModel):
+    dateTime: Optional[datetime] = None  # maintenant si absent
+    cameraName: str
+    violenceType: str
+    confidenceScore: int
+
+class AlertOut(BaseModel):
+    id: int
+    dateTime: datetime
+    cameraName: str
+    violenceType: str
+    confidenceScore: int
+
+class AlertPage(BaseModel):
+    items: List[AlertOut]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,97 @@
+# app/streaming.py
+# Envoi en flux : les octets reçus sont écrits une seule fois sur disque et
+# passés en parallèle, par un tube nommé, au décodeur qui évalue les segments
+# déjà arrivés. Réservé aux conteneurs lisibles progressivement (MPEG-TS,
+# MP4 fragmenté, MJPEG).
+import os
+import threading
+
+STREAM_FORMATS = (".ts", ".mp4", ".mjpeg", ".mjpg")
+TAIL_TOLERANCE = 1.0  # secondes non couvertes tolérées en fin de vidéo
+
+
+def streaming_supported() -> bool:
+    return hasattr(os, "mkfifo")
+
+
+class StreamUpload:
+    def __init__(self, video_path: str, fifo_path: str):
+        self.video_path = video_path
+        self.fifo_path = fifo_path
+        os.mkfifo(fifo_path)
+        self._file = open(video_path, "wb")
+        self._fd = None
+        self._keeper = None  # lecteur de garde, voir open_pipe
+        self._keeper_lock = threading.Lock()
+        self._fifo_ok = True
+        self.bytes_received = 0
+        self.complete = False  # corps reçu en entier (pas de déconnexion)
+        self.done = threading.Event()
+
+    def open_pipe(self):
+        """Ouvre le tube avant le démarrage du décodeur : un écrivain existe
+        donc toujours quand le décodeur ouvre le tube en lecture, et son
+        ouverture ne peut pas bloquer. Un lecteur non bloquant est gardé le
+        temps que le décodeur ouvre le sien (release_reader)."""
+        try:
+            self._keeper = os.open(self.fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+            self._fd = os.open(self.fifo_path, os.O_WRONLY)
+        except OSError:
+            self.release_reader()
+            self._fifo_ok = False
+            self._unlink_fifo()
+
+    def release_reader(self):
+        """Appelé par le décodeur une fois son lecteur ouvert, ou à son arrêt :
+        sans autre lecteur, l'écriture échoue alors (EPIPE) au lieu de
+        bloquer sur un tube plein."""
+        with self._keeper_lock:
+            if self._keeper is not None:
+                os.close(self._keeper)
+                self._keeper = None
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.bytes_received += len(chunk)
+        if not self._fifo_ok or self._fd is None:
+            return
+        try:
+            view = memoryview(chunk)
+            while view:
+                n = os.write(self._fd, view)
+                view = view[n:]
+        except OSError:
+            # Décodeur arrêté : on continue d'écrire le fichier, il sera
+            # analysé en entier à la fin de l'envoi
+            self._close_fifo()
+            self._fifo_ok = False
+
+    def close(self, complete: bool = False):
+        self.complete = complete
+        self._file.close()
+        # Le tube disparaît avant la fermeture de l'écrivain : un décodeur qui
+        # ne l'a pas encore ouvert échoue (ENOENT) au lieu d'attendre un
+        # écrivain qui ne viendra plus ; celui qui l'a ouvert lit la fin du flux
+        self._unlink_fifo()
+        self._close_fifo()
+        self.release_reader()
+        self.done.set()
+
+    def cleanup(self):
+        for path in (self.fifo_path, self.video_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _unlink_fifo(self):
+        try:
+            os.remove(self.fifo_path)
+        except OSError:
+            pass
+
+    def _close_fifo(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
@@ -1,13 +1,53 @@
 # utils.py
+import asyncio
+import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from models.metrics import METRICS
+from .config import AUTH_HASH_WORKERS
 
 # Configuration du hashage des mots de passe
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt est volontairement coûteux : un pool borné limite le nombre de
+# calculs simultanés, hors de la boucle d'événements et du pool de threads
+# des endpoints synchrones
+_hash_pool = ThreadPoolExecutor(AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 def get_password_hash(password: str) -> str:
     """Hash un mot de passe avec bcrypt"""
-    return pwd_context.hash(password)
+    return _hash_pool.submit(pwd_context.hash, password).result()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Vérifie si un mot de passe correspond à son hash"""
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return _hash_pool.submit(pwd_context.verify, plain_password, hashed_password).result()
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash sans bloquer la boucle d'événements."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password sans bloquer la boucle d'événements."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.verify, plain_password, hashed_password)
+
+def save_upload(upload, directory: str, chunk_size: int = 1024 * 1024):
+    """Copie un UploadFile sous un nom unique dans `directory` et calcule son
+    SHA-256 au passage. Renvoie (chemin, empreinte hexadécimale)."""
+    ext = os.path.splitext(upload.filename or "")[1] or ".mp4"
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{ext}")
+    digest = hashlib.sha256()
+    size = 0
+    with METRICS.timer("upload"), open(path, "wb") as f:
+        while True:
+            chunk = upload.file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    METRICS.inc("upload_bytes", size)
+    return path, digest.hexdigest()
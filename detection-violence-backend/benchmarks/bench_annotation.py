@@ -0,0 +1,61 @@
+# benchmarks/bench_annotation.py
+# Frames rendues par seconde de generate_annotated_video selon le mode de
+# localisation. Lancer depuis detection-violence-backend/ :
+#   python -m benchmarks.bench_annotation --width 1920 --height 1080
+import argparse
+import os
+import tempfile
+
+import cv2
+
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import two_stream_inference as ts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du rendu de la vidéo annotée")
+    parser.add_argument("--video", type=str, default=None, help="Vidéo existante (sinon clip synthétique)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--box-every", type=int, default=ts.BOX_EVERY)
+    args = parser.parse_args()
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        make_synthetic_video(video, args.duration, size=(args.width, args.height))
+
+    try:
+        cap = cv2.VideoCapture(video)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        # Toute la vidéo est considérée violente : pire cas pour la localisation
+        intervals = [(0.0, total / fps)]
+
+        flow_maps = {}
+        ts._score_segments(video, ts._get_intervals(total / fps, False), fps, total, flow_maps)
+
+        runs = [
+            ("full (historique)", dict(mode="full", box_every=1)),
+            ("full", dict(mode="full", box_every=args.box_every)),
+            ("pyramid", dict(mode="pyramid", box_every=args.box_every)),
+            ("model_flow", dict(mode="model_flow", flow_maps=flow_maps)),
+        ]
+        for name, kwargs in runs:
+            stats = {}
+            out = ts.generate_annotated_video(video, intervals, stats=stats, **kwargs)
+            os.remove(out)
+            print(f"{name:<18} {stats['fps']:7.1f} frames/s  "
+                  f"({stats['frames']} frames, {stats['boxes_computed']} boîtes)")
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
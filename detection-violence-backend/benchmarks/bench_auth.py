@@ -0,0 +1,129 @@
+# benchmarks/bench_auth.py
+# Chemin d'authentification, avant / après les caches et le pool bcrypt :
+#  - débit de get_current_user (requêtes authentifiées concurrentes) :
+#    décodage JWT + session SQL à chaque appel vs caches jeton / utilisateur ;
+#  - rafale de connexions (/token) : bcrypt dans la boucle d'événements vs
+#    pool borné, mesurée par le retard maximal d'une tâche témoin de 10 ms.
+# Base SQLite temporaire, la base de l'application n'est pas touchée.
+#   python -m benchmarks.bench_auth --requests 5000 --logins 32
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import auth, crud, models, schemas
+from app.auth_cache import principal_cache, token_cache
+from app.database import AsyncSessionLocal, SessionLocal
+from app.utils import pwd_context
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def legacy_current_user(token):
+    # Ancien get_current_user : décodage et requête SQL synchrone à chaque appel
+    payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    db = SessionLocal()
+    user = crud.get_user_by_email(db, payload["sub"])
+    db.close()
+    return schemas.UserInDB(id=user.id, email=user.email, role=user.role)
+
+
+async def legacy_login():
+    # Ancien /token : bcrypt exécuté dans la boucle d'événements
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_email(db, EMAIL)
+        return pwd_context.verify(PASSWORD, user.hashed_password)
+    finally:
+        db.close()
+
+
+async def pooled_login():
+    async with AsyncSessionLocal() as db:
+        return await auth.authenticate_user_async(db, EMAIL, PASSWORD)
+
+
+async def request_rate(current_user, token, total, concurrency):
+    async def worker(n):
+        for _ in range(n):
+            await current_user(token)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return (total // concurrency * concurrency) / (time.perf_counter() - t0)
+
+
+async def login_burst(login, count):
+    """(durée de la rafale en s, retard max de la boucle en ms)."""
+    lag = [0.0]
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag[0] = max(lag[0], time.perf_counter() - t0 - 0.01)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.05)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(count)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await tick
+    return elapsed, lag[0] * 1000
+
+
+async def run(args):
+    token = auth.create_access_token({"sub": EMAIL})
+
+    async def legacy(tok):
+        return legacy_current_user(tok)
+
+    print(f"{'get_current_user':<28} {'req/s':>10}")
+    before = await request_rate(legacy, token, args.requests, args.concurrency)
+    print(f"{'avant (JWT + SQL)':<28} {before:10.0f}")
+    principal_cache.clear()
+    token_cache.clear()
+    after = await request_rate(auth.get_current_user, token, args.requests, args.concurrency)
+    print(f"{'après (caches)':<28} {after:10.0f}  (x{after / before:.1f})")
+
+    print(f"\n{f'{args.logins} connexions':<28} {'durée s':>10} {'retard boucle ms':>18}")
+    for label, login in (("avant (bcrypt dans la boucle)", legacy_login), ("après (pool bcrypt)", pooled_login)):
+        elapsed, lag = await login_burst(login, args.logins)
+        print(f"{label:<28} {elapsed:10.2f} {lag:18.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chemin d'authentification")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    SessionLocal.configure(bind=engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+    try:
+        models.Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        crud.create_user(db, schemas.UserCreate(email=EMAIL, password=PASSWORD))
+        db.close()
+        asyncio.run(run(args))
+    finally:
+        engine.dispose()
+        async_engine.sync_engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_batching.py
+# Débit (clips/s) et latence p50/p99 : appels unitaires vs micro-batching
+# sous charge concurrente. Utilise un petit modèle Conv3D de même signature
+# d'entrée que I3D / CNN-LSTM, les poids réels ne sont pas nécessaires.
+#   python -m benchmarks.bench_batching --clients 16 --clips 128
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow as tf
+
+from models.batching import MicroBatcher
+
+
+def tiny_rgb_model(frames=30, size=(224, 224)):
+    inp = tf.keras.Input((frames, size[1], size[0], 3))
+    x = tf.keras.layers.Conv3D(8, 3, strides=2, activation="relu")(inp)
+    x = tf.keras.layers.GlobalAveragePooling3D()(x)
+    out = tf.keras.layers.Dense(1, activation="sigmoid")(x)
+    return tf.keras.Model(inp, out)
+
+
+def _run(clients, clips, call):
+    clip = np.random.rand(30, 224, 224, 3).astype(np.float32)
+    latencies = []
+
+    def one(_):
+        t0 = time.perf_counter()
+        call(clip)
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one, range(clips)))
+    elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000
+    return clips / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du micro-batching")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--clips", type=int, default=128)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    model = tiny_rgb_model()
+    model.predict(np.zeros((1, 30, 224, 224, 3), np.float32), verbose=0)
+
+    single = lambda clip: model.predict(clip[None], verbose=0)[0]
+    batcher = MicroBatcher("bench", lambda x: model.predict(x, verbose=0),
+                           max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+    for name, call in (("unitaire", single), ("micro-batching", batcher.predict)):
+        rate, p50, p99 = _run(args.clients, args.clips, call)
+        print(f"{name:<15} {rate:7.1f} clips/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+    print("lots :", batcher.stats()["batch_sizes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_ensemble.py
+# model=ensemble vs les trois requêtes séparées qu'il remplace (même vidéo
+# envoyée une fois par modèle) : durée médiane de chacun et ratio.
+#   python -m benchmarks.bench_ensemble --stand-in --duration 8
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.inference import run_model
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import two_stream_inference as ts
+from models.flow_cache import FLOW_CACHE
+
+SEPARATE = ("i3d_two_streams", "i3d", "cnn_lstm")
+
+
+def _timed(model, video):
+    t0 = time.perf_counter()
+    resp = run_model(model, video)
+    elapsed = (time.perf_counter() - t0) * 1000
+    annotated = resp.get("annotated_video_path")
+    if annotated:
+        os.remove(os.path.join(ts.ANNOTATED_DIR, os.path.basename(annotated)))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du mode ensemble")
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stand-in", action="store_true", help="Modèles factices au lieu des poids réels")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from benchmarks.stand_ins import install_stand_ins
+        install_stand_ins()
+    FLOW_CACHE.max_bytes = 0  # pas de flux réutilisé d'une requête à l'autre
+    FLOW_CACHE.spill_dir = None
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        make_synthetic_video(video, args.duration)
+
+    try:
+        for model in SEPARATE + ("ensemble",):
+            _timed(model, video)  # chargement des modèles, compilation
+        times = {model: [] for model in SEPARATE + ("ensemble",)}
+        for _ in range(args.repeat):
+            for model in times:
+                times[model].append(_timed(model, video))
+
+        medians = {m: float(np.median(t)) for m, t in times.items()}
+        for model in SEPARATE:
+            print(f"{model:<24} {medians[model]:10.1f} ms")
+        separate = sum(medians[m] for m in SEPARATE)
+        print(f"{'somme des trois':<24} {separate:10.1f} ms")
+        print(f"{'ensemble':<24} {medians['ensemble']:10.1f} ms  "
+              f"({medians['ensemble'] / separate:.0%} de la somme)")
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
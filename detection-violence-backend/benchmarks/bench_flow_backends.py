@@ -0,0 +1,93 @@
+# benchmarks/bench_flow_backends.py
+# Débit de chaque fournisseur de flux optique et écart du score two-stream
+# par rapport à Farneback (référence) sur un dossier de clips locaux.
+# Indique le fournisseur le plus rapide qui reste dans la tolérance.
+# Lancer depuis detection-violence-backend/ :
+#   python -m benchmarks.bench_flow_backends --clips /chemin/clips --tolerance 0.02
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video
+from models.optical_flow import PROVIDER_NAMES, get_flow_provider
+from models.registry import REGISTRY
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def load_segments(path, max_segments):
+    """Frames RGB échantillonnées des premiers segments de 5 s du clip."""
+    fps, total = probe_video(path)
+    if fps <= 0 or total <= 0:
+        return []
+    intervals = ts._get_intervals(total / fps, False)[:max_segments]
+    index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+    return list(ts._iter_segment_frames(path, index_lists))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des fournisseurs de flux optique")
+    parser.add_argument("--clips", type=str, default=None, help="Dossier de clips (sinon clip synthétique)")
+    parser.add_argument("--providers", type=str, default=",".join(PROVIDER_NAMES))
+    parser.add_argument("--max-segments", type=int, default=4, help="Segments évalués par clip")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Écart de score maximal accepté")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.clips:
+        clips = sorted(
+            p for p in glob.glob(os.path.join(args.clips, "*"))
+            if p.lower().endswith(VIDEO_EXTS)
+        )
+    else:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        make_synthetic_video(tmp.name, 20.0)
+        clips = [tmp.name]
+
+    try:
+        segments = []
+        for path in clips:
+            segments.extend(load_segments(path, args.max_segments))
+        if not segments:
+            print("Aucun segment lisible")
+            return
+        print(f"{len(clips)} clip(s), {len(segments)} segment(s)")
+
+        predict = REGISTRY.get(ts.MODEL_NAME)
+        names = ["farneback"] + [n for n in args.providers.split(",") if n and n != "farneback"]
+        results = {}
+        for name in names:
+            provider = get_flow_provider(name)
+            elapsed, scores = 0.0, []
+            for frames in segments:
+                t0 = time.perf_counter()
+                rgb, flow = ts._segment_tensors(frames, provider=provider)
+                elapsed += time.perf_counter() - t0
+                scores.append(ts._prob(predict(rgb[None], flow[None])[0]))
+            results[name] = (len(segments) * (ts.MAX_FRAMES - 1) / elapsed, np.array(scores))
+
+        ref = results["farneback"][1]
+        print(f"{'fournisseur':<20} {'paires/s':>9} {'écart moy':>10} {'écart max':>10} {'décisions':>10}")
+        best = None
+        for name in names:
+            rate, scores = results[name]
+            drift = np.abs(scores - ref)
+            flips = int(np.sum((scores > ts.THRESHOLD) != (ref > ts.THRESHOLD)))
+            print(f"{name:<20} {rate:9.1f} {drift.mean():10.4f} {drift.max():10.4f} {flips:>10}")
+            if drift.max() <= args.tolerance and flips == 0 and (best is None or rate > results[best][0]):
+                best = name
+        print(f"Plus rapide dans la tolérance ({args.tolerance}) : {best}")
+    finally:
+        if tmp is not None:
+            os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_frame_sampler.py
+# Compare la boucle cap.set()/read() historique à l'échantillonneur séquentiel
+# sur des clips longs. Lancer depuis detection-violence-backend/ :
+#   python -m benchmarks.bench_frame_sampler --duration 600
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from models.frame_sampler import sample_frames
+
+
+def make_synthetic_video(path, duration, fps=25, size=(1280, 720), fourcc="mp4v", gop=None):
+    """Clip synthétique (fond fixe, carré en mouvement, numéro de frame).
+    `gop` fixe l'intervalle entre images clés via le backend FFmpeg
+    (OPENCV_FFMPEG_WRITER_OPTIONS) ; None laisse la valeur de l'encodeur."""
+    w, h = size
+    if gop is None:
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+    else:
+        previous = os.environ.get("OPENCV_FFMPEG_WRITER_OPTIONS")
+        os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = f"g;{int(gop)}"
+        try:
+            out = cv2.VideoWriter(path, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*fourcc), fps, (w, h))
+        finally:
+            if previous is None:
+                os.environ.pop("OPENCV_FFMPEG_WRITER_OPTIONS", None)
+            else:
+                os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = previous
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+    for i in range(int(duration * fps)):
+        frame = background.copy()
+        x = (i * 7) % (w - 80)
+        cv2.rectangle(frame, (x, h // 3), (x + 80, h // 3 + 80), (0, 0, 255), -1)
+        cv2.putText(frame, str(i), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        out.write(frame)
+    out.release()
+
+
+def seek_frames(video_path, indices):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    for idx in indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        frames.append(frame if ret else None)
+    cap.release()
+    return frames
+
+
+def _best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark seek vs échantillonnage séquentiel")
+    parser.add_argument("--video", type=str, default=None, help="Vidéo existante (sinon clip synthétique)")
+    parser.add_argument("--duration", type=float, default=120.0, help="Durée du clip synthétique (s)")
+    parser.add_argument("--max-frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        print(f"Génération d'un clip synthétique de {args.duration:.0f}s : {video}")
+        make_synthetic_video(video, args.duration)
+
+    try:
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        idxs = np.linspace(0, total - 1, num=args.max_frames, dtype=int)
+
+        t_seek, ref = _best_of(lambda: seek_frames(video, idxs), args.repeat)
+        t_seq, got = _best_of(lambda: sample_frames(video, idxs), args.repeat)
+
+        identical = all(
+            (a is None and b is None) or (a is not None and b is not None and np.array_equal(a, b))
+            for a, b in zip(ref, got)
+        )
+        print(f"frames totales : {total}, échantillons : {len(idxs)}")
+        print(f"seek + read    : {t_seek * 1000:.1f} ms")
+        print(f"séquentiel     : {t_seq * 1000:.1f} ms  (x{t_seek / t_seq:.2f})")
+        print(f"frames identiques : {identical}")
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_memory.py
+# Pic mémoire (tracemalloc) du prétraitement d'une requête : ancien chemin
+# flottant (frames / 255.0 en float64, liste, np.stack, retour en uint8 pour
+# les niveaux de gris) vs clip uint8 contigu avec mise à l'échelle dans le
+# modèle. Seules les allocations NumPy sont mesurées, pas celles de TF.
+#   python -m benchmarks.bench_memory
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import cnn_lstm_inference
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video, sample_frames
+from models.optical_flow import FarnebackFlow
+
+
+def _legacy_to_rgb(frame):
+    rgb = cv2.resize(frame, ts.FRAME_SIZE)
+    return cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB) / 255.0
+
+
+def legacy_rgb_clip(path):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    idxs = np.linspace(0, total - 1, num=ts.MAX_FRAMES, dtype=int)
+    frames = [f.astype(np.float32) for f in sample_frames(path, idxs, _legacy_to_rgb)]
+    return np.stack(frames, axis=0)
+
+
+def legacy_two_stream_segment(path, idxs):
+    flow_fn = FarnebackFlow()
+    frames = sample_frames(path, idxs, _legacy_to_rgb)
+    rgb_out = np.empty((ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 3), np.float32)
+    flow_out = np.empty((ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 2), np.float32)
+    prev_gray = None
+    for i, rgb in enumerate(frames):
+        gray = cv2.cvtColor((rgb * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+        rgb_out[i] = rgb
+        flow_out[i] = 0.0 if prev_gray is None else flow_fn(prev_gray, gray)
+        prev_gray = gray
+    return rgb_out, flow_out
+
+
+def uint8_two_stream_segment(path, idxs):
+    return ts._segment_tensors(sample_frames(path, idxs, ts._resize), provider=FarnebackFlow())
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pic mémoire du prétraitement par requête")
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        make_synthetic_video(video, args.duration)
+
+    try:
+        fps, total = probe_video(video)
+        idxs = ts._segment_indices(0.0, min(5.0, total / fps), fps, total)
+        runs = [
+            ("clip RGB (I3D / CNN-LSTM)",
+             lambda: legacy_rgb_clip(video),
+             lambda: cnn_lstm_inference.load_clip(video)),
+            ("segment two-stream (RGB + flux)",
+             lambda: legacy_two_stream_segment(video, idxs),
+             lambda: uint8_two_stream_segment(video, idxs)),
+        ]
+        print(f"{'chemin':<34} {'float Mo':>9} {'uint8 Mo':>9} {'gain':>6}")
+        for name, legacy, current in runs:
+            before, after = peak_mb(legacy), peak_mb(current)
+            print(f"{name:<34} {before:9.1f} {after:9.1f} {before / after:5.1f}x")
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
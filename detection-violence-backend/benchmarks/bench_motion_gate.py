@@ -0,0 +1,92 @@
+# benchmarks/bench_motion_gate.py
+# Filtre d'énergie de mouvement sur un enregistrement de nuit simulé : fond
+# fixe avec bruit de capteur, et quelques segments de 5 s avec un objet en
+# mouvement (--active). Affiche l'énergie des segments statiques / actifs
+# (pour choisir MOTION_GATE_THRESHOLD) puis predict_two_stream avec et sans
+# filtre : durée, taux de segments ignorés, segments actifs manqués.
+#   python -m benchmarks.bench_motion_gate --stand-in --duration 600 --active 0.05
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from models import two_stream_inference as ts
+from models.flow_cache import FLOW_CACHE
+from models.frame_sampler import probe_video
+from models.segment_preprocess import motion_energy
+
+
+def make_corridor_video(path, duration, active, fps=25, size=(640, 360), noise=2.0, seed=0):
+    """Vidéo statique bruitée ; renvoie l'ensemble des index de segments actifs."""
+    w, h = size
+    rng = np.random.default_rng(seed)
+    segments = int(np.ceil(duration / 5.0))
+    active_segs = set(rng.choice(segments, max(int(segments * active), 1), replace=False).tolist())
+    background = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (9, 9), 0)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    for i in range(int(duration * fps)):
+        frame = background.astype(np.float32) + rng.normal(0, noise, background.shape)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+        if int(i / fps // 5) in active_segs:
+            x = (i * 11) % (w - 60)
+            cv2.rectangle(frame, (x, h // 2 - 60), (x + 60, h // 2 + 60), (40, 40, 200), -1)
+        out.write(frame)
+    out.release()
+    return active_segs
+
+
+def _run(video, threshold):
+    ts.MOTION_THRESHOLD = threshold
+    t0 = time.perf_counter()
+    resp = ts.predict_two_stream(video, full_video=False)
+    elapsed = time.perf_counter() - t0
+    if resp["annotated_video_path"]:
+        os.remove(os.path.join(ts.ANNOTATED_DIR, os.path.basename(resp["annotated_video_path"])))
+    return elapsed, resp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du filtre de mouvement")
+    parser.add_argument("--duration", type=float, default=600.0)
+    parser.add_argument("--active", type=float, default=0.05, help="Part des segments avec mouvement")
+    parser.add_argument("--threshold", type=float, default=ts.MOTION_THRESHOLD or 0.005)
+    parser.add_argument("--stand-in", action="store_true", help="Modèles factices au lieu des poids réels")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from benchmarks.stand_ins import install_stand_ins
+        install_stand_ins()
+    FLOW_CACHE.max_bytes = 0
+    FLOW_CACHE.spill_dir = None
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    tmp.close()
+    try:
+        active = make_corridor_video(tmp.name, args.duration, args.active)
+        fps, total = probe_video(tmp.name)
+        intervals = ts._get_intervals(total / fps, False)
+        index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+        energies = [motion_energy(f) for f in ts._iter_segment_frames(tmp.name, index_lists)]
+        static = [e for k, e in enumerate(energies) if k not in active]
+        moving = [e for k, e in enumerate(energies) if k in active]
+        print(f"{len(intervals)} segments, {len(moving)} actifs")
+        print(f"énergie statique : max {max(static, default=0):.5f}  "
+              f"énergie active : min {min(moving, default=0):.5f}")
+
+        _run(tmp.name, 0.0)  # préchauffage (modèle, compilation)
+        base, _ = _run(tmp.name, 0.0)
+        gated, resp = _run(tmp.name, args.threshold)
+        skipped = {int(round(seg["start"] / 5.0)) for seg in resp["skipped_segments"]}
+        print(f"{'sans filtre':<24} {base:8.2f} s")
+        print(f"{f'filtre {args.threshold:g}':<24} {gated:8.2f} s  (x{base / gated:.1f}, "
+              f"{resp['motion_gate']['skip_rate']:.0%} ignorés, "
+              f"{len(skipped & active)} segment(s) actif(s) manqué(s))")
+    finally:
+        os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_preprocess_pool.py
+# Débit du prétraitement two-stream (décodage + flux optique, segments/s) :
+# dans le processus vs pool de 1 à N workers écrivant en mémoire partagée.
+# Pas de modèle : seul le prétraitement est mesuré.
+#   python -m benchmarks.bench_preprocess_pool --duration 120 --max-workers 8
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import two_stream_inference as ts
+from models.flow_cache import FLOW_CACHE
+from models.frame_sampler import probe_video
+from models.preprocess_pool import PreprocessPool
+
+
+def in_process(video, index_lists):
+    rgb, flow = None, None
+    for frames in ts._iter_segment_frames(video, index_lists):
+        rgb, flow = ts._segment_tensors(frames, rgb, flow)
+
+
+def pooled(pool, video, index_lists):
+    ts._score_pooled(pool, video, index_lists, lambda rgb, flow, segs: None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pool de prétraitement")
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--duration", type=float, default=120.0)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--inflight", type=int, default=2, help="Blocs de mémoire partagée")
+    parser.add_argument("--rows", type=int, default=ts.SEGMENT_BATCH, help="Segments par bloc")
+    args = parser.parse_args()
+
+    FLOW_CACHE.max_bytes = 0  # chaque configuration recalcule tout le flux
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        make_synthetic_video(video, args.duration)
+
+    try:
+        fps, total = probe_video(video)
+        intervals = ts._get_intervals(total / fps, False)
+        index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+        print(f"{len(index_lists)} segments de 5 s")
+
+        t0 = time.perf_counter()
+        in_process(video, index_lists)
+        base = len(index_lists) / (time.perf_counter() - t0)
+        print(f"{'dans le processus':<20} {base:8.2f} segments/s")
+
+        for workers in range(1, args.max_workers + 1):
+            pool = PreprocessPool(workers, args.inflight, args.rows)
+            try:
+                pooled(pool, video, index_lists[:workers])  # démarrage des workers
+                t0 = time.perf_counter()
+                pooled(pool, video, index_lists)
+                rate = len(index_lists) / (time.perf_counter() - t0)
+            finally:
+                pool.shutdown()
+            print(f"{f'pool {workers} worker(s)':<20} {rate:8.2f} segments/s  (x{rate / base:.2f})")
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
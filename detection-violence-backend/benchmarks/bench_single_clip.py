@@ -0,0 +1,101 @@
+# benchmarks/bench_single_clip.py
+# Décomposition de la latence d'une requête mono-clip : ancien chemin
+# (DataFrame + tf.data + py_function + Model.predict) vs chemin direct
+# (préprocesseur NumPy + tf.function compilé).
+#   python -m benchmarks.bench_single_clip --repeat 10
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from benchmarks.bench_batching import tiny_rgb_model
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models.fast_inference import clip_spec, compile_predict
+
+
+def _ms(t0):
+    return (time.perf_counter() - t0) * 1000
+
+
+def old_path(model, video, get_rgb_tf_dataset):
+    t = {}
+    t0 = time.perf_counter()
+    df = pd.DataFrame({'video_path': [video], 'label': [0]})
+    ds = get_rgb_tf_dataset(df, batch_size=1, frame_size=(224, 224), max_frames=30)
+    t["dataframe + tf.data"] = _ms(t0)
+    t0 = time.perf_counter()
+    clip, _ = next(iter(ds.take(1)))
+    t["prétraitement (py_function)"] = _ms(t0)
+    t0 = time.perf_counter()
+    model.predict(clip, verbose=0)
+    t["Model.predict"] = _ms(t0)
+    return t
+
+
+def new_path(predict, video, preprocess):
+    t = {}
+    t0 = time.perf_counter()
+    clip = preprocess(video)
+    t["prétraitement (NumPy)"] = _ms(t0)
+    t0 = time.perf_counter()
+    predict(clip[None])
+    t["tf.function"] = _ms(t0)
+    return t
+
+
+def _report(name, runs):
+    print(name)
+    keys = runs[0].keys()
+    total = 0.0
+    for k in keys:
+        med = float(np.median([r[k] for r in runs]))
+        total += med
+        print(f"  {k:<30} {med:8.1f} ms")
+    print(f"  {'total':<30} {total:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence mono-clip avant/après")
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--model-path", type=str, default=None,
+                        help="Modèle .keras RGB (sinon modèle de substitution)")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    from models.cnn_lstm_inference import get_rgb_tf_dataset, preprocess_video_dynamic
+
+    if args.model_path:
+        tf.keras.config.enable_unsafe_deserialization()
+        model = tf.keras.models.load_model(args.model_path, compile=False)
+    else:
+        model = tiny_rgb_model()
+    predict = compile_predict(model, [clip_spec(3)])
+
+    tmp = None
+    video = args.video
+    if video is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.close()
+        video = tmp.name
+        make_synthetic_video(video, 10, size=(640, 360))
+
+    try:
+        t0 = time.perf_counter()
+        predict(np.zeros((1, 30, 224, 224, 3), np.float32))
+        print(f"traçage initial du tf.function : {_ms(t0):.1f} ms (une fois par modèle)")
+        # Échauffement du chemin Keras
+        old_path(model, video, get_rgb_tf_dataset)
+
+        _report("avant", [old_path(model, video, get_rgb_tf_dataset) for _ in range(args.repeat)])
+        _report("après", [new_path(predict, video, preprocess_video_dynamic) for _ in range(args.repeat)])
+    finally:
+        if tmp is not None:
+            os.remove(video)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_temporal_search.py
+# Appels au modèle par heure de vidéo : recherche grossière puis fine
+# (models/temporal_search.py) vs balayage exhaustif au pas fin. Sans --video,
+# une heure simulée avec --events événements violents de durée aléatoire ;
+# le score d'une fenêtre est la part de la fenêtre couverte par un événement
+# (pas de modèle, pas de décodage). Rapporte aussi le rappel des événements
+# et l'IoU moyen des intervalles fusionnés.
+# Le décodage compte aussi : la passe grossière lit toute la vidéo, la passe
+# fine ne lit que les zones suspectes grâce au seek exact (frame_sampler.
+# iter_segments_from). Le coût de décodage de la passe fine est estimé en
+# heures de vidéo lues par heure, avec seek et en relisant depuis le début.
+# Avec --video, lance predict_two_stream et affiche ses statistiques et les
+# frames réellement décodées ou sautées.
+#   python -m benchmarks.bench_temporal_search --hours 1 --events 10,30,120
+import argparse
+import random
+
+from models import temporal_search
+from models.frame_sampler import SEEK_MIN_GAP, SEEK_PREROLL
+from models.metrics import METRICS
+
+
+def make_events(duration, count, rng, min_len=2.0, max_len=20.0):
+    events, tries = [], 0
+    while len(events) < count and tries < count * 100:
+        tries += 1
+        length = rng.uniform(min_len, max_len)
+        s = rng.uniform(0.0, duration - length)
+        if all(s > e + 1.0 or s + length < es - 1.0 for es, e in events):
+            events.append((s, s + length))
+    return sorted(events)
+
+
+def simulated_score(events, rng, noise):
+    def score(windows):
+        probs = []
+        for ws, we in windows:
+            covered = sum(max(0.0, min(we, e) - max(ws, s)) for s, e in events)
+            p = covered / (we - ws) if we > ws else 0.0
+            probs.append(min(1.0, max(0.0, p + rng.uniform(-noise, noise))))
+        return probs, len(windows)
+    return score
+
+
+def _iou(a, b):
+    return temporal_search._iou(a, b)
+
+
+def evaluate(events, detections):
+    found = [max((_iou(ev, (s, e)) for s, e, _ in detections), default=0.0) for ev in events]
+    recall = sum(1 for v in found if v > 0) / len(events) if events else 1.0
+    mean_iou = sum(found) / len(found) if found else 0.0
+    return recall, mean_iou
+
+
+def fine_decode_seconds(fine, fps, gop):
+    """Secondes de vidéo décodées par la passe fine : (avec seek, en relisant
+    depuis le début). Même regroupement que iter_segments_from ; un seek
+    repart en moyenne d'une demi-GOP plus SEEK_PREROLL avant la cible."""
+    if not fine:
+        return 0.0, 0.0
+    gap, preroll = SEEK_MIN_GAP / fps, (SEEK_PREROLL + gop / 2) / fps
+    seeking, group_start, reach = 0.0, None, 0.0
+    for s, e in fine:
+        if group_start is None or s - reach > gap:
+            if group_start is not None:
+                seeking += reach - group_start
+            group_start = s if s > gap else 0.0
+            seeking += preroll if group_start > 0 else 0.0
+        reach = max(reach, e)
+    seeking += reach - group_start
+    return seeking, max(e for _, e in fine)
+
+
+def run_video(path):
+    from models import two_stream_inference as ts
+    before = {n: METRICS.counter(n) for n in ("frames_decoded", "frames_discarded", "seek_fallbacks")}
+    resp = ts.predict_two_stream(path, full_video=False)
+    stats = resp["temporal_search"]
+    for name, value in stats.items():
+        print(f"{name:<28} {value:12.1f}")
+    for name, value in before.items():
+        print(f"{name:<28} {METRICS.counter(name) - value:12.0f}")
+    for d in resp["detections"]:
+        print(f"détection [{d['start']:.1f}s, {d['end']:.1f}s] score {d['score']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de la recherche temporelle")
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--events", type=str, default="0,10,30,120", help="Événements par vidéo simulée")
+    parser.add_argument("--noise", type=float, default=0.1, help="Bruit uniforme ajouté aux scores")
+    parser.add_argument("--threshold", type=float, default=0.467)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fps", type=float, default=25.0, help="Pour l'estimation du décodage")
+    parser.add_argument("--gop", type=int, default=250, help="Frames entre deux keyframes")
+    args = parser.parse_args()
+
+    if args.video:
+        run_video(args.video)
+        return
+
+    duration = args.hours * 3600.0
+    print(f"fenêtre {temporal_search.WINDOW:g} s, pas grossier {temporal_search.COARSE_STRIDE:g} s, "
+          f"pas fin {temporal_search.FINE_STRIDE:g} s, seuil d'affinage {temporal_search.REFINE_THRESHOLD:g}")
+    print(f"{'événements':>10} {'appels/h':>10} {'exhaustif/h':>12} {'gain':>7} "
+          f"{'grossier':>9} {'fin':>7} {'rappel':>7} {'IoU moy':>8} "
+          f"{'décodage/h':>11} {'sans seek/h':>12}")
+    for count in (int(c) for c in args.events.split(",")):
+        rng = random.Random(args.seed)
+        events = make_events(duration, count, rng)
+        score = simulated_score(events, rng, args.noise)
+        passes = []  # fenêtres de chaque passe : grossière, puis fine
+
+        def record(windows):
+            passes.append(windows)
+            return score(windows)
+
+        _, detections, stats = temporal_search.search(duration, record, args.threshold)
+        fine = passes[1] if len(passes) > 1 else []
+        seeking, sequential = fine_decode_seconds(fine, args.fps, args.gop)
+        recall, mean_iou = evaluate(events, detections)
+        calls, exhaustive = stats["model_calls_per_hour"], stats["exhaustive_calls_per_hour"]
+        print(f"{len(events):>10} {calls:10.0f} {exhaustive:12.0f} {exhaustive / calls:6.1f}x "
+              f"{stats['coarse_windows']:>9} {stats['fine_windows']:>7} {recall:7.2f} {mean_iou:8.2f} "
+              f"{(duration + seeking) / duration:11.2f} {(duration + sequential) / duration:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/compare.py
+# Compare deux fichiers de résultats de benchmarks/suite.py (médianes) et
+# signale les régressions au-delà du seuil. Code de sortie 1 s'il y en a.
+#   python -m benchmarks.compare base.json head.json --threshold 1.10
+import argparse
+import json
+import sys
+
+
+def _load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report["meta"], {(r["video"], r["function"]): r for r in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparaison de deux exécutions de la suite")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Ratio head/base au-delà duquel une mesure est une régression")
+    args = parser.parse_args()
+
+    base_meta, base = _load(args.base)
+    head_meta, head = _load(args.head)
+    print(f"base : {base_meta.get('commit')}  head : {head_meta.get('commit')}")
+    if base_meta.get("stand_in") != head_meta.get("stand_in"):
+        print("Attention : modèles factices d'un côté seulement")
+
+    regressions = 0
+    print(f"{'vidéo':<20} {'fonction':<26} {'base ms':>10} {'head ms':>10} {'ratio':>7}")
+    for key in sorted(base.keys() & head.keys()):
+        b, h = base[key]["median_ms"], head[key]["median_ms"]
+        ratio = h / b if b > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            flag = "  gain"
+        print(f"{key[0]:<20} {key[1]:<26} {b:10.1f} {h:10.1f} {ratio:7.2f}{flag}")
+
+    for key in sorted(base.keys() ^ head.keys()):
+        side = "base" if key in base else "head"
+        print(f"{key[0]:<20} {key[1]:<26} uniquement dans {side}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/suite.py
+# Suite de micro-benchmarks des chemins critiques : échantillonnage,
+# flux optique, inférence et vidéo annotée. Des clips synthétiques sont
+# générés pour chaque combinaison résolution x durée x GOP, chaque fonction
+# est chronométrée séparément et les résultats sont écrits en JSON pour être
+# comparés entre deux commits (benchmarks/compare.py).
+#   python -m benchmarks.suite --stand-in --out bench-$(git rev-parse --short HEAD).json
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from benchmarks.bench_frame_sampler import make_synthetic_video
+from models import cnn_lstm_inference, ensemble_inference, i3d_inference
+from models import two_stream_inference as ts
+from models.flow_cache import FLOW_CACHE
+from models.frame_sampler import probe_video
+
+RESOLUTIONS = {"360p": (640, 360), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _remove_annotated(path):
+    if path:
+        full = os.path.join(ts.ANNOTATED_DIR, os.path.basename(path))
+        if os.path.exists(full):
+            os.remove(full)
+
+
+def hot_paths(video):
+    """(nom, fonction sans argument) pour chaque fonction mesurée."""
+    fps, total = probe_video(video)
+    duration = total / fps if fps > 0 else 0.0
+    return [
+        ("preprocess_video_dynamic",
+         lambda: cnn_lstm_inference.preprocess_video_dynamic(video)),
+        ("_preprocess_segment",
+         lambda: ts._preprocess_segment(video, 0.0, min(5.0, duration))),
+        ("predict_two_stream",
+         lambda: _remove_annotated(ts.predict_two_stream(video, full_video=False)["annotated_video_path"])),
+        ("predict_i3d", lambda: i3d_inference.predict_i3d(video)),
+        ("predict_cnn_lstm", lambda: cnn_lstm_inference.predict_cnn_lstm(video)),
+        ("predict_ensemble",
+         lambda: _remove_annotated(ensemble_inference.predict_ensemble(video)["annotated_video_path"])),
+        ("generate_annotated_video",
+         lambda: os.remove(ts.generate_annotated_video(video, [(0.0, duration)]))),
+    ]
+
+
+def time_call(fn, repeat, warmup):
+    for _ in range(warmup):
+        fn()
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks des chemins critiques")
+    parser.add_argument("--resolutions", type=str, default="360p,720p,1080p")
+    parser.add_argument("--durations", type=str, default="10,30", help="Secondes, séparées par des virgules")
+    parser.add_argument("--gops", type=str, default="12,250", help="Intervalles entre images clés")
+    parser.add_argument("--only", type=str, default=None, help="Fonctions à mesurer, séparées par des virgules")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--stand-in", action="store_true", help="Modèles factices au lieu des poids réels")
+    parser.add_argument("--out", type=str, default="bench-results.json")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from benchmarks.stand_ins import install_stand_ins
+        install_stand_ins()
+    # Chaque répétition doit recalculer le flux : pas de cache entre deux appels
+    FLOW_CACHE.max_bytes = 0
+    FLOW_CACHE.spill_dir = None
+
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    try:
+        for res in args.resolutions.split(","):
+            for duration in (float(d) for d in args.durations.split(",")):
+                for gop in (int(g) for g in args.gops.split(",")):
+                    label = f"{res}_{duration:g}s_gop{gop}"
+                    video = os.path.join(workdir, f"{label}.mp4")
+                    make_synthetic_video(video, duration, size=RESOLUTIONS[res], gop=gop)
+                    for name, fn in hot_paths(video):
+                        if only and name not in only:
+                            continue
+                        runs = time_call(fn, args.repeat, args.warmup)
+                        results.append({
+                            "video": label,
+                            "resolution": res,
+                            "duration": duration,
+                            "gop": gop,
+                            "function": name,
+                            "runs_ms": [round(r, 3) for r in runs],
+                            "median_ms": round(float(np.median(runs)), 3),
+                            "min_ms": round(min(runs), 3),
+                        })
+                        print(f"{label:<20} {name:<26} {np.median(runs):10.1f} ms")
+                    os.remove(video)
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "tensorflow": tf.__version__,
+            "stand_in": args.stand_in,
+            "repeat": args.repeat,
+            "flow_provider": ts.FLOW.name,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,37 @@
 # main.py
 import os
-import shutil
-import uuid
-import cv2
 import traceback
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-
-from app.database import engine, get_db
-from models.two_stream_inference import predict_two_stream
-from models.i3d_inference      import predict_i3d
-from models.cnn_lstm_inference import predict_cnn_lstm
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine, get_async_db
+from models.frame_sampler import probe_video
+from models.batching import batching_stats
+from models.registry import REGISTRY
+from models.flow_cache import FLOW_CACHE
+from models.metrics import METRICS, model_context, request_timings, server_timing
+from models.two_stream_inference import motion_gate_stats
 from app import models, schemas, auth, crud
-from app.auth import authenticate_user, create_access_token
+from app.auth import authenticate_user_async, create_access_token
+from app.auth_cache import principal_cache, token_cache
+from app.config import TEMP_DIR, ANNOTATED_DIR
+from app.inference import SUPPORTED_MODELS, run_model
+from app.jobs import manager as job_manager
+from app.result_cache import cache_key, result_cache
 from fastapi.security import OAuth2PasswordRequestForm
-from app.routes import admin
+from app.routes import admin, cameras, jobs
+from app.cameras import engine as camera_engine
+from app.alert_hub import hub as alert_hub
+from app.email_digest import dispatcher as email_dispatcher
+from app.utils import save_upload
+from src.api import alerts
 
 app = FastAPI()
 
 # Répertoires
-TEMP_DIR = "temp_videos"
-ANNOTATED_DIR = "annotated_videos"
 os.makedirs(TEMP_DIR, exist_ok=True)
 os.makedirs(ANNOTATED_DIR, exist_ok=True)
 
@@ -45,36 +54,87 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 models.Base.metadata.create_all(bind=engine)
 
 
+# Durées des étapes de la requête dans l'en-tête Server-Timing
+@app.middleware("http")
+async def add_server_timing(request, call_next):
+    with request_timings() as timings:
+        response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+
+# Jauges exportées avec /metrics
+def _collect_gauges():
+    for name, stats in batching_stats().items():
+        yield "batch_queue_depth", {"model": name}, stats["queue_depth"]
+        yield "batch_avg_size", {"model": name}, stats["avg_batch_size"]
+    for cache, stats in (
+        ("result", result_cache.stats()), ("flow", FLOW_CACHE.stats()),
+        ("auth_token", token_cache.stats()), ("auth_principal", principal_cache.stats()),
+    ):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                yield "cache_" + key, {"cache": cache}, value
+    yield "motion_gate_skip_rate", {}, motion_gate_stats()["skip_rate"]
+    registry = REGISTRY.stats()
+    yield "models_memory_mb", {}, registry["used_mb"]
+    yield "models_loaded", {}, len(registry["models"])
+    hub = alert_hub.stats()
+    yield "alert_clients", {}, hub["clients"]
+    yield "alert_dropped", {}, hub["dropped"]
+    email = email_dispatcher.stats()
+    yield "alert_email_queue_depth", {}, email["queue_depth"]
+    yield "alert_email_digests", {}, email["digests"]
+
+METRICS.add_collector(_collect_gauges)
+
+
+# Jobs restés inachevés (crash, redémarrage) : on les relance
+@app.on_event("startup")
+def resume_jobs():
+    job_manager.recover()
+
+
+@app.on_event("shutdown")
+def stop_jobs():
+    job_manager.shutdown()
+    camera_engine.shutdown()
+    email_dispatcher.shutdown()
+
+
 @app.post("/predict")
 async def predict_violence(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     model: str       = Form(...)
 ):
-    # Génération d’un nom temporaire unique
-    ext = os.path.splitext(file.filename)[1] or ".mp4"
-    tmp_name = f"{uuid.uuid4().hex}{ext}"
-    tmp_path = os.path.join(TEMP_DIR, tmp_name)
+    # Modèle vérifié avant tout : la valeur sert d'étiquette aux métriques
+    if model not in SUPPORTED_MODELS:
+        file.file.close()
+        raise HTTPException(status_code=400, detail="Modèle non supporté")
 
-    with open(tmp_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # Copie sous un nom temporaire unique (SHA-256 calculé au passage)
+    with model_context(model):
+        tmp_path, digest = save_upload(file, TEMP_DIR)
 
     try:
-        # Appel du bon modèle selon sélection
-        if model == "i3d_two_streams":
-            dur = get_video_duration(tmp_path)
-            resp = predict_two_stream(tmp_path, full_video=(dur < 10))
-        elif model == "i3d":
-            resp = predict_i3d(tmp_path)
-        elif model == "cnn_lstm":
-            resp = predict_cnn_lstm(tmp_path)
-        else:
-            raise HTTPException(status_code=400, detail="Modèle non supporté")
+        # Hors de la boucle d'événements : les requêtes concurrentes
+        # peuvent ainsi être regroupées par le micro-batching. Une vidéo
+        # déjà analysée (ou en cours d'analyse) avec le même modèle n'est
+        # pas recalculée.
+        resp = await run_in_threadpool(
+            result_cache.get_or_compute,
+            cache_key(digest, model),
+            lambda: run_model(model, tmp_path),
+            os.path.basename(tmp_path),
+        )
 
         return resp
 
@@ -98,15 +158,40 @@ async def predict_violence(
 
 
 def get_video_duration(path: str) -> float:
-    cap = cv2.VideoCapture(path)
-    if not cap.isOpened():
-        return 0.0
-    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
-    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
-    cap.release()
+    fps, frames = probe_video(path)
     return frames / fps if fps > 0 else 0.0
 
 
+@app.get("/inference/batching")
+async def get_batching_stats():
+    # Profondeur de file et taille de lot atteinte, par modèle
+    return batching_stats()
+
+
+@app.get("/inference/motion-gate")
+async def get_motion_gate_stats():
+    # Segments statiques écartés sans flux ni modèle, depuis le démarrage
+    return motion_gate_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Format texte Prometheus : durées par étape et par modèle, compteurs, jauges
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/models")
+async def get_loaded_models():
+    # Modèles chargés, taille estimée et temps de chargement
+    return REGISTRY.stats()
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    # Succès / échecs du cache de résultats et du cache de flux optique
+    return dict(result_cache.stats(), flow=FLOW_CACHE.stats())
+
+
 @app.get("/")
 async def root():
     return {"message": "Bienvenue dans votre système de détection de violence"}
@@ -115,9 +200,9 @@ async def root():
 @app.post("/token")
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -138,3 +223,6 @@ async def protected_route(current_user: schemas.UserInDB = Depends(auth.get_curr
 
 
 app.include_router(admin.router)
+app.include_router(jobs.router)
+app.include_router(cameras.router)
+app.include_router(alerts.router)
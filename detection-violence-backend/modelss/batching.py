@@ -0,0 +1,101 @@
+# models/batching.py
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+# ========== Micro-batching dynamique ==========
+# Les clips des requêtes concurrentes sont regroupés (jusqu'à MAX_BATCH clips
+# ou MAX_WAIT_MS d'attente) et passés au modèle en une seule passe avant ;
+# chaque requête récupère sa propre sortie.
+MAX_BATCH   = int(os.getenv("MICRO_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_WAIT_MS", "20"))
+
+BATCHERS = {}  # nom -> MicroBatcher, pour l'exposition des métriques
+
+
+class MicroBatcher:
+    def __init__(self, name, predict_fn, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._predict_fn = predict_fn
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._batches = 0
+        self._clips = 0
+        self._sizes = Counter()
+        BATCHERS[name] = self
+
+    def submit(self, clip) -> Future:
+        """Met un clip en file ; le Future reçoit la sortie du modèle pour ce clip."""
+        self._ensure_started()
+        fut = Future()
+        self._queue.put((clip, fut))
+        return fut
+
+    def predict(self, clip):
+        return self.submit(clip).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "clips": self._clips,
+                "avg_batch_size": self._clips / self._batches if self._batches else 0.0,
+                "batch_sizes": dict(sorted(self._sizes.items())),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name=f"batcher-{self.name}", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [(clip, fut) for clip, fut in batch if fut.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                out = self._predict_fn(np.stack([clip for clip, _ in batch]))
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            with self._lock:
+                self._batches += 1
+                self._clips += len(batch)
+                self._sizes[len(batch)] += 1
+            for (_, fut), o in zip(batch, out):
+                fut.set_result(o)
+
+
+def batching_stats() -> dict:
+    return {name: b.stats() for name, b in BATCHERS.items()}
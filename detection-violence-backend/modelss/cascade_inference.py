@@ -0,0 +1,142 @@
+# models/cascade_inference.py
+import os
+import cv2
+import numpy as np
+from models import cnn_lstm_inference
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video
+from models.metrics import METRICS, model_context
+from models.registry import REGISTRY
+from models.segment_preprocess import MOTION_THRESHOLD, is_static, motion_energy
+
+# ========== Cascade CNN-LSTM -> two-stream ==========
+# Chaque segment de 5 s est d'abord évalué par le CNN-LSTM (RGB seul, sans
+# flux optique). Sous LOW_THRESHOLD, il est déclaré non violent tout de suite ;
+# sinon (ambigu ou positif) le flux optique est calculé et le two-stream
+# décide. Les frames ne sont décodées qu'une fois pour les deux étapes.
+# Avant tout, les segments statiques sont écartés par le filtre de mouvement
+# (MOTION_GATE_THRESHOLD, segment_preprocess.py), s'il est activé.
+# Seuil réglé par tools/tune_cascade.py (rappel au moins égal au two-stream seul).
+LOW_THRESHOLD = float(os.getenv("CASCADE_LOW", "0.1"))
+
+STAGE_GATE = "motion_gate"
+STAGE_CHEAP = "cnn_lstm"
+STAGE_FULL = "two_stream"
+
+
+def predict_cascade(video_path: str, full_video: bool = True, meta=None, progress=None) -> dict:
+    fps, total = meta if meta is not None else probe_video(video_path)
+    duration = total / fps if fps > 0 else 0
+    intervals = ts._get_intervals(duration, full_video)
+    index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+    flow_maps = {} if ts.LOCALIZATION_MODE == "model_flow" else None
+
+    probs = [None] * len(intervals)
+    stages = [STAGE_CHEAP] * len(intervals)
+    decided = 0
+    if progress is not None:
+        progress(0, len(intervals))
+
+    # Segments escaladés, empilés en lots pour le two-stream
+    n = min(len(intervals), ts.SEGMENT_BATCH)
+    rgb_batch = np.empty((n, ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 3), np.uint8)
+    flow_batch = np.empty((n, ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 2), np.float32)
+    pending = []  # index des segments présents dans le lot
+    predict = REGISTRY.get(ts.MODEL_NAME)
+    clip = np.empty((ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 3), np.uint8)
+
+    def _flush():
+        nonlocal decided
+        with model_context(ts.MODEL_NAME), METRICS.timer("inference"):
+            out = predict(rgb_batch[:len(pending)], flow_batch[:len(pending)])
+        for o, k in enumerate(pending):
+            probs[k] = ts._prob(out[o])
+            stages[k] = STAGE_FULL
+            if flow_maps is not None and probs[k] > ts.THRESHOLD:
+                for idx, fl in zip(index_lists[k], flow_batch[o]):
+                    flow_maps[int(idx)] = fl.copy()
+        decided += len(pending)
+        pending.clear()
+        if progress is not None:
+            progress(decided, len(intervals))
+
+    for k, frames in enumerate(ts._iter_segment_frames(video_path, index_lists)):
+        # Étape 0 : segment statique, aucun modèle
+        if MOTION_THRESHOLD > 0 and is_static(motion_energy(frames)):
+            probs[k] = 0.0
+            stages[k] = STAGE_GATE
+            decided += 1
+            if progress is not None:
+                progress(decided, len(intervals))
+            continue
+
+        # Étape 1 : RGB seul, même entrée que load_clip (RGB uint8 224x224)
+        for i, bgr in enumerate(frames):
+            if bgr is None:
+                clip[i] = 0
+            else:
+                cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=clip[i])
+        with model_context(cnn_lstm_inference.MODEL_NAME):
+            cheap = cnn_lstm_inference.predict_clip(clip)
+        if cheap < LOW_THRESHOLD:
+            probs[k] = cheap
+            decided += 1
+            if progress is not None:
+                progress(decided, len(intervals))
+            continue
+
+        # Étape 2 : flux optique et two-stream, seulement pour ce reste
+        row = len(pending)
+        ts._segment_tensors(frames, rgb_batch[row], flow_batch[row])
+        pending.append(k)
+        if len(pending) == n:
+            _flush()
+    if pending:
+        _flush()
+
+    ts._record_gate(len(intervals), stages.count(STAGE_GATE))
+    METRICS.inc("cascade_segments", len(intervals))
+    METRICS.inc("cascade_escalated", stages.count(STAGE_FULL))
+    return _build_response(video_path, intervals, probs, stages, flow_maps)
+
+
+def _is_violent(prob, stage):
+    # Une sortie anticipée est toujours négative
+    return stage == STAGE_FULL and prob > ts.THRESHOLD
+
+
+def _build_response(video_path, intervals, probs, stages, flow_maps):
+    segments, preds = [], []
+    for (s, e), prob, stage in zip(intervals, probs, stages):
+        violent = _is_violent(prob, stage)
+        state = "Violence détectée" if violent else "Aucune violence détectée"
+        preds.append(f"[{s:.1f}s, {e:.1f}s] score : {prob:.3f} Etat : {state} (étape : {stage})")
+        segments.append({
+            "start": s, "end": e, "probability": float(prob),
+            "is_violent": violent, "stage": stage,
+        })
+
+    annotated = None
+    iv = [(seg["start"], seg["end"]) for seg in segments if seg["is_violent"]]
+    if iv:
+        with METRICS.timer("annotate"):
+            annotated = ts.generate_annotated_video(video_path, iv, flow_maps=flow_maps)
+
+    escalated = stages.count(STAGE_FULL)
+    gated = stages.count(STAGE_GATE)
+    return {
+        "filename": os.path.basename(video_path),
+        "predictions": preds,
+        "segments": segments,
+        "cascade": {
+            "low_threshold": LOW_THRESHOLD,
+            "segments": len(segments),
+            "escalated": escalated,
+            "early_exits": len(segments) - escalated - gated,
+            "motion_skipped": gated,
+        },
+        "flow_provider": ts.FLOW.name,
+        "annotated_video_path": (
+            f"/annotated/{os.path.basename(annotated)}" if annotated else None
+        ),
+    }
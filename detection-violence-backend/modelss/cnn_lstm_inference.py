@@ -2,12 +2,30 @@
 import os
 import cv2
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 from tensorflow.keras.metrics import Precision, Recall # type: ignore
 from tensorflow.keras.models import load_model # type: ignore
+from models.frame_sampler import sample_clip
+from models.batching import MicroBatcher
+from models.fast_inference import CompiledModel, clip_spec
+from models.metrics import METRICS
+from models.onnx_backend import load_served_model
+from models.registry import REGISTRY
 
 # --- 1) Video → RGB-only preprocessing -----------------------------------
+def load_clip(video_path, frame_size=(224, 224), max_frames=30):
+    """Clip RGB uint8 (max_frames, H, W, 3), entrée du modèle servi."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0 or not cap.isOpened():
+            return np.zeros((max_frames, frame_size[1], frame_size[0], 3), np.uint8)
+        idxs = np.linspace(0, total - 1, num=max_frames, dtype=int)
+        return sample_clip(cap, idxs, frame_size)
+    finally:
+        cap.release()
+
+# float32 dans [0, 1] pour le pipeline tf.data hors ligne
 def preprocess_video_dynamic(video_path, frame_size=(224, 224), max_frames=30):
     # Convert TF Tensor to Python string
     if isinstance(video_path, tf.Tensor):
@@ -17,28 +35,9 @@ def preprocess_video_dynamic(video_path, frame_size=(224, 224), max_frames=30):
         frame_size = tuple(int(x) for x in frame_size.numpy())
     else:
         frame_size = (int(frame_size[0]), int(frame_size[1]))
+    return load_clip(video_path, frame_size, int(max_frames)).astype(np.float32) / 255.0
 
-    cap = cv2.VideoCapture(video_path)
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    if total <= 0 or not cap.isOpened():
-        cap.release()
-        return np.zeros((max_frames, frame_size[1], frame_size[0], 3), np.float32)
-
-    idxs = np.linspace(0, total - 1, num=max_frames, dtype=int)
-    frames = []
-    for i in idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-        ret, frame = cap.read()
-        if not ret:
-            frames.append(np.zeros((frame_size[1], frame_size[0], 3), np.float32))
-        else:
-            frm = cv2.resize(frame, frame_size)
-            frm = cv2.cvtColor(frm, cv2.COLOR_BGR2RGB) / 255.0
-            frames.append(frm.astype(np.float32))
-    cap.release()
-    return np.stack(frames, axis=0)
-
-# --- 2) tf.data pipeline --------------------------------------------------
+# --- 2) tf.data pipeline (usage hors ligne : évaluation, entraînement) ---
 def tf_preprocess_video(video_path, frame_size, max_frames):
     v = tf.py_function(
         func=preprocess_video_dynamic,
@@ -68,137 +67,47 @@ def get_rgb_tf_dataset(df, batch_size, frame_size, max_frames, shuffle=False):
 # drive.mount('/content/drive', force_remount=True)
 
 MODEL_PATH = os.path.join("models", "CNNetLSTM.keras")
-tf.keras.config.enable_unsafe_deserialization()
-MODEL = load_model(
-    MODEL_PATH,
-    custom_objects={'Precision': Precision, 'Recall': Recall}
-)
+MODEL_NAME = "cnn_lstm"
 
-# --- 4) Inference on one clip ---------------------------------------------
+def _load_keras():
+    tf.keras.config.enable_unsafe_deserialization()
+    return load_model(
+        MODEL_PATH,
+        custom_objects={'Precision': Precision, 'Recall': Recall}
+    )
 
-BATCH_SIZE = 1
-FRAME_SIZE = (224, 224)
-MAX_FRAMES = 30
-THRESHOLD = 0.5
+def _load_cnn_lstm():
+    # Chargé au premier usage par le registre, pas à l'import ; graphe ONNX
+    # si INFERENCE_BACKEND(_CNN_LSTM) le demande
+    served = load_served_model(MODEL_PATH, MODEL_NAME)
+    if served is not None:
+        return served
+    return CompiledModel(_load_keras(), INPUT_SIGNATURE)
 
-def predict_cnn_lstm(video_path: str) -> dict:
-    df_test = pd.DataFrame({
-        'video_path': [video_path],
-        'label':      [0]  # dummy
-    })
-    ds_test = get_rgb_tf_dataset(
-        df_test,
-        batch_size=BATCH_SIZE,
-        frame_size=FRAME_SIZE,
-        max_frames=MAX_FRAMES,
-        shuffle=False
-    )
-    for rgb_batch, _ in ds_test.take(1):
-        prob = MODEL.predict(rgb_batch)[0, 0]
-        return {
-            'filename': os.path.basename(video_path),
-            'probability': float(prob),
-            'is_violent': bool(prob > THRESHOLD)
-        }
-
-# ===== models/i3d_inference.py =====
-import os
-import cv2
-import numpy as np
-import pandas as pd
-import tensorflow as tf
-from tensorflow.keras.metrics import Precision, Recall # type: ignore
-from tensorflow.keras.models import load_model # type: ignore
+# --- 4) Inference on one clip ---------------------------------------------
 
-# ----- Constants (must match training) -----
 BATCH_SIZE = 1
 FRAME_SIZE = (224, 224)
 MAX_FRAMES = 30
+THRESHOLD = 0.5
+# Clip RGB uint8 : mise à l'échelle [0, 1] dans la passe avant compilée
+INPUT_SIGNATURE = [clip_spec(3, MAX_FRAMES, FRAME_SIZE, tf.uint8)]
 
-THRESHOLD_I3D = 0.517
-
-# ----- Load I3D Model -----
-MODEL_I3D_PATH = os.path.join("models", "i3d_model.keras")
-tf.keras.config.enable_unsafe_deserialization()
-MODEL_I3D = load_model(
-    MODEL_I3D_PATH,
-    custom_objects={ 'Precision': Precision, 'Recall': Recall }
-)
-
-# --- 1) Video → RGB-only preprocessing -----------------------------------
-def preprocess_video_dynamic(video_path, frame_size=(224, 224), max_frames=30):
-    # Convert TF Tensor to Python string if needed
-    if isinstance(video_path, tf.Tensor):
-        video_path = video_path.numpy().decode('utf-8')
-    # Ensure frame_size is tuple of ints
-    if hasattr(frame_size, 'numpy'):
-        frame_size = tuple(int(x) for x in frame_size.numpy())
-    else:
-        frame_size = (int(frame_size[0]), int(frame_size[1]))
-
-    cap = cv2.VideoCapture(video_path)
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    if total <= 0 or not cap.isOpened():
-        cap.release()
-        return np.zeros((max_frames, frame_size[1], frame_size[0], 3), dtype=np.float32)
-
-    idxs = np.linspace(0, total - 1, num=max_frames, dtype=int)
-    frames = []
-    for idx in idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if not ret:
-            frames.append(np.zeros((frame_size[1], frame_size[0], 3), dtype=np.float32))
-        else:
-            frm = cv2.resize(frame, frame_size)
-            frm = cv2.cvtColor(frm, cv2.COLOR_BGR2RGB) / 255.0
-            frames.append(frm.astype(np.float32))
-    cap.release()
-    return np.stack(frames, axis=0)
-
-# --- 2) tf.data pipeline --------------------------------------------------
-def tf_preprocess_video(video_path, frame_size, max_frames):
-    video = tf.py_function(
-        func=preprocess_video_dynamic,
-        inp=[video_path, frame_size, max_frames],
-        Tout=tf.float32
-    )
-    video.set_shape((max_frames, frame_size[1], frame_size[0], 3))
-    return video
-
+REGISTRY.register(MODEL_NAME, _load_cnn_lstm)
 
-def get_rgb_tf_dataset(df, batch_size, frame_size, max_frames, shuffle=False):
-    paths = df['video_path'].values
-    labels = df['label'].values
-    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+# Passe avant compilée une fois ; les clips des requêtes concurrentes la partagent
+_BATCHER = MicroBatcher("cnn_lstm", lambda x: REGISTRY.get(MODEL_NAME)(x))
 
-    def _parse(p, y):
-        clip = tf_preprocess_video(p, frame_size, max_frames)
-        return clip, y
+def predict_clip(clip) -> float:
+    """Probabilité pour un clip RGB uint8 déjà préparé (MAX_FRAMES, H, W, 3)."""
+    with METRICS.timer("inference"):
+        return float(_BATCHER.predict(clip)[0])
 
-    ds = ds.map(_parse, num_parallel_calls=tf.data.AUTOTUNE)
-    if shuffle:
-        ds = ds.shuffle(100)
-    ds = ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
-    return ds
-
-# --- 3) Inference function ------------------------------------------------
-def predict_i3d(video_path: str) -> dict:
-    # Build one-row DataFrame
-    df = pd.DataFrame({'video_path': [video_path], 'label': [0]})
-    # Create dataset without shuffle
-    ds = get_rgb_tf_dataset(
-        df,
-        batch_size=BATCH_SIZE,
-        frame_size=FRAME_SIZE,
-        max_frames=MAX_FRAMES,
-        shuffle=False
-    )
-    # Take one batch and predict
-    for clip_batch, _ in ds.take(1):
-        prob = MODEL_I3D.predict(clip_batch)[0, 0]
-        return {
-            'filename': os.path.basename(video_path),
-            'probability': float(prob),
-            'is_violent': bool(prob > THRESHOLD_I3D)
-        }
\ No newline at end of file
+def predict_cnn_lstm(video_path: str) -> dict:
+    clip = load_clip(video_path, FRAME_SIZE, MAX_FRAMES)
+    prob = predict_clip(clip)
+    return {
+        'filename': os.path.basename(video_path),
+        'probability': float(prob),
+        'is_violent': bool(prob > THRESHOLD)
+    }
@@ -0,0 +1,111 @@
+# models/ensemble_inference.py
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from models import cnn_lstm_inference, i3d_inference
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video, sample_frames
+from models.metrics import METRICS, model_context
+
+# ========== Ensemble des trois modèles ==========
+# Les trois modèles partagent la même géométrie (30 frames 224x224, indices
+# répartis sur toute la vidéo) : la vidéo est décodée et échantillonnée une
+# seule fois, le flux optique calculé une fois, puis les modèles sont évalués
+# en parallèle sur les mêmes tenseurs. Le score fusionné est la moyenne
+# pondérée des probabilités. Le two-stream est évalué ici sur le clip entier
+# (comme en mode full_video), pas par segments de 5 s.
+
+def _parse_weights(raw):
+    weights = {"i3d_two_streams": 1.0, "i3d": 1.0, "cnn_lstm": 1.0}
+    for item in filter(None, (s.strip() for s in raw.split(","))):
+        name, _, value = item.partition("=")
+        if name not in weights:
+            raise ValueError(f"ENSEMBLE_WEIGHTS : modèle inconnu {name}")
+        weights[name] = float(value)
+    return weights
+
+# ENSEMBLE_WEIGHTS="i3d_two_streams=2,i3d=1,cnn_lstm=0" (poids nul : modèle non évalué)
+WEIGHTS = _parse_weights(os.getenv("ENSEMBLE_WEIGHTS", ""))
+THRESHOLDS = {
+    "i3d_two_streams": ts.THRESHOLD,
+    "i3d": i3d_inference.THRESHOLD_I3D,
+    "cnn_lstm": cnn_lstm_inference.THRESHOLD,
+}
+# Par défaut, moyenne pondérée des seuils : si chaque modèle est à son seuil,
+# le score fusionné est au seuil de l'ensemble
+THRESHOLD = float(os.getenv("ENSEMBLE_THRESHOLD", "0") or 0) or (
+    sum(WEIGHTS[m] * THRESHOLDS[m] for m in WEIGHTS) / (sum(WEIGHTS.values()) or 1.0)
+)
+
+_POOL = ThreadPoolExecutor(max_workers=len(WEIGHTS), thread_name_prefix="ensemble")
+
+
+def shared_tensors(video_path, meta=None):
+    """Un seul décodage : RGB uint8 (entrée des trois modèles) et flux
+    optique (entrée du two-stream) du clip de MAX_FRAMES frames."""
+    fps, total = meta if meta is not None else probe_video(video_path)
+    idxs = np.linspace(0, max(total - 1, 0), num=ts.MAX_FRAMES, dtype=int)
+    frames = sample_frames(video_path, idxs, ts._resize)
+    rgb, flow = ts._segment_tensors(frames, idxs=idxs)
+    return fps, total, rgb, flow
+
+
+def _score(name, rgb, flow):
+    # Étiquette de métriques propre à chaque modèle, même dans le pool
+    with model_context(name):
+        if name == "i3d_two_streams":
+            return ts.predict_tensors(rgb, flow)
+        if name == "i3d":
+            return i3d_inference.predict_clip(rgb)
+        return cnn_lstm_inference.predict_clip(rgb)
+
+
+def fuse(probs, weights=WEIGHTS):
+    """Moyenne pondérée des probabilités des modèles évalués."""
+    total = sum(weights[m] for m in probs)
+    return sum(weights[m] * p for m, p in probs.items()) / total if total > 0 else 0.0
+
+
+def predict_ensemble(video_path: str, meta=None, progress=None) -> dict:
+    active = [m for m, w in WEIGHTS.items() if w > 0]
+    if progress is not None:
+        progress(0, 1)
+    fps, total, rgb, flow = shared_tensors(video_path, meta)
+
+    # Les trois passes avant en parallèle (TensorFlow relâche le GIL) ; le
+    # contexte (métriques de la requête) est copié dans chaque thread
+    futures = {
+        name: _POOL.submit(contextvars.copy_context().run, _score, name, rgb, flow)
+        for name in active
+    }
+    probs = {name: fut.result() for name, fut in futures.items()}
+    score = fuse(probs)
+    is_violent = score > THRESHOLD
+
+    annotated = None
+    if is_violent:
+        duration = total / fps if fps > 0 else 0.0
+        with METRICS.timer("annotate"):
+            annotated = ts.generate_annotated_video(video_path, [(0.0, duration)])
+    if progress is not None:
+        progress(1, 1)
+
+    return {
+        "filename": os.path.basename(video_path),
+        "probability": float(score),
+        "is_violent": bool(is_violent),
+        "threshold": THRESHOLD,
+        "models": {
+            name: {
+                "probability": float(p),
+                "is_violent": bool(p > THRESHOLDS[name]),
+                "weight": WEIGHTS[name],
+            }
+            for name, p in probs.items()
+        },
+        "flow_provider": ts.FLOW.name,
+        "annotated_video_path": (
+            f"/annotated/{os.path.basename(annotated)}" if annotated else None
+        ),
+    }
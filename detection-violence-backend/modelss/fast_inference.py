@@ -0,0 +1,48 @@
+# models/fast_inference.py
+import os
+import tensorflow as tf
+
+# ========== Inférence compilée ==========
+# Un tf.function par modèle, tracé une seule fois grâce à une input_signature
+# fixe (dimension de lot libre pour le micro-batching). Les clips NumPy du
+# préprocesseur sont passés directement, sans DataFrame ni tf.data, avec la
+# sémantique model(x, training=False). Les clips RGB arrivent en uint8
+# (signature dtype=tf.uint8) : la mise à l'échelle [0, 1] se fait dans le
+# graphe, pas dans le préprocesseur.
+JIT_COMPILE = os.getenv("TF_JIT_COMPILE", "0") == "1"
+
+
+def clip_spec(channels, max_frames=30, frame_size=(224, 224), dtype=tf.float32):
+    return tf.TensorSpec((None, max_frames, frame_size[1], frame_size[0], channels), dtype)
+
+
+def compile_predict(model, input_signature, jit_compile=JIT_COMPILE):
+    """Renvoie predict(*arrays) -> np.ndarray, compilé une fois pour `model`."""
+    @tf.function(input_signature=input_signature, jit_compile=jit_compile)
+    def _forward(*inputs):
+        inputs = [
+            tf.cast(x, tf.float32) / 255.0 if x.dtype == tf.uint8 else x
+            for x in inputs
+        ]
+        x = inputs[0] if len(inputs) == 1 else list(inputs)
+        return model(x, training=False)
+
+    def predict(*arrays):
+        return _forward(*arrays).numpy()
+
+    return predict
+
+
+
+class CompiledModel:
+    """Modèle Keras + sa passe avant compilée, tels que stockés dans le registre."""
+    def __init__(self, model, input_signature, jit_compile=JIT_COMPILE):
+        self.model = model
+        self.predict = compile_predict(model, input_signature, jit_compile)
+
+    @property
+    def weights(self):
+        return self.model.weights
+
+    def __call__(self, *arrays):
+        return self.predict(*arrays)
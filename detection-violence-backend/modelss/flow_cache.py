@@ -0,0 +1,116 @@
+# models/flow_cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ========== Cache du flux optique ==========
+# Farneback est l'étape de prétraitement la plus coûteuse. Quand deux
+# fenêtres se recouvrent (fenêtres glissantes, ré-analyse d'intervalles
+# voisins), les mêmes paires de frames reviennent : leur flux est gardé en
+# mémoire (LRU borné) et, en option, déversé sur disque en .npy relus en
+# memory-map.
+# Clé : (id vidéo/flux, index i, index j, résolution, fournisseur de flux et
+# ses paramètres, voir optical_flow.py).
+# Réservé aux cas où les paires reviennent vraiment : caméras en direct
+# (grille d'échantillonnage fixe) et passe fine de la recherche temporelle.
+# Une vidéo envoyée une fois (/predict, jobs, ensemble, cascade) a un chemin
+# temporaire unique et des segments disjoints : ses paires ne servent qu'une
+# fois et ne feraient qu'évincer les entrées utiles.
+FLOW_CACHE_MB = float(os.getenv("FLOW_CACHE_MB", "256"))
+FLOW_CACHE_SPILL_DIR = os.getenv("FLOW_CACHE_SPILL_DIR", "")  # vide = pas de disque
+FLOW_CACHE_SPILL_MB = float(os.getenv("FLOW_CACHE_SPILL_MB", "2048"))
+
+
+def video_stream_id(path):
+    """Identifiant stable d'un fichier vidéo (chemin, taille, date)."""
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class FlowCache:
+    def __init__(self, max_mb=FLOW_CACHE_MB, spill_dir=FLOW_CACHE_SPILL_DIR,
+                 spill_mb=FLOW_CACHE_SPILL_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.spill_dir = spill_dir or None
+        self.spill_bytes = int(spill_mb * 1024 * 1024)
+        self._memory = OrderedDict()  # clé -> flux
+        self._spilled = OrderedDict()  # clé -> (chemin, taille)
+        self._memory_used = 0
+        self._spill_used = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "spill_hits": 0, "misses": 0}
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def get_or_compute(self, key, compute):
+        flow = self.get(key)
+        if flow is None:
+            flow = np.asarray(compute(), dtype=np.float32)
+            self.put(key, flow)
+        return flow
+
+    def get(self, key):
+        with self._lock:
+            flow = self._memory.get(key)
+            if flow is not None:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                return flow
+            spilled = self._spilled.get(key)
+            if spilled is None:
+                self._counters["misses"] += 1
+                return None
+            self._spilled.move_to_end(key)
+            self._counters["spill_hits"] += 1
+        return np.load(spilled[0], mmap_mode="r")
+
+    def put(self, key, flow):
+        if flow.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = flow
+            self._memory_used += flow.nbytes
+            while self._memory_used > self.max_bytes:
+                old_key, old = self._memory.popitem(last=False)
+                self._memory_used -= old.nbytes
+                self._spill(old_key, old)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._counters,
+                memory_entries=len(self._memory),
+                memory_mb=round(self._memory_used / (1024 * 1024), 1),
+                spill_entries=len(self._spilled),
+                spill_mb=round(self._spill_used / (1024 * 1024), 1),
+            )
+
+    def _spill(self, key, flow):
+        # Appelé sous self._lock
+        if not self.spill_dir or key in self._spilled:
+            return
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        path = os.path.join(self.spill_dir, f"{name}.npy")
+        np.save(path, flow)
+        self._spilled[key] = (path, flow.nbytes)
+        self._spill_used += flow.nbytes
+        while self._spill_used > self.spill_bytes and self._spilled:
+            _, (old_path, size) = self._spilled.popitem(last=False)
+            self._spill_used -= size
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+
+FLOW_CACHE = FlowCache()
+
+
+def cached_flow(stream_id, i, j, resolution, flow_key, compute):
+    """Flux de la paire (i, j), depuis le cache si `stream_id` est connu."""
+    if stream_id is None:
+        return compute()
+    return FLOW_CACHE.get_or_compute((stream_id, int(i), int(j), tuple(resolution), flow_key), compute)
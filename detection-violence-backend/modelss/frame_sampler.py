@@ -0,0 +1,239 @@
+# models/frame_sampler.py
+import os
+import time
+import cv2
+import numpy as np
+from models.metrics import METRICS
+
+# ========== Métadonnées ==========
+def probe_video(video_path):
+    """Renvoie (fps, nombre de frames) sans décoder le flux."""
+    with METRICS.timer("probe"):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            cap.release()
+            return 0.0, 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+    return fps, total
+
+
+# ========== Positionnement exact ==========
+# cap.set(CAP_PROP_POS_FRAMES) n'est pas exact sur beaucoup de conteneurs :
+# FFmpeg se place d'après des horodatages parfois faux. On se place
+# SEEK_PREROLL frames avant la cible (le décodeur repart de la keyframe
+# précédente), puis on avance par grab() en contrôlant CAP_PROP_POS_FRAMES ;
+# au moindre écart, relecture depuis le début, exacte par construction.
+SEEK_PREROLL = int(os.getenv("SEEK_PREROLL_FRAMES", "30"))
+# Écart (en frames) au-delà duquel un seek coûte moins que des grab()
+SEEK_MIN_GAP = int(os.getenv("SEEK_MIN_GAP_FRAMES", "250"))
+
+
+def _grab_to(cap, pos, target, check):
+    """grab() de `pos` jusqu'à `target`. False si le flux se termine ou, avec
+    `check`, si la position rapportée par le décodeur diverge."""
+    discarded = 0
+    try:
+        while pos < target:
+            if not cap.grab():
+                return False
+            pos += 1
+            discarded += 1
+            if check and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != pos:
+                return False
+        return True
+    finally:
+        METRICS.inc("frames_discarded", discarded)
+
+
+def open_at(video_path, target):
+    """Capture dont le prochain grab() lit la frame `target`."""
+    cap = cv2.VideoCapture(video_path)
+    if target <= 0 or not cap.isOpened():
+        return cap
+    start = max(target - SEEK_PREROLL, 0)
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    pos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if 0 <= pos <= target and _grab_to(cap, pos, target, check=True):
+        return cap
+    # Seek imprécis : relecture depuis le début
+    METRICS.inc("seek_fallbacks")
+    cap.release()
+    cap = cv2.VideoCapture(video_path)
+    _grab_to(cap, 0, target, check=False)
+    return cap
+
+
+# ========== Échantillonnage séquentiel ==========
+# Sur du H.264, chaque cap.set(CAP_PROP_POS_FRAMES, idx) redécode depuis la
+# keyframe précédente. On parcourt donc le flux une seule fois : grab() sur
+# les frames ignorées, retrieve() uniquement sur les indices demandés.
+
+
+def iter_frames_at(cap, indices):
+    """Parcourt `cap` une seule fois et renvoie (index, frame) pour chaque
+    index unique demandé, dans l'ordre croissant. frame vaut None si le flux
+    se termine avant l'index. Le temps passé dans le décodeur, les frames
+    décodées et les frames ignorées sont comptés dans METRICS."""
+    wanted = sorted({int(i) for i in indices if int(i) >= 0})
+    pos = 0
+    ended = False
+    decode_seconds, decoded, discarded, nbytes = 0.0, 0, 0, 0
+    try:
+        for idx in wanted:
+            frame = None
+            t0 = time.perf_counter()
+            if not ended:
+                while pos < idx:
+                    if not cap.grab():
+                        ended = True
+                        break
+                    pos += 1
+                    discarded += 1
+            if not ended:
+                ret = cap.grab()
+                pos += 1
+                if ret:
+                    ret, frame = cap.retrieve()
+                if not ret:
+                    ended = True
+                    frame = None
+                else:
+                    decoded += 1
+                    nbytes += frame.nbytes
+            decode_seconds += time.perf_counter() - t0
+            yield idx, frame
+    finally:
+        METRICS.observe("decode", decode_seconds)
+        METRICS.inc("frames_decoded", decoded)
+        METRICS.inc("frames_discarded", discarded)
+        METRICS.inc("decoded_bytes", nbytes)
+
+
+def sample_frames(video_path, indices, transform=None):
+    """Lit les frames aux `indices` (ordre et doublons conservés) en un seul
+    passage. `transform` est appliqué une fois par frame décodée ; les frames
+    absentes valent None."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return sample_frames_from_capture(cap, indices, transform)
+    finally:
+        cap.release()
+
+
+def sample_frames_from_capture(cap, indices, transform=None):
+    decoded = {}
+    resize_seconds = 0.0
+    if cap.isOpened():
+        for idx, frame in iter_frames_at(cap, indices):
+            if frame is not None and transform is not None:
+                t0 = time.perf_counter()
+                frame = transform(frame)
+                resize_seconds += time.perf_counter() - t0
+            decoded[idx] = frame
+    if transform is not None:
+        METRICS.observe("resize", resize_seconds)
+    return [decoded.get(int(i)) for i in indices]
+
+
+# ========== Clip uint8 contigu ==========
+def sample_clip(cap, indices, frame_size=(224, 224), out=None):
+    """Clip RGB uint8 contigu (N, H, W, 3) aux `indices` : chaque frame
+    décodée est réduite puis convertie directement dans sa case, sans copie
+    flottante intermédiaire (la mise à l'échelle [0, 1] se fait dans le
+    modèle). Les frames absentes valent zéro."""
+    w, h = frame_size
+    if out is None:
+        out = np.zeros((len(indices), h, w, 3), np.uint8)
+    else:
+        out[:] = 0
+    slots = {}
+    for k, i in enumerate(indices):
+        slots.setdefault(int(i), []).append(k)
+    if not cap.isOpened():
+        return out
+
+    small = np.empty((h, w, 3), np.uint8)
+    resize_seconds = 0.0
+    for idx, frame in iter_frames_at(cap, slots):
+        if frame is None:
+            continue
+        t0 = time.perf_counter()
+        first, *others = slots[idx]
+        cv2.resize(frame, frame_size, dst=small)
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=out[first])
+        for k in others:
+            out[k] = out[first]
+        resize_seconds += time.perf_counter() - t0
+    METRICS.observe("resize", resize_seconds)
+    return out
+
+
+def iter_segments(cap, index_lists, transform=None):
+    """Un seul passage sur le flux pour plusieurs listes d'indices (une par
+    segment). Renvoie, dans l'ordre des segments, la liste des frames de
+    chaque segment dès qu'elle est complète ; les frames qui ne servent plus
+    à aucun segment restant sont libérées aussitôt."""
+    index_lists = [[int(i) for i in idxs] for idxs in index_lists]
+    pending = {}
+    for idxs in index_lists:
+        for i in set(idxs):
+            pending[i] = pending.get(i, 0) + 1
+
+    walker = iter_frames_at(cap, pending) if cap.isOpened() else iter(())
+    decoded = {}
+    reached = -1
+    exhausted = False
+    for idxs in index_lists:
+        last = max(idxs, default=-1)
+        resize_seconds = 0.0
+        while not exhausted and reached < last:
+            try:
+                idx, frame = next(walker)
+            except StopIteration:
+                exhausted = True
+                break
+            if frame is not None and transform is not None:
+                t0 = time.perf_counter()
+                frame = transform(frame)
+                resize_seconds += time.perf_counter() - t0
+            decoded[idx] = frame
+            reached = idx
+
+        if transform is not None:
+            METRICS.observe("resize", resize_seconds)
+
+        yield [decoded.get(i) for i in idxs]
+
+        for i in set(idxs):
+            pending[i] -= 1
+            if pending[i] == 0:
+                decoded.pop(i, None)
+
+
+def iter_segments_from(video_path, index_lists, transform=None):
+    """iter_segments sur un fichier. Les segments sont lus dans l'ordre, en
+    un seul passage tant que l'écart entre deux segments reste sous
+    SEEK_MIN_GAP frames ; au-delà, seek exact (open_at) au lieu de décoder
+    toutes les frames intermédiaires (passe fine de la recherche temporelle)."""
+    groups, reach = [], -1
+    for k, idxs in enumerate(index_lists):
+        lo = int(min(idxs, default=0))
+        if groups and lo - reach <= SEEK_MIN_GAP:
+            groups[-1].append(k)
+        else:
+            groups.append([k])
+        reach = max(reach, int(max(idxs, default=0)))
+
+    for group in groups:
+        first = min(int(min(index_lists[k], default=0)) for k in group)
+        start = first if first > SEEK_MIN_GAP else 0
+        cap = open_at(video_path, start)
+        try:
+            yield from iter_segments(
+                cap, [[int(i) - start for i in index_lists[k]] for k in group], transform
+            )
+        finally:
+            cap.release()
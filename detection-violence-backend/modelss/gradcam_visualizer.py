@@ -2,8 +2,13 @@
 import cv2
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras.models import load_model, Model
+from tensorflow.keras.models import Model
 import os
+from models.frame_sampler import sample_clip
+from models.registry import REGISTRY
+from models.two_stream_inference import FLOW, MODEL_NAME as TWO_STREAM_MODEL, _load_keras
+from models.fast_inference import CompiledModel
+from models.optical_flow import compute_flows
 
 # === CONSTANTES ===
 FRAME_SIZE = (224, 224)
@@ -14,34 +19,20 @@ TARGET_LAYER = 'conv3d_5'  # Change si ton modèle utilise un autre nom
 
 # === PREPROCESSING RGB ===
 def preprocess_rgb_segment(path):
+    # Clip RGB uint8 contigu (mis à l'échelle [0, 1] au moment du Grad-CAM)
     cap = cv2.VideoCapture(path)
     total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     idxs = np.linspace(0, total-1, num=MAX_FRAMES, dtype=int)
-
-    frames = []
-    for idx in idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if not ret:
-            frames.append(np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), np.float32))
-        else:
-            f = cv2.resize(frame, FRAME_SIZE)
-            f = cv2.cvtColor(f, cv2.COLOR_BGR2RGB)
-            frames.append(f / 255.0)
-    cap.release()
-    return np.stack(frames, axis=0)
+    try:
+        return sample_clip(cap, idxs, FRAME_SIZE)
+    finally:
+        cap.release()
 
 # === PREPROCESS FLOW ===
 def preprocess_flow_segment(rgb):
-    gray = [(f * 255).astype(np.uint8) for f in rgb]
-    gray = [cv2.cvtColor(f, cv2.COLOR_RGB2GRAY) for f in gray]
-    flows = [np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 2), np.float32)]
-    for i in range(1, len(gray)):
-        flow = cv2.calcOpticalFlowFarneback(
-            gray[i-1], gray[i], None, 0.5, 3, 15, 3, 5, 1.2, 0
-        )
-        flows.append(flow)
-    return np.stack(flows, axis=0)
+    gray = [cv2.cvtColor(f, cv2.COLOR_RGB2GRAY) for f in rgb]
+    # Même fournisseur de flux que l'inférence two-stream
+    return compute_flows(gray, FLOW)
 
 # === MODEL ===
 def make_gradcam_model(base_model, layer_name):
@@ -75,11 +66,14 @@ def overlay_heatmap(frame, heatmap):
 
 # === MAIN ===
 def visualize_violence(video_path):
-    rgb = preprocess_rgb_segment(video_path)
-    flow = preprocess_flow_segment(rgb)
+    rgb_u8 = preprocess_rgb_segment(video_path)
+    flow = preprocess_flow_segment(rgb_u8)
+    rgb = rgb_u8.astype(np.float32) / 255.0  # le modèle Keras brut attend [0, 1]
 
-    tf.keras.config.enable_unsafe_deserialization()
-    model = load_model(MODEL_PATH)
+    # Même instance que l'inférence two-stream (chargée une seule fois) ;
+    # Grad-CAM a besoin du modèle Keras si l'inférence passe par ONNX
+    served = REGISTRY.get(TWO_STREAM_MODEL)
+    model = served.model if isinstance(served, CompiledModel) else _load_keras()
     gradcam_model = make_gradcam_model(model, TARGET_LAYER)
 
     prob = float(model.predict([np.expand_dims(rgb, 0), np.expand_dims(flow, 0)])[0, 0])
@@ -93,7 +87,7 @@ def visualize_violence(video_path):
     heatmap = compute_gradcam(gradcam_model, rgb, flow)
 
     # Prendre une frame au hasard (milieu)
-    mid_frame = (rgb[MAX_FRAMES // 2] * 255).astype(np.uint8)
+    mid_frame = rgb_u8[MAX_FRAMES // 2]
     frame_bgr = cv2.cvtColor(mid_frame, cv2.COLOR_RGB2BGR)
     result = overlay_heatmap(frame_bgr, heatmap)
 
@@ -2,50 +2,62 @@
 import os
 import cv2
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 from tensorflow.keras.metrics import Precision, Recall # type: ignore
 from tensorflow.keras.models import load_model # type: ignore
+from models.frame_sampler import sample_clip
+from models.batching import MicroBatcher
+from models.fast_inference import CompiledModel, clip_spec
+from models.metrics import METRICS
+from models.onnx_backend import load_served_model
+from models.registry import REGISTRY
 
 # ----- Constants (match training) -----
 BATCH_SIZE = 1
 FRAME_SIZE = (224, 224)
 MAX_FRAMES = 30
 THRESHOLD_I3D = 0.517
+# Clip RGB uint8 : mise à l'échelle [0, 1] dans la passe avant compilée
+INPUT_SIGNATURE = [clip_spec(3, MAX_FRAMES, FRAME_SIZE, tf.uint8)]
 
-# ----- Load I3D Model -----
+# ----- Load I3D Model (au premier usage, via le registre) -----
 MODEL_I3D_PATH = os.path.join("models", "i3d_model.keras")
-tf.keras.config.enable_unsafe_deserialization()
-MODEL_I3D = load_model(
-    MODEL_I3D_PATH,
-    custom_objects={ 'Precision': Precision, 'Recall': Recall }
-)
+MODEL_NAME = "i3d"
 
-# Preprocess RGB-only
-def preprocess_video_i3d(video_path, frame_size=FRAME_SIZE, max_frames=MAX_FRAMES):
-    if isinstance(video_path, tf.Tensor):
-        video_path = video_path.numpy().decode('utf-8')
-    frame_size = (int(frame_size[0]), int(frame_size[1]))
+def _load_keras():
+    tf.keras.config.enable_unsafe_deserialization()
+    return load_model(
+        MODEL_I3D_PATH,
+        custom_objects={ 'Precision': Precision, 'Recall': Recall }
+    )
+
+def _load_i3d():
+    # Graphe ONNX si INFERENCE_BACKEND(_I3D) le demande, sinon Keras compilé
+    served = load_served_model(MODEL_I3D_PATH, MODEL_NAME)
+    if served is not None:
+        return served
+    return CompiledModel(_load_keras(), INPUT_SIGNATURE)
+
+REGISTRY.register(MODEL_NAME, _load_i3d)
 
+# Clip RGB uint8, entrée du modèle servi
+def load_clip(video_path, frame_size=FRAME_SIZE, max_frames=MAX_FRAMES):
     cap = cv2.VideoCapture(video_path)
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    if total <= 0 or not cap.isOpened():
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0 or not cap.isOpened():
+            return np.zeros((max_frames, frame_size[1], frame_size[0], 3), np.uint8)
+        indices = np.linspace(0, total - 1, num=max_frames, dtype=int)
+        return sample_clip(cap, indices, frame_size)
+    finally:
         cap.release()
-        return np.zeros((max_frames, frame_size[1], frame_size[0], 3), dtype=np.float32)
 
-    indices = np.linspace(0, total - 1, num=max_frames, dtype=int)
-    frames = []
-    for idx in indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if not ret:
-            frames.append(np.zeros((frame_size[1], frame_size[0], 3), dtype=np.float32))
-        else:
-            frame = cv2.resize(frame, frame_size)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) / 255.0
-            frames.append(frame.astype(np.float32))
-    cap.release()
-    return np.stack(frames, axis=0)
+# Preprocess RGB-only (float32 dans [0, 1], pipeline tf.data hors ligne)
+def preprocess_video_i3d(video_path, frame_size=FRAME_SIZE, max_frames=MAX_FRAMES):
+    if isinstance(video_path, tf.Tensor):
+        video_path = video_path.numpy().decode('utf-8')
+    frame_size = (int(frame_size[0]), int(frame_size[1]))
+    return load_clip(video_path, frame_size, int(max_frames)).astype(np.float32) / 255.0
 
 # TF wrapper
 def tf_preprocess_video_i3d(video_path, frame_size, max_frames):
@@ -57,7 +69,7 @@ def tf_preprocess_video_i3d(video_path, frame_size, max_frames):
     video.set_shape((max_frames, frame_size[1], frame_size[0], 3))
     return video
 
-# Build dataset
+# Build dataset (usage hors ligne uniquement)
 def get_tfdata_dataset_i3d(df, batch_size=BATCH_SIZE):
     paths = df['video_path'].tolist()
     labels = df['label'].tolist()
@@ -71,16 +83,22 @@ def get_tfdata_dataset_i3d(df, batch_size=BATCH_SIZE):
     ds = ds.batch(batch_size).prefetch(tf.data.experimental.AUTOTUNE)
     return ds
 
+# Passe avant compilée une fois, partagée par micro-batching entre les requêtes
+_BATCHER = MicroBatcher("i3d", lambda x: REGISTRY.get(MODEL_NAME)(x))
+
+def predict_clip(clip) -> float:
+    """Probabilité pour un clip RGB uint8 déjà préparé (MAX_FRAMES, H, W, 3)."""
+    with METRICS.timer("inference"):
+        return float(_BATCHER.predict(clip)[0])
+
 # Prediction function
 def predict_i3d(video_path: str) -> dict:
-    df = pd.DataFrame({'video_path': [video_path], 'label':[0]})
-    ds = get_tfdata_dataset_i3d(df)
-    for video_batch, _ in ds.take(1):
-        prob = MODEL_I3D.predict(video_batch)[0,0]
-        return {
-            'filename': os.path.basename(video_path),
-            'probability': float(prob),
-            'is_violent': bool(prob > THRESHOLD_I3D)
-        }
+    clip = load_clip(video_path)
+    prob = predict_clip(clip)
+    return {
+        'filename': os.path.basename(video_path),
+        'probability': float(prob),
+        'is_violent': bool(prob > THRESHOLD_I3D)
+    }
         
         
\ No newline at end of file
@@ -0,0 +1,151 @@
+# models/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ========== Métriques du pipeline ==========
+# Durée de chaque étape (histogrammes par modèle et par étape), compteurs
+# (octets, frames décodées / ignorées) et jauges fournies par des collecteurs
+# (micro-batching, caches, registre). Exposé au format texte Prometheus par
+# GET /metrics ; les durées de la requête en cours sont aussi cumulées pour
+# l'en-tête Server-Timing.
+STAGES = ("upload", "probe", "decode", "resize", "flow", "inference", "annotate")
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "violence"
+
+_model = ContextVar("metrics_model", default="")
+_timings = ContextVar("metrics_timings", default=None)
+
+
+def _escape(value) -> str:
+    """Valeur d'étiquette au format texte Prometheus."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    def __init__(self):
+        self._histograms = {}  # (étape, modèle) -> Histogram
+        self._counters = {}    # (nom, modèle) -> valeur
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, model=None):
+        """Durée d'une étape, pour le modèle courant si `model` est omis."""
+        model = model if model is not None else _model.get()
+        with self._lock:
+            hist = self._histograms.get((stage, model))
+            if hist is None:
+                hist = self._histograms[(stage, model)] = Histogram()
+            hist.observe(seconds)
+        timings = _timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def inc(self, name, value=1, model=None):
+        model = model if model is not None else _model.get()
+        with self._lock:
+            self._counters[(name, model)] = self._counters.get((name, model), 0) + value
+
+    def counter(self, name) -> float:
+        """Valeur d'un compteur, tous modèles confondus."""
+        with self._lock:
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    @contextmanager
+    def timer(self, stage, model=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0, model)
+
+    def add_collector(self, collect):
+        """`collect()` renvoie des (nom, labels, valeur) lus à chaque export."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Export au format texte Prometheus."""
+        lines = [
+            f"# HELP {PREFIX}_stage_seconds Durée des étapes du pipeline.",
+            f"# TYPE {PREFIX}_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (stage, model), hist in histograms:
+            labels = f'stage="{_escape(stage)}",model="{_escape(model)}"'
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f"{PREFIX}_stage_seconds_sum{{{labels}}} {hist.sum}")
+            lines.append(f"{PREFIX}_stage_seconds_count{{{labels}}} {hist.count}")
+
+        declared = set()
+        for (name, model), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f'{PREFIX}_{name}_total{{model="{_escape(model)}"}} {value}')
+
+        for collect in self._collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                continue
+            for name, labels, value in samples:
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# TYPE {PREFIX}_{name} gauge")
+                text = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()))
+                text = f"{{{text}}}" if text else ""
+                lines.append(f"{PREFIX}_{name}{text} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def model_context(model):
+    """Étiquette `model` pour les mesures prises dans ce contexte."""
+    token = _model.set(model)
+    try:
+        yield
+    finally:
+        _model.reset(token)
+
+
+@contextmanager
+def request_timings():
+    """Cumule les durées d'étape de la requête courante : {étape: secondes}.
+    Le dict est partagé avec les threads lancés par run_in_threadpool, qui
+    copient le contexte."""
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def server_timing(timings) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
@@ -0,0 +1,93 @@
+# models/onnx_backend.py
+import os
+
+import numpy as np
+
+# ========== Backend ONNX Runtime ==========
+# Sur les nœuds CPU, les modèles exportés par tools/export_onnx.py peuvent
+# être servis par ONNX Runtime à la place de TensorFlow. Choix par modèle :
+#   INFERENCE_BACKEND_<MODELE> (ex. INFERENCE_BACKEND_I3D=onnx_int8), sinon
+#   INFERENCE_BACKEND ; valeurs : "keras" (défaut), "onnx", "onnx_int8".
+# Le graphe exporté est rangé à côté du .keras : <nom>.onnx / <nom>.int8.onnx.
+BACKENDS = ("keras", "onnx", "onnx_int8")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))  # 0 = cœurs physiques (ORT)
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "1"))
+
+
+def model_backend(model_name):
+    backend = os.getenv(f"INFERENCE_BACKEND_{model_name.upper()}") or INFERENCE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend d'inférence inconnu : {backend}")
+    return backend
+
+
+def onnx_path(keras_path, quantized=False):
+    base = os.path.splitext(keras_path)[0]
+    return f"{base}.int8.onnx" if quantized else f"{base}.onnx"
+
+
+def served_weights(keras_path, model_name):
+    """Fichier réellement servi pour `model_name` selon son backend."""
+    backend = model_backend(model_name)
+    if backend == "keras":
+        return keras_path
+    return onnx_path(keras_path, backend == "onnx_int8")
+
+
+def session_options(intra_threads=ORT_INTRA_OP_THREADS, inter_threads=ORT_INTER_OP_THREADS):
+    import onnxruntime as ort
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Exécution séquentielle : le parallélisme utile est dans les Conv3D
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.intra_op_num_threads = intra_threads
+    opts.inter_op_num_threads = inter_threads
+    return opts
+
+
+class OnnxModel:
+    """Graphe ONNX servi par ONNX Runtime, appelable comme CompiledModel :
+    predict(*arrays) -> np.ndarray, entrées dans l'ordre du modèle Keras.
+    Le graphe exporté attend du float32 dans [0, 1] : les clips uint8 sont
+    mis à l'échelle ici."""
+    def __init__(self, path, intra_threads=ORT_INTRA_OP_THREADS, inter_threads=ORT_INTER_OP_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("onnxruntime est requis pour le backend ONNX") from e
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Graphe ONNX absent : {path} (exporter avec tools/export_onnx.py)"
+            )
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, session_options(intra_threads, inter_threads),
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        # Estimation pour le budget mémoire du registre
+        self.nbytes = os.path.getsize(path)
+
+    def predict(self, *arrays):
+        feeds = {
+            name: to_float_input(a) for name, a in zip(self.input_names, arrays)
+        }
+        return self.session.run(None, feeds)[0]
+
+    def __call__(self, *arrays):
+        return self.predict(*arrays)
+
+
+def to_float_input(a):
+    if a.dtype == np.uint8:
+        return a.astype(np.float32) * np.float32(1.0 / 255.0)
+    return np.ascontiguousarray(a, dtype=np.float32)
+
+
+def load_served_model(keras_path, model_name):
+    """OnnxModel si le backend du modèle est ONNX, sinon None (Keras)."""
+    backend = model_backend(model_name)
+    if backend == "keras":
+        return None
+    return OnnxModel(onnx_path(keras_path, backend == "onnx_int8"))
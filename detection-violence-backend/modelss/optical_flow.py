@@ -0,0 +1,123 @@
+# models/optical_flow.py
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# ========== Fournisseurs de flux optique ==========
+# Un fournisseur prend deux images en niveaux de gris uint8 de même taille et
+# renvoie le flux (H, W, 2) float32 à cette taille. `name` est renvoyé dans
+# les réponses, `key` entre dans la clé du cache de flux.
+#   "farneback"                          : réglages historiques (référence)
+#   "dis_ultrafast", "dis_fast", "dis_medium" : DIS d'OpenCV
+#   "<fournisseur>@112"                  : calcul en 112x112 puis suréchantillonnage
+# Choix par déploiement : FLOW_PROVIDER, et par modèle :
+# FLOW_PROVIDER_<MODELE> (ex. FLOW_PROVIDER_TWO_STREAM=dis_fast@112).
+FLOW_PROVIDER = os.getenv("FLOW_PROVIDER", "farneback")
+
+FARNEBACK_PARAMS = dict(pyr_scale=0.5, levels=3, winsize=15,
+                        iterations=3, poly_n=5, poly_sigma=1.2, flags=0)
+
+
+class FarnebackFlow:
+    def __init__(self, params=FARNEBACK_PARAMS):
+        self.params = dict(params)
+        self.name = "farneback"
+        self.key = (self.name,) + tuple(sorted(self.params.items()))
+
+    def __call__(self, prev_gray, gray):
+        return cv2.calcOpticalFlowFarneback(prev_gray, gray, None, **self.params)
+
+
+class DISFlow:
+    PRESETS = {
+        "ultrafast": cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST,
+        "fast": cv2.DISOPTICAL_FLOW_PRESET_FAST,
+        "medium": cv2.DISOPTICAL_FLOW_PRESET_MEDIUM,
+    }
+
+    def __init__(self, preset="fast"):
+        if preset not in self.PRESETS:
+            raise ValueError(f"Preset DIS inconnu : {preset}")
+        self.preset = preset
+        self.name = f"dis_{preset}"
+        self.key = (self.name,)
+        # Une instance DIS par thread : l'objet OpenCV n'est pas réentrant
+        self._local = threading.local()
+
+    def __call__(self, prev_gray, gray):
+        dis = getattr(self._local, "dis", None)
+        if dis is None:
+            dis = self._local.dis = cv2.DISOpticalFlow_create(self.PRESETS[self.preset])
+        return dis.calc(prev_gray, gray, None)
+
+
+class DownscaledFlow:
+    """Calcule le flux de `inner` à `size` puis le remet à la taille
+    d'entrée (vecteurs multipliés par le facteur d'échelle)."""
+    def __init__(self, inner, size=(112, 112)):
+        self.inner = inner
+        self.size = tuple(size)
+        self.name = f"{inner.name}@{self.size[0]}"
+        self.key = inner.key + (self.size,)
+
+    def __call__(self, prev_gray, gray):
+        h, w = gray.shape[:2]
+        if (w, h) == self.size:
+            return self.inner(prev_gray, gray)
+        small = self.inner(
+            cv2.resize(prev_gray, self.size, interpolation=cv2.INTER_AREA),
+            cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA),
+        )
+        flow = cv2.resize(small, (w, h), interpolation=cv2.INTER_LINEAR)
+        flow[..., 0] *= w / self.size[0]
+        flow[..., 1] *= h / self.size[1]
+        return flow
+
+
+PROVIDER_NAMES = (
+    "farneback", "dis_ultrafast", "dis_fast", "dis_medium",
+    "farneback@112", "dis_ultrafast@112", "dis_fast@112", "dis_medium@112",
+)
+_providers = {}
+_lock = threading.Lock()
+
+
+def _build(name):
+    base, _, size = name.partition("@")
+    if base == "farneback":
+        provider = FarnebackFlow()
+    elif base.startswith("dis_"):
+        provider = DISFlow(base[len("dis_"):])
+    else:
+        raise ValueError(f"Fournisseur de flux inconnu : {name}")
+    if size:
+        provider = DownscaledFlow(provider, (int(size), int(size)))
+    return provider
+
+
+def get_flow_provider(name=None):
+    """Fournisseur `name` (FLOW_PROVIDER par défaut), partagé entre appels."""
+    name = name or FLOW_PROVIDER
+    with _lock:
+        provider = _providers.get(name)
+        if provider is None:
+            provider = _providers[name] = _build(name)
+    return provider
+
+
+def model_flow_provider(model_name):
+    """Fournisseur configuré pour un modèle (FLOW_PROVIDER_<MODELE>)."""
+    return get_flow_provider(os.getenv(f"FLOW_PROVIDER_{model_name.upper()}") or None)
+
+
+def compute_flows(gray_frames, provider=None):
+    """Flux de chaque paire consécutive ; zéros pour la première frame."""
+    provider = provider or get_flow_provider()
+    h, w = gray_frames[0].shape[:2]
+    flows = np.empty((len(gray_frames), h, w, 2), np.float32)
+    flows[0] = 0.0
+    for i in range(1, len(gray_frames)):
+        flows[i] = provider(gray_frames[i - 1], gray_frames[i])
+    return flows
@@ -0,0 +1,195 @@
+# models/preprocess_pool.py
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from models.frame_sampler import open_at, sample_frames_from_capture
+from models.optical_flow import get_flow_provider
+from models.segment_preprocess import (
+    FRAME_SIZE, MAX_FRAMES, is_static, motion_energy, resize_frame, segment_tensors,
+)
+
+# ========== Pool de prétraitement multi-processus ==========
+# Décodage et flux optique dans des processus séparés : les boucles Python
+# par frame ne se disputent plus le GIL avec l'inférence. Chaque worker écrit
+# le RGB et le flux d'un segment dans un bloc de mémoire partagée préalloué
+# et ne renvoie que ses temps ; le thread d'inférence lit le bloc comme un
+# tableau NumPy, sans copie.
+# Un bloc contient `rows` segments (un lot du modèle) ; PREPROCESS_INFLIGHT
+# blocs existent au plus, ce qui borne la mémoire et le nombre de segments en
+# cours. Avec 2 blocs ou plus, le lot suivant est préparé pendant l'inférence.
+PREPROCESS_WORKERS  = int(os.getenv("PREPROCESS_WORKERS", "0"))  # 0 = dans le processus
+PREPROCESS_INFLIGHT = int(os.getenv("PREPROCESS_INFLIGHT", "2"))  # blocs de lots
+
+RGB_SHAPE = (MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 3)
+FLOW_SHAPE = (MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 2)
+
+
+def _block_views(buf, rows):
+    """(rgb uint8, flux float32) de `rows` segments sur un même tampon."""
+    rgb_bytes = rows * int(np.prod(RGB_SHAPE))
+    rgb = np.ndarray((rows, *RGB_SHAPE), np.uint8, buffer=buf)
+    flow = np.ndarray((rows, *FLOW_SHAPE), np.float32, buffer=buf, offset=rgb_bytes)
+    return rgb, flow
+
+
+def _block_size(rows):
+    return rows * (int(np.prod(RGB_SHAPE)) + int(np.prod(FLOW_SHAPE)) * 4)
+
+
+# --- côté worker ---
+_worker_blocks = {}
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 : le resource_tracker du worker supprimerait le bloc
+        # à sa sortie alors qu'il appartient au processus principal
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _init_worker(names, rows):
+    cv2.setNumThreads(1)  # un cœur par worker : le parallélisme vient du pool
+    for block, name in enumerate(names):
+        shm = _attach(name)
+        _worker_blocks[block] = (shm, _block_views(shm.buf, rows))
+
+
+def _fill(block, row, path, idxs, provider_name, motion_threshold=0.0):
+    t0 = time.perf_counter()
+    # Un seul seek exact par segment (mêmes frames que la lecture séquentielle
+    # du processus principal), puis lecture séquentielle
+    first = int(min(idxs))
+    cap = open_at(path, first)
+    try:
+        frames = sample_frames_from_capture(cap, [int(i) - first for i in idxs], resize_frame)
+    finally:
+        cap.release()
+    t1 = time.perf_counter()
+    # Segment statique : ni flux ni écriture, la ligne sera ignorée
+    energy = motion_energy(frames) if motion_threshold > 0 else float("inf")
+    if is_static(energy, motion_threshold):
+        return {"decode": t1 - t0, "flow": 0.0, "motion": energy, "skipped": True}
+    _, (rgb, flow) = _worker_blocks[block]
+    segment_tensors(frames, rgb[row], flow[row], provider=get_flow_provider(provider_name))
+    return {"decode": t1 - t0, "flow": time.perf_counter() - t1, "motion": energy, "skipped": False}
+
+
+# --- côté processus principal ---
+class PreprocessPool:
+    def __init__(self, workers=PREPROCESS_WORKERS, blocks=PREPROCESS_INFLIGHT, rows=16):
+        self.workers = workers
+        self.rows = rows
+        self._shm = [
+            shared_memory.SharedMemory(create=True, size=_block_size(rows))
+            for _ in range(max(blocks, 1))
+        ]
+        self._views = [_block_views(shm.buf, rows) for shm in self._shm]
+        self._blocks = len(self._shm)
+        self._free = queue.Queue()
+        for block in range(self._blocks):
+            self._free.put(block)
+        self._retired = False
+        self._lock = threading.Lock()
+        # spawn : pas de fork d'un processus où TensorFlow tourne déjà
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp.get_context("spawn"),
+            initializer=_init_worker, initargs=([s.name for s in self._shm], rows),
+        )
+
+    @property
+    def blocks(self):
+        return self._blocks
+
+    @property
+    def retired(self):
+        return self._retired
+
+    def acquire(self, block=True):
+        """Bloc libre, en attendant si tous sont en cours (None si block=False).
+        BrokenProcessPool si le pool a été retiré entre-temps."""
+        try:
+            got = self._free.get(block=block)
+        except queue.Empty:
+            return None
+        if self._retired:
+            self.release(got)
+            raise BrokenProcessPool("pool de prétraitement retiré")
+        return got
+
+    def release(self, block):
+        self._free.put(block)
+        self._close_if_idle()
+
+    def retire(self):
+        """Worker mort (BrokenProcessPool) : plus aucun lot n'est lancé et la
+        mémoire partagée est libérée dès que les lots en cours l'ont rendue."""
+        self._retired = True
+        self._close_if_idle()
+
+    def _close_if_idle(self):
+        with self._lock:
+            if self._retired and self._shm and self._free.qsize() == self._blocks:
+                self.shutdown()
+
+    def fill(self, block, row, path, idxs, provider, motion_threshold=0.0):
+        """Future du remplissage de la ligne `row` du bloc ; résultat : temps
+        par étape, énergie de mouvement et "skipped" si le segment est
+        statique (motion_threshold > 0, ligne non remplie)."""
+        return self._executor.submit(
+            _fill, block, row, path, [int(i) for i in idxs], provider.name, motion_threshold
+        )
+
+    def views(self, block):
+        """(rgb, flux) du bloc : tableaux NumPy sur la mémoire partagée."""
+        return self._views[block]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._views = []
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_preprocess_pool(rows=16):
+    """Pool partagé (créé au premier usage, recréé après la mort d'un
+    worker), ou None si PREPROCESS_WORKERS=0."""
+    global _pool
+    if PREPROCESS_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool.retired:
+            _pool = PreprocessPool(PREPROCESS_WORKERS, PREPROCESS_INFLIGHT, rows)
+            atexit.register(_pool.shutdown)
+    return _pool
+
+
+def retire_preprocess_pool(pool):
+    """Retire un pool dont un worker est mort : sans cela, chaque requête
+    two-stream suivante échouerait avec BrokenProcessPool jusqu'au
+    redémarrage. Le prochain get_preprocess_pool en crée un neuf."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.retire()
@@ -0,0 +1,135 @@
+# models/registry.py
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+# ========== Registre de modèles ==========
+# Les modèles sont chargés au premier usage (clé : nom + version) et non plus
+# à l'import. Au-delà du budget mémoire, le moins récemment utilisé est
+# libéré. Des premières requêtes concurrentes partagent un seul chargement.
+MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))  # 0 = illimité
+
+
+def estimate_nbytes(obj):
+    """Taille mémoire des poids : attribut `nbytes` ou somme des poids Keras."""
+    nbytes = getattr(obj, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    weights = getattr(obj, "weights", None) or []
+    return int(sum(np.prod(w.shape) * np.dtype(str(w.dtype)).itemsize for w in weights))
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb=MEMORY_BUDGET_MB):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._loaders = {}          # (nom, version) -> fonction de chargement
+        self._latest = {}           # nom -> dernière version enregistrée
+        self._loaded = OrderedDict()  # (nom, version) -> entrée, ordre LRU
+        self._loading = {}          # (nom, version) -> Future partagé
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, version="1"):
+        key = (name, version)
+        with self._lock:
+            self._loaders[key] = loader
+            self._latest[name] = version
+            self._loaded.pop(key, None)
+
+    def get(self, name, version=None):
+        """Renvoie le modèle chargé, en le chargeant si besoin."""
+        with self._lock:
+            version = version or self._latest.get(name)
+            key = (name, version)
+            if key not in self._loaders:
+                raise KeyError(f"Modèle inconnu : {name} (version {version})")
+            entry = self._loaded.get(key)
+            if entry is not None:
+                self._loaded.move_to_end(key)
+                entry["last_used"] = time.time()
+                return entry["model"]
+            fut = self._loading.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._loading[key] = Future()
+                loader = self._loaders[key]
+
+        if not owner:
+            return fut.result()
+
+        try:
+            t0 = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - t0
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        with self._lock:
+            now = time.time()
+            self._loaded[key] = {
+                "model": model,
+                "nbytes": estimate_nbytes(model),
+                "load_seconds": load_seconds,
+                "loaded_at": now,
+                "last_used": now,
+            }
+            self._loading.pop(key, None)
+            evicted = self._evict_over_budget(keep=key)
+        fut.set_result(model)
+        if evicted:
+            gc.collect()
+        return model
+
+    def evict(self, name, version=None):
+        with self._lock:
+            key = (name, version or self._latest.get(name))
+            evicted = self._loaded.pop(key, None) is not None
+        if evicted:
+            gc.collect()
+        return evicted
+
+    def loaded(self) -> list:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "version": version,
+                    "size_mb": round(e["nbytes"] / (1024 * 1024), 1),
+                    "load_seconds": round(e["load_seconds"], 3),
+                    "loaded_at": e["loaded_at"],
+                    "last_used": e["last_used"],
+                }
+                for (name, version), e in self._loaded.items()
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            used = sum(e["nbytes"] for e in self._loaded.values())
+        return {
+            "budget_mb": self.budget / (1024 * 1024) if self.budget else None,
+            "used_mb": round(used / (1024 * 1024), 1),
+            "models": self.loaded(),
+        }
+
+    def _evict_over_budget(self, keep):
+        # Appelé sous self._lock : libère les moins récemment utilisés
+        if not self.budget:
+            return False
+        evicted = False
+        while sum(e["nbytes"] for e in self._loaded.values()) > self.budget:
+            victim = next((k for k in self._loaded if k != keep), None)
+            if victim is None:
+                break
+            del self._loaded[victim]
+            evicted = True
+        return evicted
+
+
+REGISTRY = ModelRegistry()
@@ -0,0 +1,95 @@
+# models/segment_preprocess.py
+import os
+import time
+import cv2
+import numpy as np
+from models.flow_cache import cached_flow
+from models.metrics import METRICS
+from models.optical_flow import model_flow_provider
+
+# ========== Prétraitement d'un segment two-stream ==========
+# Sans TensorFlow : ce module est aussi importé par les processus du pool de
+# prétraitement (preprocess_pool.py).
+FRAME_SIZE = (224, 224)
+MAX_FRAMES = 30
+
+# Fournisseur de flux optique du modèle two-stream
+# (FLOW_PROVIDER_TWO_STREAM ou FLOW_PROVIDER)
+FLOW = model_flow_provider("two_stream")
+
+# Filtre d'énergie de mouvement : un segment dont les vignettes en niveaux de
+# gris varient moins que le seuil (écart absolu moyen entre frames
+# consécutives, dans [0, 1]) est déclaré non violent sans flux ni modèle.
+# Désactivé par défaut (0) : une bagarre qui n'occupe qu'une petite partie
+# d'un plan large peut rester sous un seuil fixe. À régler sur des vidéos
+# réelles avec tools/tune_motion_gate.py (aucun positif perdu).
+MOTION_THRESHOLD = float(os.getenv("MOTION_GATE_THRESHOLD", "0"))
+THUMB_SIZE = (32, 32)
+
+
+def resize_frame(frame):
+    # Frame BGR uint8 réduite : RGB et niveaux de gris en sont tirés ensuite
+    return cv2.resize(frame, FRAME_SIZE)
+
+
+def motion_energy(frames):
+    """Écart absolu moyen entre vignettes consécutives d'un segment (frames
+    BGR uint8 réduites, None si absente), dans [0, 1]. inf s'il y a moins de
+    deux frames : le segment n'est alors pas filtré."""
+    prev, total, pairs = None, 0.0, 0
+    for bgr in frames:
+        if bgr is None:
+            continue
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        if prev is not None:
+            total += cv2.absdiff(thumb, prev).mean()
+            pairs += 1
+        prev = thumb
+    return total / pairs / 255.0 if pairs else float("inf")
+
+
+def is_static(energy, threshold=None):
+    threshold = MOTION_THRESHOLD if threshold is None else threshold
+    return threshold > 0 and energy < threshold
+
+
+def segment_tensors(frames, rgb_out=None, flow_out=None, stream_id=None, idxs=None,
+                    provider=None):
+    """RGB uint8 + flux optique d'un segment à partir de ses frames BGR
+    uint8 réduites (None si absente). Le RGB et les niveaux de gris sont
+    tirés directement de la frame BGR, sans passage en flottant.
+    Si rgb_out/flow_out sont fournis, les tenseurs y sont écrits en place.
+    Avec `stream_id` et les indices absolus `idxs` des frames, le flux de
+    chaque paire passe par le cache (fenêtres qui se recouvrent).
+    `provider` remplace le fournisseur de flux configuré (FLOW)."""
+    provider = provider or FLOW
+    if rgb_out is None:
+        rgb_out = np.empty((MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 3), np.uint8)
+    if flow_out is None:
+        flow_out = np.empty((MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 2), np.float32)
+
+    prev_gray = None
+    flow_seconds = 0.0
+    for i, bgr in enumerate(frames):
+        if bgr is None:
+            rgb_out[i] = 0
+            gray = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0]), np.uint8)
+        else:
+            cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb_out[i])
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+        if prev_gray is None:
+            flow_out[i] = 0.0
+        else:
+            t0 = time.perf_counter()
+            flow_out[i] = cached_flow(
+                stream_id, idxs[i - 1] if idxs is not None else i - 1,
+                idxs[i] if idxs is not None else i, FRAME_SIZE, provider.key,
+                lambda: provider(prev_gray, gray)
+            )
+            flow_seconds += time.perf_counter() - t0
+        prev_gray = gray
+    METRICS.observe("flow", flow_seconds)
+
+    return rgb_out, flow_out
@@ -0,0 +1,127 @@
+# models/temporal_search.py
+import os
+
+# ========== Recherche temporelle grossière puis fine ==========
+# Passe grossière : fenêtres de WINDOW secondes au pas COARSE_STRIDE sur
+# toute la vidéo. Autour des fenêtres dont le score dépasse REFINE_THRESHOLD,
+# passe fine : fenêtres qui se recouvrent au pas FINE_STRIDE, débordant sur
+# les voisines pour rattraper les événements à cheval sur une frontière.
+# Les fenêtres positives sont ensuite regroupées façon NMS en intervalles
+# propres, qui alimentent la vidéo annotée. Le coût ne dépend plus que de la
+# durée totale au pas grossier et de la durée des zones suspectes au pas fin.
+# Sans dépendance au modèle : le score d'une liste de fenêtres est fourni par
+# l'appelant (two_stream_inference._score_segments).
+WINDOW = float(os.getenv("TEMPORAL_WINDOW", "5.0"))
+COARSE_STRIDE = float(os.getenv("TEMPORAL_COARSE_STRIDE", "5.0"))
+FINE_STRIDE = float(os.getenv("TEMPORAL_FINE_STRIDE", "1.0"))
+REFINE_THRESHOLD = float(os.getenv("TEMPORAL_REFINE_THRESHOLD", "0.3"))
+NMS_IOU = float(os.getenv("TEMPORAL_NMS_IOU", "0.2"))  # recouvrement minimal pour fusionner
+SEARCH_ENABLED = os.getenv("TEMPORAL_SEARCH", "1") == "1"
+
+
+def signature() -> str:
+    """Paramètres qui changent le résultat (clé du cache de résultats)."""
+    return f"{int(SEARCH_ENABLED)}:{WINDOW}:{COARSE_STRIDE}:{FINE_STRIDE}:{REFINE_THRESHOLD}:{NMS_IOU}"
+
+
+def _key(s, e):
+    # Fenêtres identiques à la milliseconde près
+    return round(s, 3), round(e, 3)
+
+
+def sliding_windows(start, end, window, stride):
+    """Fenêtres [s, s + window] au pas `stride` couvrant [start, end] ; la
+    dernière est tronquée à `end`."""
+    windows, s = [], start
+    while s < end:
+        windows.append((s, min(s + window, end)))
+        if s + window >= end:
+            break
+        s += stride
+    return windows
+
+
+def coarse_windows(duration):
+    return sliding_windows(0.0, duration, WINDOW, COARSE_STRIDE)
+
+
+def fine_windows(hot, duration, scored=()):
+    """Fenêtres fines recouvrant chaque fenêtre suspecte de `hot` (et
+    débordant d'une fenêtre de chaque côté), triées, sans doublon ni
+    fenêtre déjà évaluée."""
+    seen = {_key(s, e) for s, e in scored}
+    windows = {}
+    for s, e in hot:
+        lo = max(s - WINDOW + FINE_STRIDE, 0.0)
+        hi = min(e + WINDOW - FINE_STRIDE, duration)
+        for w in sliding_windows(lo, hi, WINDOW, FINE_STRIDE):
+            k = _key(*w)
+            if k not in seen:
+                windows[k] = w
+    return [windows[k] for k in sorted(windows)]
+
+
+def exhaustive_windows(duration):
+    """Balayage fin complet, référence de coût."""
+    return len(sliding_windows(0.0, duration, WINDOW, FINE_STRIDE))
+
+
+def _iou(a, b):
+    inter = max(0.0, min(a[1], b[1]) - max(a[0], b[0]))
+    union = max(a[1], b[1]) - min(a[0], b[0])
+    return inter / union if union > 0 else 0.0
+
+
+def merge_windows(windows, threshold, iou=NMS_IOU):
+    """Regroupement façon NMS des fenêtres positives ((s, e), score) : la
+    meilleure fenêtre restante absorbe celles qui la recouvrent d'au moins
+    `iou` ; l'intervalle retenu est leur union, avec le score de la
+    meilleure. Les intervalles qui se chevauchent encore sont ensuite réunis.
+    Renvoie [(s, e, score)] trié par début."""
+    positives = sorted(
+        ((w, p) for w, p in windows if p > threshold), key=lambda wp: wp[1], reverse=True
+    )
+    clusters = []
+    while positives:
+        (best, score), rest = positives[0], positives[1:]
+        members = [best] + [w for w, _ in rest if _iou(best, w) >= iou]
+        positives = [(w, p) for w, p in rest if _iou(best, w) < iou]
+        clusters.append((min(w[0] for w in members), max(w[1] for w in members), score))
+
+    merged = []
+    for s, e, score in sorted(clusters):
+        if merged and s <= merged[-1][1]:
+            ps, pe, pscore = merged[-1]
+            merged[-1] = (ps, max(pe, e), max(pscore, score))
+        else:
+            merged.append((s, e, score))
+    return merged
+
+
+def search(duration, score, threshold):
+    """Recherche complète. `score(fenêtres)` renvoie (probabilités, nombre
+    d'appels au modèle) pour une liste de fenêtres (s, e) triées ; une
+    fenêtre est positive au-delà de `threshold`.
+    Renvoie (fenêtres grossières et leurs scores, intervalles fusionnés, stats)."""
+    coarse = coarse_windows(duration)
+    coarse_probs, calls = score(coarse)
+    hot = [w for w, p in zip(coarse, coarse_probs) if p > REFINE_THRESHOLD]
+    fine = fine_windows(hot, duration, scored=coarse)
+    fine_probs, fine_calls = score(fine) if fine else ([], 0)
+    calls += fine_calls
+
+    scored = list(zip(coarse, coarse_probs)) + list(zip(fine, fine_probs))
+    detections = merge_windows(scored, threshold)
+
+    hours = duration / 3600.0
+    exhaustive = exhaustive_windows(duration)
+    stats = {
+        "coarse_windows": len(coarse),
+        "refined_regions": len(hot),
+        "fine_windows": len(fine),
+        "model_calls": calls,
+        "exhaustive_calls": exhaustive,
+        "model_calls_per_hour": calls / hours if hours > 0 else 0.0,
+        "exhaustive_calls_per_hour": exhaustive / hours if hours > 0 else 0.0,
+    }
+    return list(zip(coarse, coarse_probs)), detections, stats
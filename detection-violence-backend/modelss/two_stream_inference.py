@@ -1,15 +1,40 @@
 #models/two_stream_inference.py
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
 import cv2
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 from tensorflow.keras.metrics import Precision, Recall
+from models.frame_sampler import iter_segments_from, probe_video, sample_frames_from_capture
+from models.fast_inference import CompiledModel, clip_spec
+from models.flow_cache import video_stream_id
+from models.segment_preprocess import (
+    FLOW, FRAME_SIZE, MAX_FRAMES, MOTION_THRESHOLD, is_static, motion_energy,
+    resize_frame as _resize, segment_tensors as _segment_tensors,
+)
+from models.metrics import METRICS
+from models.onnx_backend import load_served_model
+from models.preprocess_pool import get_preprocess_pool, retire_preprocess_pool
+from models.registry import REGISTRY
+from models import temporal_search
 
 # ========== Constantes ==========
-FRAME_SIZE   = (224, 224)
-MAX_FRAMES   = 30
+# FRAME_SIZE, MAX_FRAMES, le fournisseur de flux FLOW et le seuil du filtre
+# de mouvement MOTION_THRESHOLD : segment_preprocess.py
 THRESHOLD    = 0.467
+SEGMENT_BATCH = 16  # segments empilés par appel au modèle
+# Localisation de la boîte dans la vidéo annotée :
+#   "full"       : Farneback pleine résolution (historique, avec BOX_EVERY = 1)
+#   "pyramid"    : Farneback sur un niveau réduit de la pyramide en niveaux de gris
+#   "model_flow" : réutilise le flux 224x224 déjà calculé pour le modèle
+LOCALIZATION_MODE = "pyramid"
+BOX_EVERY    = 5   # recalcul de la boîte toutes les K frames, interpolation entre
+PYR_LEVELS   = 2   # nombre de cv2.pyrDown en mode "pyramid"
+MAX_PENDING  = 32  # frames gardées en attente de la boîte suivante
 MODEL_FILE   = os.path.join(os.path.dirname(__file__), "two_stream_i3d_model.keras")
 ANNOTATED_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), os.pardir, "annotated_videos")
@@ -19,11 +44,28 @@ ANNOTATED_DIR = os.path.abspath(
 tf.keras.mixed_precision.set_global_policy('float32')
 tf.keras.config.enable_unsafe_deserialization()
 
-# ========== Chargement du modèle ==========
-_MODEL = load_model(
-    MODEL_FILE,
-    custom_objects={"Precision": Precision, "Recall": Recall}
-)
+# ========== Chargement du modèle (au premier usage, via le registre) ==========
+MODEL_NAME = "two_stream"
+# RGB en uint8 (mise à l'échelle [0, 1] dans la passe avant compilée), flux en float32
+INPUT_SIGNATURE = [
+    clip_spec(3, MAX_FRAMES, FRAME_SIZE, tf.uint8),
+    clip_spec(2, MAX_FRAMES, FRAME_SIZE),
+]
+
+def _load_keras():
+    return load_model(
+        MODEL_FILE,
+        custom_objects={"Precision": Precision, "Recall": Recall}
+    )
+
+def _load_two_stream():
+    # Graphe ONNX si INFERENCE_BACKEND(_TWO_STREAM) le demande, sinon Keras compilé
+    served = load_served_model(MODEL_FILE, MODEL_NAME)
+    if served is not None:
+        return served
+    return CompiledModel(_load_keras(), INPUT_SIGNATURE)
+
+REGISTRY.register(MODEL_NAME, _load_two_stream)
 
 # ========== Utilitaires ==========
 def _get_intervals(duration, full_video):
@@ -37,48 +79,305 @@ def _get_intervals(duration, full_video):
     return intervals
 
 
+def _segment_indices(s, e, fps, total):
+    sf, ef = int(s * fps), min(int(e * fps), total - 1)
+    return np.linspace(sf, ef, num=MAX_FRAMES, dtype=int)
+
+
+def _prob(out):
+    return float(out[1] if len(out) > 1 else out[0])
+
+
+# Statistique du filtre de mouvement, depuis le démarrage
+_gate_stats = {"segments": 0, "skipped": 0}
+_gate_lock = threading.Lock()
+
+def _record_gate(segments, skipped):
+    with _gate_lock:
+        _gate_stats["segments"] += segments
+        _gate_stats["skipped"] += skipped
+    METRICS.inc("segments_gated", segments)
+    METRICS.inc("segments_skipped", skipped)
+
+
+def motion_gate_stats() -> dict:
+    """Segments examinés par le filtre de mouvement, segments ignorés et taux."""
+    with _gate_lock:
+        segments, skipped = _gate_stats["segments"], _gate_stats["skipped"]
+    return {
+        "threshold": MOTION_THRESHOLD,
+        "segments": segments,
+        "skipped": skipped,
+        "skip_rate": skipped / segments if segments else 0.0,
+    }
+
+
+def predict_clip(frames, stream_id=None, idxs=None) -> float:
+    """Probabilité pour MAX_FRAMES frames BGR uint8 224x224 déjà échantillonnées
+    (flux optique calculé ici, mis en cache si `stream_id` et `idxs` sont donnés)."""
+    rgb, flow = _segment_tensors(frames, stream_id=stream_id, idxs=idxs)
+    return predict_tensors(rgb, flow)
+
+
+def predict_tensors(rgb, flow) -> float:
+    """Probabilité pour un segment déjà prétraité (RGB uint8, flux float32)."""
+    predict = REGISTRY.get(MODEL_NAME)
+    with METRICS.timer("inference"):
+        out = predict(rgb[None], flow[None])
+    return _prob(out[0])
+
+
 def _preprocess_segment(path, s, e):
     cap = cv2.VideoCapture(path)
     fps = cap.get(cv2.CAP_PROP_FPS) or 0
     total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    sf, ef = int(s * fps), min(int(e * fps), total - 1)
-    idxs = np.linspace(sf, ef, num=MAX_FRAMES, dtype=int)
+    idxs = _segment_indices(s, e, fps, total)
+    frames = sample_frames_from_capture(cap, idxs, _resize)
+    cap.release()
+    return _segment_tensors(frames, idxs=idxs)
 
-    rgbs, flows = [], []
-    prev_gray = None
-    for idx in idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if not ret:
-            rgb = np.zeros((*FRAME_SIZE, 3), np.float32)
-            gray = np.zeros(FRAME_SIZE, np.uint8)
-        else:
-            rgb = cv2.resize(frame, FRAME_SIZE)
-            rgb = cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB) / 255.0
-            gray = cv2.cvtColor((rgb * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
-        rgbs.append(rgb.astype(np.float32))
 
-        if prev_gray is None:
-            flows.append(np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 2), np.float32))
-        else:
-            fl = cv2.calcOpticalFlowFarneback(
-                prev_gray, gray, None,
-                pyr_scale=0.5, levels=3, winsize=15,
-                iterations=3, poly_n=5, poly_sigma=1.2, flags=0
-            )
-            flows.append(fl.astype(np.float32))
-        prev_gray = gray
+def _iter_segment_frames(path, index_lists):
+    """Un seul décodage séquentiel pour des intervalles contigus ; seek exact
+    par-dessus les longs écarts (fenêtres fines de la recherche temporelle)."""
+    yield from iter_segments_from(path, index_lists, _resize)
 
-    cap.release()
-    return np.stack(rgbs), np.stack(flows)
+
+def _score_segments(path, intervals, fps, total, flow_maps=None, progress=None, gate=None,
+                    cache_flow=False):
+    """Probabilité de violence pour chaque intervalle : les segments sont
+    empilés en lots (N, 30, 224, 224, C) et passés au modèle en un appel
+    par lot de SEGMENT_BATCH. Si flow_maps est un dict, le flux des segments
+    violents y est conservé ({index de frame: flux 224x224}). `progress`
+    est appelé avec (segments traités, total) après chaque lot.
+    Si `gate` est un dict, les segments statiques (énergie de mouvement sous
+    MOTION_THRESHOLD) ne passent ni par le flux ni par le modèle : leur
+    probabilité vaut 0 et gate[index du segment] reçoit leur énergie.
+    Si PREPROCESS_WORKERS > 0, les lots sont préparés par le pool de
+    processus (preprocess_pool.py) et lus en mémoire partagée.
+    `cache_flow` : flux des paires de frames gardé dans FLOW_CACHE, seulement
+    quand des fenêtres se recouvrent (passe fine de la recherche temporelle)."""
+    probs = [0.0] * len(intervals)
+    done = 0
+    if progress is not None:
+        progress(0, len(intervals))
+    index_lists = [_segment_indices(s, e, fps, total) for s, e in intervals]
+    predict = REGISTRY.get(MODEL_NAME)
+    motion_threshold = MOTION_THRESHOLD if gate is not None else 0.0
+
+    def _skip(k, energy):
+        gate[k] = energy
+
+    def _flush(rgb_batch, flow_batch, segs):
+        # segs : index du segment de chaque ligne du lot, None si ignorée
+        nonlocal done
+        rows = [r for r, k in enumerate(segs) if k is not None]
+        if rows:
+            if rows[-1] == len(rows) - 1:
+                rgb, flow = rgb_batch[:len(rows)], flow_batch[:len(rows)]
+            else:
+                rgb, flow = rgb_batch[rows], flow_batch[rows]
+            with METRICS.timer("inference"):
+                out = predict(rgb, flow)
+            for o, r in zip(out, rows):
+                prob = _prob(o)
+                if flow_maps is not None and prob > THRESHOLD:
+                    for idx, fl in zip(index_lists[segs[r]], flow_batch[r]):
+                        flow_maps[int(idx)] = fl.copy()
+                probs[segs[r]] = prob
+        done += len(segs)
+        if progress is not None:
+            progress(done, len(intervals))
+
+    pool = get_preprocess_pool(SEGMENT_BATCH)
+    if pool is not None:
+        try:
+            _score_pooled(pool, path, index_lists, _flush, motion_threshold, _skip)
+        except BrokenProcessPool:
+            # Worker mort : le pool est recréé pour les requêtes suivantes et
+            # cette requête repart de zéro dans le processus
+            retire_preprocess_pool(pool)
+            pool = None
+            probs[:] = [0.0] * len(intervals)
+            done = 0
+            if gate is not None:
+                gate.clear()
+    if pool is None:
+        n = min(len(intervals), SEGMENT_BATCH)
+        rgb_batch = np.empty((n, MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 3), np.uint8)
+        flow_batch = np.empty((n, MAX_FRAMES, FRAME_SIZE[1], FRAME_SIZE[0], 2), np.float32)
+        stream_id = video_stream_id(path) if cache_flow else None
+
+        segs = []
+        for k, frames in enumerate(_iter_segment_frames(path, index_lists)):
+            if motion_threshold > 0:
+                energy = motion_energy(frames)
+                if is_static(energy, motion_threshold):
+                    _skip(k, energy)
+                    done += 1
+                    continue
+            row = len(segs)
+            _segment_tensors(frames, rgb_batch[row], flow_batch[row], stream_id, index_lists[k])
+            segs.append(k)
+            if len(segs) == n:
+                _flush(rgb_batch, flow_batch, segs)
+                segs = []
+        if segs:
+            _flush(rgb_batch, flow_batch, segs)
+        elif progress is not None and done:
+            progress(done, len(intervals))
+
+    if gate is not None:
+        _record_gate(len(intervals), len(gate))
+    return probs
+
+
+def _score_pooled(pool, path, index_lists, flush, motion_threshold=0.0, on_skip=None):
+    """Lots remplis par les workers du pool, un bloc de mémoire partagée par
+    lot. Tant que des blocs sont libres, les lots suivants sont lancés avant
+    l'inférence du lot courant. Avec motion_threshold > 0, les workers
+    écartent les segments statiques : `on_skip(index, énergie)` est appelé
+    et la ligne est passée à `flush` comme None."""
+    chunks = [index_lists[i:i + pool.rows] for i in range(0, len(index_lists), pool.rows)]
+    pending = deque()  # (index du premier segment, bloc, futures)
+    next_chunk = 0
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks):
+                block = pool.acquire(block=not pending)
+                if block is None:
+                    break
+                chunk = chunks[next_chunk]
+                futures = [
+                    pool.fill(block, row, path, idxs, FLOW, motion_threshold)
+                    for row, idxs in enumerate(chunk)
+                ]
+                pending.append((next_chunk * pool.rows, block, futures))
+                next_chunk += 1
+
+            start, block, futures = pending.popleft()
+            try:
+                segs = []
+                for row, fut in enumerate(futures):
+                    timings = fut.result()
+                    METRICS.observe("decode", timings["decode"])
+                    if timings["skipped"]:
+                        if on_skip is not None:
+                            on_skip(start + row, timings["motion"])
+                        segs.append(None)
+                    else:
+                        METRICS.observe("flow", timings["flow"])
+                        segs.append(start + row)
+                rgb_batch, flow_batch = pool.views(block)
+                flush(rgb_batch, flow_batch, segs)
+            finally:
+                for fut in futures:
+                    fut.exception()  # aucun worker n'écrit encore dans le bloc
+                pool.release(block)
+    finally:
+        # Arrêt anticipé (erreur, annulation) : les workers finissent d'écrire
+        # avant que leurs blocs soient rendus
+        for _, block, futures in pending:
+            for fut in futures:
+                fut.exception()
+            pool.release(block)
+
+
+def iter_stream_segments(cap, fps, seg=5.0):
+    """Segments de `seg` secondes d'une capture lue progressivement (durée
+    inconnue : tube, flux en cours d'envoi). Chaque segment est renvoyé,
+    avec les mêmes indices que _segment_indices, dès que sa dernière frame
+    est arrivée : ((s, e), indices, frames BGR uint8 réduites)."""
+    buf = {}  # index -> frame BGR redimensionnée, depuis le début du segment
+    k, idx = 0, 0
+    while cap.grab():
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        buf[idx] = cv2.resize(frame, FRAME_SIZE)
+        ef = int((k + 1) * seg * fps)
+        if idx == ef:
+            idxs = np.linspace(int(k * seg * fps), ef, num=MAX_FRAMES, dtype=int)
+            frames = [buf[i] for i in idxs]
+            yield (k * seg, (k + 1) * seg), idxs, frames
+            buf = {i: f for i, f in buf.items() if i >= ef}
+            k += 1
+        idx += 1
+
+    # Dernier segment, incomplet
+    duration = idx / fps if fps > 0 else 0
+    if idx > 0 and k * seg < duration:
+        idxs = _segment_indices(k * seg, duration, fps, idx)
+        frames = [buf.get(i) for i in idxs]
+        yield (k * seg, duration), idxs, frames
 
 
 # ========== Génération de la vidéo annotée ==========
-def generate_annotated_video(video_path, intervals_violent):
+def _locate_motion(flow, w, h):
+    """Centre de la plus grande zone en mouvement, en coordonnées source.
+    `flow` peut être calculé à une résolution réduite : seuils, contour et
+    centroïde sont remis à l'échelle de la vidéo (w, h)."""
+    fh, fw = flow.shape[:2]
+    sx, sy = fw / w, fh / h
+
+    mag = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
+    thr = max(np.mean(mag) + 1.75 * np.std(mag), 2.5 * np.sqrt(sx * sy))
+    mask = (mag > thr).astype(np.uint8)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    largest = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(largest) <= 800 * sx * sy:
+        return None
+    M = cv2.moments(largest)
+    if M["m00"] == 0:
+        return None
+    return M["m10"] / M["m00"] / sx, M["m01"] / M["m00"] / sy
+
+
+def _frame_flow(prev, curr, mode):
+    prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+    curr_gray = cv2.cvtColor(curr, cv2.COLOR_BGR2GRAY)
+    if mode == "pyramid":
+        for _ in range(PYR_LEVELS):
+            prev_gray = cv2.pyrDown(prev_gray)
+            curr_gray = cv2.pyrDown(curr_gray)
+    return cv2.calcOpticalFlowFarneback(
+        prev_gray, curr_gray, None,
+        pyr_scale=0.5, levels=3, winsize=13,
+        iterations=3, poly_n=5, poly_sigma=1.2, flags=0
+    )
+
+
+def _draw_box(frame, center, w, h):
+    cx, cy = int(center[0]), int(center[1])
+    size = int(min(w, h) * 0.15)
+    x1 = max(cx - size, 0)
+    y1 = max(cy - size, 0)
+    x2 = min(cx + size, w)
+    y2 = min(cy + size, h)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
+
+
+def generate_annotated_video(video_path, intervals_violent, mode=None, box_every=None,
+                             flow_maps=None, stats=None):
+    """Écrit la vidéo annotée. La boîte n'est recalculée que sur des frames
+    clés (toutes les `box_every` frames, ou les frames de `flow_maps` en mode
+    "model_flow") puis interpolée entre deux frames clés. mode="full" avec
+    box_every=1 reproduit le comportement historique. Si `stats` est un dict,
+    il reçoit le nombre de frames, la durée et les frames par seconde."""
+    mode = mode or LOCALIZATION_MODE
+    box_every = max(int(box_every or BOX_EVERY), 1)
+    flow_maps = flow_maps or {}
+    if mode == "model_flow" and not flow_maps:
+        mode = "pyramid"
+
     os.makedirs(ANNOTATED_DIR, exist_ok=True)
     base = os.path.splitext(os.path.basename(video_path))[0]
     out_path = os.path.join(ANNOTATED_DIR, f"{base}_annotated.mp4")
 
+    t0 = time.perf_counter()
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS) or 25
     w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -93,87 +392,242 @@ def generate_annotated_video(video_path, intervals_violent):
         out.release()
         return out_path
 
+    written, boxes = 0, 0
+    pending = []     # frames violentes en attente de la frame clé suivante
+    last_key = None  # (index, centre) de la dernière frame clé
+
+    def _flush(next_key):
+        nonlocal written
+        for i, frm in pending:
+            center = None
+            if last_key is not None and last_key[1] is not None:
+                center = last_key[1]
+                if next_key is not None and next_key[1] is not None:
+                    a = (i - last_key[0]) / (next_key[0] - last_key[0])
+                    center = (
+                        center[0] + a * (next_key[1][0] - center[0]),
+                        center[1] + a * (next_key[1][1] - center[1]),
+                    )
+            if center is not None:
+                frm = frm.copy()
+                _draw_box(frm, center, w, h)
+            out.write(frm)
+            written += 1
+        pending.clear()
+
     idx = 1
     # Boucle de traitement
     while True:
         ret, curr = cap.read()
         if not ret:
+            _flush(None)
             # écrire la dernière frame s'il y en a
             out.write(prev)
+            written += 1
             break
 
         t = idx / fps
-        frame_to_write = curr.copy()
-
-        # Si intervalle violent, on dessine le rectangle
+        # Si intervalle violent, on localise la zone en mouvement
         if any(s <= t <= e for (s, e) in intervals_violent):
-            prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
-            curr_gray = cv2.cvtColor(curr, cv2.COLOR_BGR2GRAY)
-
-            flow = cv2.calcOpticalFlowFarneback(
-                prev_gray, curr_gray, None,
-                pyr_scale=0.5, levels=3, winsize=13,
-                iterations=3, poly_n=5, poly_sigma=1.2, flags=0
-            )
-
-            mag = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
-            thr = max(np.mean(mag) + 1.75 * np.std(mag), 2.5)
-            mask = (mag > thr).astype(np.uint8)
-
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            if contours:
-                largest = max(contours, key=cv2.contourArea)
-                if cv2.contourArea(largest) > 800:
-                    M = cv2.moments(largest)
-                    if M["m00"] != 0:
-                        cx = int(M["m10"] / M["m00"])
-                        cy = int(M["m01"] / M["m00"])
-                        size = int(min(w, h) * 0.15)
-                        x1 = max(cx - size, 0)
-                        y1 = max(cy - size, 0)
-                        x2 = min(cx + size, w)
-                        y2 = min(cy + size, h)
-                        cv2.rectangle(frame_to_write, (x1, y1), (x2, y2), (0, 0, 255), 3)
-
-        out.write(frame_to_write)
-        prev = curr.copy()
+            if mode == "model_flow":
+                is_key = idx in flow_maps
+            else:
+                is_key = idx % box_every == 0 or last_key is None
+            if is_key:
+                if mode == "model_flow":
+                    center = _locate_motion(flow_maps[idx], w, h)
+                else:
+                    center = _locate_motion(_frame_flow(prev, curr, mode), w, h)
+                boxes += 1
+                key = (idx, center)
+                _flush(key)
+                last_key = key
+                frame_to_write = curr
+                if center is not None:
+                    frame_to_write = curr.copy()
+                    _draw_box(frame_to_write, center, w, h)
+                out.write(frame_to_write)
+                written += 1
+            else:
+                pending.append((idx, curr))
+                if len(pending) >= MAX_PENDING:
+                    _flush(None)
+        else:
+            _flush(None)
+            last_key = None
+            out.write(curr)
+            written += 1
+
+        prev = curr
         idx += 1
 
     cap.release()
     out.release()
+
+    if stats is not None:
+        elapsed = time.perf_counter() - t0
+        stats.update({
+            "mode": mode,
+            "frames": written,
+            "boxes_computed": boxes,
+            "seconds": elapsed,
+            "fps": written / elapsed if elapsed > 0 else 0.0,
+        })
     return out_path
 
 
 # ========== Fonction principale ==========
-def predict_two_stream(video_path: str, full_video: bool = True) -> dict:
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS) or 0
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+def predict_two_stream(video_path: str, full_video: bool = True, meta=None, progress=None) -> dict:
+    # meta = (fps, nombre de frames) si l'appelant a déjà sondé la vidéo
+    fps, total = meta if meta is not None else probe_video(video_path)
     duration = total / fps if fps > 0 else 0
-    cap.release()
+
+    flow_maps = {} if LOCALIZATION_MODE == "model_flow" else None
+    if not full_video and temporal_search.SEARCH_ENABLED:
+        return _predict_search(video_path, duration, fps, total, flow_maps, progress)
 
     intervals = _get_intervals(duration, full_video)
-    preds, probs = [], []
-
-    for s, e in intervals:
-        rgb, flow = _preprocess_segment(video_path, s, e)
-        inp_rgb = rgb[None].astype(np.float32)
-        inp_flow = flow[None].astype(np.float32)
-        out = _MODEL.predict([inp_rgb, inp_flow], verbose=0)[0]
-        prob = float(out[1] if len(out) > 1 else out[0])
-        state = "Violence détectée" if prob > THRESHOLD else "Aucune violence détectée"
-        preds.append(f"[{s:.1f}s, {e:.1f}s] score : {prob:.3f} Etat : {state}")
-        probs.append(prob)
+    gate = {}  # segments statiques -> énergie de mouvement
+    probs = _score_segments(video_path, intervals, fps, total, flow_maps, progress, gate)
+    preds = []
 
+    for k, (prob, (s, e)) in enumerate(zip(probs, intervals)):
+        preds.append(_format_skipped(s, e) if k in gate else _format_prediction(s, e, prob))
+
+    return _build_response(video_path, intervals, probs, preds, flow_maps, gate)
+
+
+def _predict_search(video_path, duration, fps, total, flow_maps, progress):
+    """Recherche grossière puis fine (temporal_search.py). Les prédictions
+    et la vidéo annotée suivent les intervalles fusionnés : une ligne par
+    détection, et une ligne par fenêtre grossière hors de toute détection.
+    `progress` ne suit que la passe grossière, la seule dont le nombre de
+    segments est connu d'avance."""
+    gates = []  # un dict du filtre de mouvement par passe
+
+    def _score(windows):
+        gate = {}
+        # Seules les fenêtres fines se recouvrent : cache du flux pour elles
+        probs = _score_segments(
+            video_path, windows, fps, total, flow_maps, progress if not gates else None, gate,
+            cache_flow=bool(gates),
+        )
+        gates.append(gate)
+        return probs, len(windows) - len(gate)
+
+    coarse, detections, stats = temporal_search.search(duration, _score, THRESHOLD)
+    METRICS.inc("temporal_model_calls", stats["model_calls"])
+    METRICS.inc("temporal_exhaustive_calls", stats["exhaustive_calls"])
+    gate = gates[0]
+    intervals = [w for w, _ in coarse]
+    probs = [p for _, p in coarse]
+    preds = _search_predictions(coarse, detections, gate)
+    resp = _build_response(video_path, intervals, probs, preds, flow_maps, gate, detections)
+    resp["detections"] = [
+        {"start": round(s, 2), "end": round(e, 2), "score": round(score, 4)}
+        for s, e, score in detections
+    ]
+    resp["temporal_search"] = stats
+    return resp
+
+
+def _search_predictions(coarse, detections, gate):
+    """Lignes de prédiction triées par début : chaque détection fusionnée
+    remplace les fenêtres grossières qu'elle recouvre, si bien qu'un
+    événement trouvé par la passe fine apparaît aussi dans `predictions`."""
+    lines = [(s, _format_prediction(s, e, score)) for s, e, score in detections]
+    for k, ((s, e), p) in enumerate(coarse):
+        if any(s < de and ds < e for ds, de, _ in detections):
+            continue
+        lines.append((s, _format_skipped(s, e) if k in gate else _format_prediction(s, e, p)))
+    return [line for _, line in sorted(lines, key=lambda sl: sl[0])]
+
+
+def _format_prediction(s, e, prob):
+    state = "Violence détectée" if prob > THRESHOLD else "Aucune violence détectée"
+    return f"[{s:.1f}s, {e:.1f}s] score : {prob:.3f} Etat : {state}"
+
+
+def _format_skipped(s, e):
+    return f"[{s:.1f}s, {e:.1f}s] score : 0.000 Etat : Aucune violence détectée (segment statique, non évalué)"
+
+
+def _build_response(video_path, intervals, probs, preds, flow_maps=None, gate=None,
+                    detections=None):
+    # gate : {index du segment: énergie de mouvement} des segments ignorés
+    # detections : intervalles fusionnés (s, e, score) de la recherche temporelle,
+    # qui remplacent alors les segments positifs dans la vidéo annotée
     annotated = None
-    if any(p > THRESHOLD for p in probs):
+    if detections is not None:
+        iv = [(s, e) for s, e, _ in detections]
+    else:
         iv = [(s, e) for (p, (s, e)) in zip(probs, intervals) if p > THRESHOLD]
-        annotated = generate_annotated_video(video_path, iv)
+    if iv:
+        with METRICS.timer("annotate"):
+            annotated = generate_annotated_video(video_path, iv, flow_maps=flow_maps)
 
-    return {
+    resp = {
         "filename": os.path.basename(video_path),
         "predictions": preds,
+        "flow_provider": FLOW.name,
         "annotated_video_path": (
             f"/annotated/{os.path.basename(annotated)}" if annotated else None
         )
-    }
\ No newline at end of file
+    }
+    if gate is not None:
+        resp["motion_gate"] = {
+            "threshold": MOTION_THRESHOLD,
+            "segments": len(intervals),
+            "skipped": len(gate),
+            "skip_rate": len(gate) / len(intervals) if intervals else 0.0,
+        }
+        resp["skipped_segments"] = [
+            {"start": intervals[k][0], "end": intervals[k][1], "motion_energy": float(gate[k])}
+            for k in sorted(gate)
+        ]
+    return resp
+
+
+def predict_two_stream_progressive(source: str, video_path: str, fps: float = 0.0,
+                                   on_segment=None) -> dict:
+    """Analyse d'un flux lu au fil de l'eau (`source` : tube alimenté par
+    l'envoi en cours) : chaque segment de 5 s est évalué dès que ses frames
+    sont arrivées et `on_segment(prédiction, prob, (s, e))` est appelé
+    aussitôt. `video_path` est le fichier complet, utilisé une fois le flux
+    terminé pour la vidéo annotée. Les segments sont toujours de 5 s, même
+    pour une vidéo courte, puisque la durée n'est connue qu'à la fin."""
+    cap = cv2.VideoCapture(source)
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 25
+    predict = REGISTRY.get(MODEL_NAME)
+    flow_maps = {} if LOCALIZATION_MODE == "model_flow" else None
+
+    intervals, probs, preds = [], [], []
+    gate = {}
+    try:
+        for (s, e), idxs, frames in iter_stream_segments(cap, fps):
+            energy = motion_energy(frames) if MOTION_THRESHOLD > 0 else float("inf")
+            if is_static(energy):
+                gate[len(intervals)] = energy
+                intervals.append((s, e))
+                probs.append(0.0)
+                preds.append(_format_skipped(s, e))
+                if on_segment is not None:
+                    on_segment(preds[-1], 0.0, (s, e))
+                continue
+            rgb, flow = _segment_tensors(frames)
+            with METRICS.timer("inference"):
+                out = predict(rgb[None], flow[None])
+            prob = _prob(out[0])
+            if flow_maps is not None and prob > THRESHOLD:
+                for idx, fl in zip(idxs, flow):
+                    flow_maps[int(idx)] = fl
+            intervals.append((s, e))
+            probs.append(prob)
+            preds.append(_format_prediction(s, e, prob))
+            if on_segment is not None:
+                on_segment(preds[-1], prob, (s, e))
+    finally:
+        cap.release()
+
+    _record_gate(len(intervals), len(gate))
+    return _build_response(video_path, intervals, probs, preds, flow_maps, gate)
\ No newline at end of file
@@ -3,6 +3,9 @@ import cv2
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import Model
+from models.frame_sampler import sample_frames_from_capture
+from models.flow_cache import cached_flow, video_stream_id
+from models.optical_flow import get_flow_provider
 
 def preprocess_video_dynamic(video_path, target_size=(224, 224), max_frames=30):
     cap = cv2.VideoCapture(video_path)
@@ -10,19 +13,20 @@ def preprocess_video_dynamic(video_path, target_size=(224, 224), max_frames=30):
     total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     idxs = np.linspace(0, total - 1, max_frames, dtype=int)
 
-    for i in range(total):
-        ret, frame = cap.read()
-        if not ret:
+    for frame in sample_frames_from_capture(cap, np.unique(idxs)):
+        if frame is None:
             break
-        if i in idxs:
-            frame = cv2.resize(frame, target_size)
-            frame = frame / 255.0
-            frames.append(frame)
+        frame = cv2.resize(frame, target_size)
+        frame = frame / 255.0
+        frames.append(frame)
 
     cap.release()
     return np.array(frames)
 
 def preprocess_video_optical_flow(video_path, target_size=(224, 224), max_frames=30):
+    # Flux des paires (i, i+1) mis en cache par vidéo
+    stream_id = video_stream_id(video_path)
+    provider = get_flow_provider()
     cap = cv2.VideoCapture(video_path)
     frames = []
     ret, prev = cap.read()
@@ -41,8 +45,10 @@ def preprocess_video_optical_flow(video_path, target_size=(224, 224), max_frames
         frame = cv2.resize(frame, target_size)
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-        flow = cv2.calcOpticalFlowFarneback(prev_gray, gray,
-                                            None, 0.5, 3, 15, 3, 5, 1.2, 0)
+        flow = cached_flow(
+            stream_id, count, count + 1, target_size, provider.key,
+            lambda: provider(prev_gray, gray)
+        )
         frames.append(flow)
 
         prev_gray = gray
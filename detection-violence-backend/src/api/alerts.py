@@ -1,30 +1,132 @@
 # src/api/alerts.py
+# Historique des alertes, persisté en base (table alerts, app/models.py) :
+# filtres côté serveur et pagination par curseur. Les nouvelles alertes sont
+# poussées aux clients connectés (WebSocket /alerts/ws ou SSE /alerts/stream)
+# et envoyées par e-mail en récapitulatifs groupés.
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import List
+import asyncio
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-app = FastAPI()
+from app import crud, schemas
+from app.alert_hub import AlertFilter, hub
+from app.config import ALERT_KEEPALIVE, ALERTS_BULK_MAX, ALERTS_PAGE_MAX, ALERTS_PAGE_SIZE
+from app.database import SessionLocal, get_async_db
+from app.email_digest import dispatcher
 
-class Alert(BaseModel):
-    id: int
-    dateTime: str
-    cameraName: str
-    violenceType: str
-    confidenceScore: int
+router = APIRouter(tags=["alerts"])
 
 
+def _publish(db_alert):
+    # Diffusion et file d'e-mails : ni l'une ni l'autre ne bloque l'appelant
+    alert = crud.alert_to_dict(db_alert)
+    hub.publish(alert)
+    dispatcher.submit(alert)
 
 
-alerts_db: List[Alert] = []
+def record_alert(camera_name: str, violence_type: str, probability: float):
+    """Enregistre une alerte émise par le backend (ex. caméra en direct)."""
+    db = SessionLocal()
+    try:
+        db_alert = crud.create_alert(db, schemas.AlertCreate(
+            cameraName=camera_name,
+            violenceType=violence_type,
+            confidenceScore=int(round(probability * 100)),
+        ))
+        _publish(db_alert)
+        return db_alert
+    finally:
+        db.close()
 
-@app.post("/send_alert_email")
-async def send_alert_email(alert: Alert):
-    # ici tu envoies l'email (code que je t'ai donné avant)
-    # et en plus tu ajoutes dans la "base temporaire"
-    alerts_db.append(alert)
+@router.post("/send_alert_email")
+async def send_alert_email(alert: schemas.AlertCreate, db: AsyncSession = Depends(get_async_db)):
+    # L'e-mail part avec le prochain récapitulatif (app/email_digest.py)
+    _publish(await crud.create_alert_async(db, alert))
     return {"message": "Email envoyé et alerte enregistrée ✅"}
 
-@app.get("/alerts")
-async def get_alerts():
-    return alerts_db
+@router.post("/alerts/bulk", status_code=201)
+async def create_alerts_bulk(alerts: List[schemas.AlertCreate], db: AsyncSession = Depends(get_async_db)):
+    if len(alerts) > ALERTS_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"Au plus {ALERTS_BULK_MAX} alertes par envoi")
+    return {"inserted": await crud.create_alerts_bulk_async(db, alerts)}
+
+@router.get("/alerts", response_model=schemas.AlertPage)
+async def get_alerts(
+    cursor: Optional[str] = None,
+    limit: int = Query(ALERTS_PAGE_SIZE, ge=1, le=ALERTS_PAGE_MAX),
+    camera: Optional[str] = None,
+    violence_type: Optional[str] = None,
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    q: Optional[str] = None,  # préfixe du nom de caméra ou du type de violence
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        rows, next_cursor = await crud.list_alerts_async(
+            db, limit, cursor=cursor, camera=camera, violence_type=violence_type,
+            min_score=min_score, max_score=max_score, since=since, until=until, q=q,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [crud.alert_to_dict(a) for a in rows], "next_cursor": next_cursor}
+
+@router.get("/alerts/live/stats")
+def get_live_stats():
+    # Clients connectés, alertes écartées, file et connexions SMTP
+    return {"hub": hub.stats(), "email": dispatcher.stats()}
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    camera: Optional[str] = None,
+    violence_type: Optional[str] = None,
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+):
+    # Server-Sent Events : une alerte par événement, commentaire périodique
+    # pour garder la connexion ouverte et détecter la déconnexion
+    sub = hub.subscribe(AlertFilter(camera, violence_type, min_score))
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                alert = await sub.get(ALERT_KEEPALIVE)
+                if alert is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: alert\ndata: {json.dumps(alert)}\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/alerts/ws")
+async def alerts_websocket(
+    websocket: WebSocket,
+    camera: Optional[str] = None,
+    violence_type: Optional[str] = None,
+    min_score: Optional[int] = None,
+):
+    await websocket.accept()
+    sub = hub.subscribe(AlertFilter(camera, violence_type, min_score))
+
+    async def send_alerts():
+        while True:
+            await websocket.send_json(await sub.get())
+
+    # Le client n'envoie rien : la réception ne sert qu'à voir la déconnexion
+    sender = asyncio.ensure_future(send_alerts())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        hub.unsubscribe(sub)
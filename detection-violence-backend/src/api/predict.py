@@ -5,6 +5,8 @@ import pandas as pd
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 from tensorflow.keras.metrics import Precision, Recall
+from models.frame_sampler import sample_frames_from_capture
+from models.optical_flow import compute_flows, get_flow_provider
 
 def preprocess_video_dynamic(video_path, frame_size=(224, 224), max_frames=30):
     # video_path est une string ici
@@ -15,14 +17,16 @@ def preprocess_video_dynamic(video_path, frame_size=(224, 224), max_frames=30):
         return np.zeros((max_frames, frame_size[1], frame_size[0], 3), dtype=np.float32)
 
     indices = np.linspace(0, total_frames - 1, num=max_frames, dtype=int)
+
+    def _to_rgb(frame):
+        frame = cv2.resize(frame, frame_size)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return frame / 255.0
+
     frames = []
-    for idx in indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret:
-            frame = cv2.resize(frame, frame_size)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame / 255.0)
+    for frame in sample_frames_from_capture(cap, indices, _to_rgb):
+        if frame is not None:
+            frames.append(frame)
         else:
             frames.append(np.zeros((frame_size[1], frame_size[0], 3), dtype=np.float32))
     cap.release()
@@ -36,17 +40,8 @@ def preprocess_video_optical_flow(video_path, frame_size=(224, 224), max_frames=
         gray = cv2.cvtColor(frame_uint8, cv2.COLOR_RGB2GRAY)
         gray_frames.append(gray)
 
-    flow_frames = []
-    h, w = gray_frames[0].shape
-    flow_frames.append(np.zeros((h, w, 2), dtype=np.float32))  # first frame no previous
-    for i in range(1, len(gray_frames)):
-        prev_gray = gray_frames[i - 1]
-        curr_gray = gray_frames[i]
-        flow = cv2.calcOpticalFlowFarneback(prev_gray, curr_gray, None,
-                                            pyr_scale=0.5, levels=3, winsize=15,
-                                            iterations=3, poly_n=5, poly_sigma=1.2, flags=0)
-        flow_frames.append(flow)
-    return np.array(flow_frames, dtype=np.float32)
+    # first frame no previous : flux nul
+    return compute_flows(gray_frames, get_flow_provider())
 
 def tf_preprocess_video(video_path, frame_size, max_frames):
     video = tf.py_function(func=preprocess_video_dynamic,
@@ -0,0 +1,181 @@
+# tools/export_onnx.py
+# Export ONNX des trois modèles vidéo (tf2onnx), quantification INT8
+# statique optionnelle calibrée sur un dossier de clips locaux, et rapport
+# latence / mémoire / écart de probabilité par rapport à la référence Keras.
+# Les fichiers sont écrits à côté des .keras (<nom>.onnx, <nom>.int8.onnx),
+# là où le backend ONNX du registre les attend (models/onnx_backend.py).
+# Lancer depuis detection-violence-backend/ :
+#   python -m tools.export_onnx --models all --clips /chemin/clips --int8 --report
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from models import cnn_lstm_inference, i3d_inference
+from models import two_stream_inference as ts
+from models.fast_inference import CompiledModel
+from models.frame_sampler import probe_video, sample_frames
+from models.onnx_backend import OnnxModel, onnx_path, to_float_input
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+
+# nom -> (module, fichier .keras, canaux de chaque entrée)
+MODELS = {
+    "two_stream": (ts, ts.MODEL_FILE, (3, 2)),
+    "i3d": (i3d_inference, i3d_inference.MODEL_I3D_PATH, (3,)),
+    "cnn_lstm": (cnn_lstm_inference, cnn_lstm_inference.MODEL_PATH, (3,)),
+}
+
+
+def clip_inputs(name, path):
+    """Entrées du modèle `name` (lot de 1) pour un clip, avec le même
+    prétraitement que l'inférence (RGB en uint8)."""
+    if name == "two_stream":
+        fps, total = probe_video(path)
+        duration = total / fps if fps > 0 else 0.0
+        idxs = ts._segment_indices(0.0, min(5.0, duration), fps, total)
+        rgb, flow = ts._segment_tensors(sample_frames(path, idxs, ts._resize))
+        return [rgb[None], flow[None]]
+    if name == "i3d":
+        return [i3d_inference.load_clip(path)[None]]
+    return [cnn_lstm_inference.load_clip(path)[None]]
+
+
+def _prob(out):
+    o = np.asarray(out)[0]
+    return float(o[1] if len(o) > 1 else o[0])
+
+
+def _rss_mb():
+    # Mémoire résidente courante (Linux), sinon pic du processus
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def export(name, opset):
+    import tf2onnx
+    module, keras_path, channels = MODELS[name]
+    model = module._load_keras()
+    signature = [
+        tf.TensorSpec((None, module.MAX_FRAMES, module.FRAME_SIZE[1], module.FRAME_SIZE[0], c),
+                      tf.float32, name=f"input_{k}")
+        for k, c in enumerate(channels)
+    ]
+    out = onnx_path(keras_path)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=out)
+    print(f"{name} : {out} ({os.path.getsize(out) / 2**20:.1f} Mo)")
+    return out
+
+
+def quantize(name, clips):
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static,
+    )
+    _, keras_path, _ = MODELS[name]
+    fp32, int8 = onnx_path(keras_path), onnx_path(keras_path, quantized=True)
+    input_names = OnnxModel(fp32).input_names
+
+    class ClipReader(CalibrationDataReader):
+        def __init__(self):
+            self._clips = iter(clips)
+
+        def get_next(self):
+            path = next(self._clips, None)
+            if path is None:
+                return None
+            # Le graphe exporté reçoit du float32 dans [0, 1]
+            return dict(zip(input_names, map(to_float_input, clip_inputs(name, path))))
+
+    quantize_static(
+        fp32, int8, ClipReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    print(f"{name} : {int8} ({os.path.getsize(int8) / 2**20:.1f} Mo, {len(clips)} clips de calibration)")
+
+
+def report(name, clips, repeat):
+    module, keras_path, _ = MODELS[name]
+    inputs = [clip_inputs(name, path) for path in clips]
+
+    def keras_backend():
+        return CompiledModel(module._load_keras(), module.INPUT_SIGNATURE)
+
+    backends = [("keras", keras_backend)]
+    for label, quantized in (("onnx", False), ("onnx_int8", True)):
+        path = onnx_path(keras_path, quantized)
+        if os.path.exists(path):
+            backends.append((label, lambda p=path: OnnxModel(p)))
+
+    print(f"\n== {name} : {len(clips)} clip(s), {repeat} répétition(s)")
+    print(f"{'backend':<10} {'p50 ms':>8} {'p99 ms':>8} {'RSS Mo':>8} {'écart moy':>10} {'écart max':>10} {'décisions':>10}")
+    reference = None
+    threshold = getattr(module, "THRESHOLD", None) or getattr(module, "THRESHOLD_I3D")
+    for label, load in backends:
+        rss0 = _rss_mb()
+        model = load()
+        model(*inputs[0])  # préchauffage
+        latencies, probs = [], []
+        for arrays in inputs:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                out = model(*arrays)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            probs.append(_prob(out))
+        rss = _rss_mb() - rss0
+        probs = np.array(probs)
+        if reference is None:
+            reference = probs
+        drift = np.abs(probs - reference)
+        flips = int(np.sum((probs > threshold) != (reference > threshold)))
+        print(f"{label:<10} {np.percentile(latencies, 50):8.1f} {np.percentile(latencies, 99):8.1f} "
+              f"{rss:8.1f} {drift.mean():10.4f} {drift.max():10.4f} {flips:>10}")
+        del model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ONNX / INT8 des modèles vidéo")
+    parser.add_argument("--models", type=str, default="all", help="two_stream,i3d,cnn_lstm ou all")
+    parser.add_argument("--clips", type=str, default=None, help="Dossier de clips (calibration et rapport)")
+    parser.add_argument("--calib-clips", type=int, default=32, help="Clips utilisés pour la calibration INT8")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--int8", action="store_true", help="Quantification statique INT8")
+    parser.add_argument("--skip-export", action="store_true", help="Réutiliser les .onnx existants")
+    parser.add_argument("--report", action="store_true", help="Latence, mémoire et écart vs Keras")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    names = list(MODELS) if args.models == "all" else args.models.split(",")
+    clips = []
+    if args.clips:
+        clips = sorted(
+            p for p in glob.glob(os.path.join(args.clips, "*"))
+            if p.lower().endswith(VIDEO_EXTS)
+        )
+    if (args.int8 or args.report) and not clips:
+        parser.error("--int8 et --report demandent un dossier --clips non vide")
+
+    for name in names:
+        if not args.skip_export:
+            export(name, args.opset)
+        if args.int8:
+            quantize(name, clips[:args.calib_clips])
+        if args.report:
+            report(name, clips, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# tools/labels.py
+# Jeux étiquetés des outils de réglage (tune_cascade, tune_motion_gate).
+# labels.csv : colonnes video_path,label (1 = violent, 0 = non violent) et,
+# facultativement, start,end en secondes. Sans start/end, l'étiquette vaut
+# pour toute la vidéo ; avec, pour cet intervalle seulement, et les segments
+# d'une vidéo qui ne recoupent aucun intervalle positif sont négatifs.
+import csv
+
+
+def read_labels(path):
+    """{video_path: [(start, end, label)]}, start et end à None pour une
+    étiquette de vidéo entière. Ordre des vidéos du fichier conservé."""
+    videos = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            start, end = row.get("start") or None, row.get("end") or None
+            videos.setdefault(row["video_path"], []).append((
+                float(start) if start is not None else None,
+                float(end) if end is not None else None,
+                int(row["label"]),
+            ))
+    return videos
+
+
+def video_label(entries):
+    """1 si la vidéo contient au moins un positif."""
+    return int(any(label == 1 for _, _, label in entries))
+
+
+def segment_labels(entries, intervals):
+    """Étiquette de chaque segment (s, e), ou None si la vidéo n'a qu'une
+    étiquette globale (le segment violent n'est alors pas connu)."""
+    spans = [(s, e) for s, e, label in entries if s is not None and label == 1]
+    if all(s is None for s, _, _ in entries):
+        return None
+    return [int(any(s < pe and ps < e for ps, pe in spans)) for s, e in intervals]
@@ -0,0 +1,98 @@
+# tools/smtp_sink.py
+# Serveur SMTP local minimal qui accepte tout et n'envoie rien : chaque
+# message reçu est affiché et, avec --out, écrit en .eml. Sert à vérifier les
+# récapitulatifs d'alertes (app/email_digest.py) sans vrai serveur, et à
+# compter connexions et messages pendant une rafale d'alertes.
+# Lancer depuis detection-violence-backend/ :
+#   python -m tools.smtp_sink --port 1025 --out /tmp/mails
+#   SMTP_HOST=localhost SMTP_PORT=1025 ALERT_EMAIL_TO=ops@localhost uvicorn main:app
+import argparse
+import asyncio
+import os
+import time
+from email import message_from_bytes
+
+stats = {"connections": 0, "messages": 0}
+
+
+async def handle(reader, writer, out_dir):
+    stats["connections"] += 1
+    peer = writer.get_extra_info("peername")
+
+    def reply(line):
+        writer.write(line.encode() + b"\r\n")
+
+    reply("220 smtp-sink prêt")
+    await writer.drain()
+    sender, recipients = None, []
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 smtp-sink")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(), []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 Fin par <CRLF>.<CRLF>")
+                await writer.drain()
+                data = []
+                while True:
+                    chunk = await reader.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                stats["messages"] += 1
+                raw = b"".join(data)
+                msg = message_from_bytes(raw)
+                print(f"[{peer[0]}:{peer[1]}] #{stats['messages']} {sender} -> {', '.join(recipients)} : "
+                      f"{msg['Subject']} (connexions : {stats['connections']})")
+                if out_dir:
+                    name = f"{time.time():.6f}-{stats['messages']}.eml"
+                    with open(os.path.join(out_dir, name), "wb") as f:
+                        f.write(raw)
+                reply("250 Message accepté")
+            elif verb in ("RSET", "NOOP"):
+                if verb == "RSET":
+                    sender, recipients = None, []
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Au revoir")
+                break
+            else:
+                reply("502 Commande non prise en charge")
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host, port, out_dir):
+    server = await asyncio.start_server(lambda r, w: handle(r, w, out_dir), host, port)
+    print(f"smtp-sink sur {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur SMTP local de test")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--out", type=str, default=None, help="Dossier où écrire les messages (.eml)")
+    args = parser.parse_args()
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.out))
+    except KeyboardInterrupt:
+        print(f"\n{stats['messages']} message(s) sur {stats['connections']} connexion(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# tools/tune_cascade.py
+# Choix du seuil de sortie anticipée de la cascade (CASCADE_LOW, voir
+# models/cascade_inference.py) sur un jeu local étiqueté : le plus grand
+# seuil qui ne fait perdre aucun positif détecté par le two-stream seul,
+# moins une marge. Le rappel de la cascade est alors au moins celui du
+# two-stream sur ce jeu. Affiche rappel, précision, taux d'escalade et coût
+# estimé pour une grille de seuils.
+# Les deux modèles sont évalués sur les mêmes segments de 5 s que la cascade
+# (_get_intervals), puisque le seuil s'applique segment par segment.
+# labels.csv : video_path,label et, facultativement, start,end (voir
+# tools/labels.py). Avec des intervalles étiquetés, le rappel est compté par
+# segment ; sinon par vidéo, positive dès qu'un segment l'est.
+# Lancer depuis detection-violence-backend/ :
+#   python -m tools.tune_cascade --labels labels.csv --margin 0.02 --out cascade.json
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from models import cnn_lstm_inference
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video
+from tools.labels import read_labels, segment_labels, video_label
+
+
+def score_video(path):
+    """(intervalles, probs CNN-LSTM, probs two-stream, durées moyennes par
+    segment en s) sur les segments de la cascade, un seul décodage.
+    Durées : décodage, étape 1, flux + two-stream."""
+    fps, total = probe_video(path)
+    duration = total / fps if fps > 0 else 0.0
+    # Même découpage que app/inference.run_model pour la cascade
+    intervals = ts._get_intervals(duration, duration < 10)
+    index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+    clip = np.empty((ts.MAX_FRAMES, ts.FRAME_SIZE[1], ts.FRAME_SIZE[0], 3), np.uint8)
+
+    cheap, full, costs = [], [], []
+    t0 = time.perf_counter()
+    for k, frames in enumerate(ts._iter_segment_frames(path, index_lists)):
+        t1 = time.perf_counter()
+        # Même entrée que l'étape 1 de la cascade
+        for i, bgr in enumerate(frames):
+            if bgr is None:
+                clip[i] = 0
+            else:
+                cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=clip[i])
+        cheap.append(cnn_lstm_inference.predict_clip(clip))
+        t2 = time.perf_counter()
+        rgb, flow = ts._segment_tensors(frames, idxs=index_lists[k])
+        full.append(ts.predict_tensors(rgb, flow))
+        t3 = time.perf_counter()
+        costs.append((t1 - t0, t2 - t1, t3 - t2))
+        t0 = time.perf_counter()
+    return intervals, np.array(cheap), np.array(full), costs
+
+
+def evaluate(low, videos, unit):
+    """Décisions de la cascade pour le seuil `low`, par segment ou par vidéo."""
+    escalated = np.concatenate([v["cheap"] >= low for v in videos])
+    if unit == "segment":
+        pred = escalated & np.concatenate([v["full"] > ts.THRESHOLD for v in videos])
+        pos = np.concatenate([v["labels"] for v in videos]) == 1
+    else:
+        pred = np.array([
+            bool(np.any((v["cheap"] >= low) & (v["full"] > ts.THRESHOLD))) for v in videos
+        ])
+        pos = np.array([v["label"] == 1 for v in videos])
+    tp = int(np.sum(pred & pos))
+    return {
+        "low": round(float(low), 4),
+        "recall": tp / max(int(np.sum(pos)), 1),
+        "precision": tp / max(int(np.sum(pred)), 1),
+        "escalation_rate": float(np.mean(escalated)) if len(escalated) else 0.0,
+    }
+
+
+def max_low(videos, unit):
+    """Plus grand seuil gardant tous les positifs que le two-stream détecte :
+    chaque segment positif détecté (par segment), ou au moins un segment
+    détecté de chaque vidéo positive (par vidéo)."""
+    bounds = []
+    for v in videos:
+        hit = v["full"] > ts.THRESHOLD
+        if unit == "segment":
+            bounds.extend(v["cheap"][hit & (v["labels"] == 1)])
+        elif v["label"] == 1 and hit.any():
+            bounds.append(v["cheap"][hit].max())
+    return float(min(bounds)) if bounds else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réglage du seuil de la cascade CNN-LSTM -> two-stream")
+    parser.add_argument("--labels", type=str, required=True, help="CSV video_path,label[,start,end]")
+    parser.add_argument("--margin", type=float, default=0.02, help="Marge retirée au seuil maximal")
+    parser.add_argument("--out", type=str, default=None, help="Fichier JSON du résultat")
+    args = parser.parse_args()
+
+    labelled = read_labels(args.labels)
+    if not labelled:
+        parser.error("Aucune vidéo dans --labels")
+
+    videos, costs = [], []
+    for k, (path, entries) in enumerate(labelled.items(), 1):
+        intervals, cheap, full, t = score_video(path)
+        videos.append({
+            "cheap": cheap, "full": full, "label": video_label(entries),
+            "labels": segment_labels(entries, intervals),
+        })
+        costs.extend(t)
+        print(f"[{k}/{len(labelled)}] {path} : {len(intervals)} segments, "
+              f"cnn_lstm max {cheap.max(initial=0):.3f}  two-stream max {full.max(initial=0):.3f}  "
+              f"label {videos[-1]['label']}")
+    unit = "segment" if all(v["labels"] is not None for v in videos) else "video"
+    for v in videos:
+        if v["labels"] is not None:
+            v["labels"] = np.array(v["labels"])
+    decode, stage1, stage2 = np.mean(costs, axis=0) if costs else (0.0, 0.0, 0.0)
+
+    # Référence : two-stream seul
+    base = evaluate(0.0, videos, unit)
+    low_max = max_low(videos, unit)
+    low = max(low_max - args.margin, 0.0)
+    chosen = evaluate(low, videos, unit)
+    print(f"\nRappel compté par {unit}")
+
+    def cost(rate):
+        return decode + stage1 + rate * stage2
+
+    print(f"\n{'seuil':>8} {'rappel':>8} {'précision':>10} {'escalade':>9} {'coût ms':>9}")
+    print(f"{'seul':>8} {base['recall']:8.3f} {base['precision']:10.3f} {1.0:9.0%} "
+          f"{(decode + stage2) * 1000:9.1f}")
+    for candidate in sorted(set(np.round(np.linspace(0.05, 0.5, 10), 2)) | {round(low, 4)}):
+        r = evaluate(candidate, videos, unit)
+        mark = "  <- choisi" if candidate == round(low, 4) else ""
+        print(f"{r['low']:8.3f} {r['recall']:8.3f} {r['precision']:10.3f} "
+              f"{r['escalation_rate']:9.0%} {cost(r['escalation_rate']) * 1000:9.1f}{mark}")
+
+    print(f"\nCASCADE_LOW={low:.4f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "cascade_low": low,
+                "low_max": low_max,
+                "margin": args.margin,
+                "videos": len(labelled),
+                "segments": len(costs),
+                "unit": unit,
+                "two_stream_alone": base,
+                "cascade": chosen,
+                "mean_seconds_per_segment": {"decode": decode, "cnn_lstm": stage1, "flow_two_stream": stage2},
+            }, f, indent=2)
+        print(f"Résultat écrit dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
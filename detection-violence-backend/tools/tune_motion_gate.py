@@ -0,0 +1,109 @@
+# tools/tune_motion_gate.py
+# Choix du seuil du filtre de mouvement (MOTION_GATE_THRESHOLD, voir
+# models/segment_preprocess.py) sur des vidéos réelles étiquetées : le plus
+# grand seuil qui n'écarte aucun segment positif, moins une marge relative.
+# Segments positifs : ceux des intervalles étiquetés violents (labels.csv
+# avec start,end, voir tools/labels.py) ou, avec une étiquette par vidéo,
+# ceux que le two-stream détecte dans les vidéos violentes. Le rappel du
+# two-stream filtré est alors celui du two-stream seul sur ce jeu. Affiche
+# taux de segments ignorés et positifs perdus pour une grille de seuils.
+# Lancer depuis detection-violence-backend/ :
+#   python -m tools.tune_motion_gate --labels labels.csv --margin 0.2 --out gate.json
+import argparse
+import json
+
+import numpy as np
+
+from models import two_stream_inference as ts
+from models.frame_sampler import probe_video
+from models.segment_preprocess import motion_energy
+from tools.labels import read_labels, segment_labels, video_label
+
+
+def score_video(path):
+    """(intervalles, énergie de mouvement, prob two-stream) des segments de
+    5 s que predict_two_stream évalue, filtre désactivé."""
+    fps, total = probe_video(path)
+    intervals = ts._get_intervals(total / fps if fps > 0 else 0.0, False)
+    index_lists = [ts._segment_indices(s, e, fps, total) for s, e in intervals]
+    energies = [motion_energy(f) for f in ts._iter_segment_frames(path, index_lists)]
+    probs = ts._score_segments(path, intervals, fps, total)
+    return intervals, np.array(energies), np.array(probs)
+
+
+def evaluate(threshold, segments):
+    """Segments ignorés, positifs perdus et rappel par vidéo pour `threshold`."""
+    energy = np.concatenate([s["energy"] for s in segments])
+    protected = np.concatenate([s["protected"] for s in segments])
+    gated = energy < threshold
+    caught = [
+        bool(np.any((s["probs"] > ts.THRESHOLD) & (s["energy"] >= threshold)))
+        for s in segments if s["label"] == 1
+    ]
+    return {
+        "threshold": round(float(threshold), 5),
+        "skip_rate": float(np.mean(gated)) if len(gated) else 0.0,
+        "positives_lost": int(np.sum(gated & protected)),
+        "video_recall": float(np.mean(caught)) if caught else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réglage du seuil du filtre de mouvement")
+    parser.add_argument("--labels", type=str, required=True, help="CSV video_path,label[,start,end]")
+    parser.add_argument("--margin", type=float, default=0.2, help="Marge relative retirée au seuil maximal")
+    parser.add_argument("--out", type=str, default=None, help="Fichier JSON du résultat")
+    args = parser.parse_args()
+
+    videos = read_labels(args.labels)
+    if not videos:
+        parser.error("Aucune vidéo dans --labels")
+
+    segments = []
+    for k, (path, entries) in enumerate(videos.items(), 1):
+        intervals, energy, probs = score_video(path)
+        label = video_label(entries)
+        per_segment = segment_labels(entries, intervals)
+        if per_segment is not None:
+            protected = np.array(per_segment, bool)
+        else:
+            protected = (probs > ts.THRESHOLD) if label == 1 else np.zeros(len(probs), bool)
+        segments.append({"energy": energy, "probs": probs, "protected": protected, "label": label})
+        low = f"{energy[protected].min():.5f}" if protected.any() else "-"
+        print(f"[{k}/{len(videos)}] {path} : {len(intervals)} segments, "
+              f"énergie min des positifs {low}, label {label}")
+
+    protected_energy = np.concatenate([s["energy"][s["protected"]] for s in segments])
+    protected_energy = protected_energy[np.isfinite(protected_energy)]
+    if len(protected_energy) == 0:
+        print("\nAucun segment positif : impossible de vérifier le rappel, filtre laissé désactivé")
+        threshold_max, threshold = 0.0, 0.0
+    else:
+        threshold_max = float(protected_energy.min())
+        threshold = threshold_max * (1.0 - args.margin)
+    chosen = evaluate(threshold, segments)
+
+    print(f"\n{'seuil':>9} {'ignorés':>8} {'positifs perdus':>16} {'rappel vidéo':>13}")
+    grid = sorted(set(np.round(np.linspace(0.001, 0.02, 10), 4)) | {round(threshold, 5)})
+    for candidate in grid:
+        r = evaluate(candidate, segments)
+        mark = "  <- choisi" if candidate == round(threshold, 5) else ""
+        print(f"{r['threshold']:9.4f} {r['skip_rate']:8.0%} {r['positives_lost']:>16} "
+              f"{r['video_recall']:13.3f}{mark}")
+
+    print(f"\nMOTION_GATE_THRESHOLD={threshold:.5f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "motion_gate_threshold": threshold,
+                "threshold_max": threshold_max,
+                "margin": args.margin,
+                "videos": len(videos),
+                "segments": int(sum(len(s["energy"]) for s in segments)),
+                "gate": chosen,
+            }, f, indent=2)
+        print(f"Résultat écrit dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
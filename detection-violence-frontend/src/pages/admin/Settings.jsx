@@ -11,24 +11,34 @@ const Settings = () => {
   const [selectedUser, setSelectedUser] = useState(null);
 
   useEffect(() => {
-    fetch('http://localhost:8000/admin/users', {
-      headers: {
-        Authorization: `Bearer ${localStorage.getItem('token')}`,
-      }
-    })
-      .then(async (res) => {
+    // La liste est paginée : on suit l'en-tête X-Next-Cursor jusqu'à la dernière page
+    const loadUsers = async () => {
+      const all = [];
+      let cursor = null;
+      do {
+        const url = cursor
+          ? `http://localhost:8000/admin/users?cursor=${encodeURIComponent(cursor)}`
+          : 'http://localhost:8000/admin/users';
+        const res = await fetch(url, {
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem('token')}`,
+          }
+        });
         if (res.status === 403) {
           const data = await res.json();
           setError(data.detail || "Accès interdit.");
           return;
         }
         if (!res.ok) throw new Error("Une erreur est survenue");
-        const data = await res.json();
-        setUsers(data);
-      })
-      .catch(err => {
-        setError(err.message || "Erreur réseau");
-      });
+        all.push(...(await res.json()));
+        cursor = res.headers.get('X-Next-Cursor');
+      } while (cursor);
+      setUsers(all);
+    };
+
+    loadUsers().catch(err => {
+      setError(err.message || "Erreur réseau");
+    });
   }, []);
 
   const handleDelete = async (id) => {